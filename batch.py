@@ -0,0 +1,190 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from function import (EEGRingBuffer, StreamingEEGFilter, WelchEngine, get_band_power_calculator,
+                      DEFAULT_BANDS, MAINS_FREQUENCIES)
+from recorder import load_recording, load_timestamps
+
+OUTPUT_FORMATS = ('npz', 'parquet')
+
+def session_basename(path):
+    """Accepte 'Test1_raw', 'Test1_raw.json' ou 'Test1_raw.f32'."""
+    root, ext = os.path.splitext(path)
+    return root if ext in ('.json', '.f32') else path
+
+def is_session(basename):
+    """Vrai si 'basename' désigne un enregistrement RawRecorder (.json et .f32 présents)."""
+    return os.path.isfile(basename + '.json') and os.path.isfile(basename + '.f32')
+
+def sliding_band_powers(basename, win_size=2.0, hop=0.5, filtering=True, bands=None, chunk_seconds=60,
+                        notch_freq=60, harmonics=1):
+    """
+    Puissance par bande sur fenêtres glissantes d'un enregistrement (RawRecorder).
+    Les données sont lues par blocs (mémoire projetée) et traitées avec les mêmes
+    briques que le pipeline en direct (filtre causal, Welch incrémental) : le résultat
+    ne dépend ni de la taille des blocs ni d'une cadence d'affichage.
+    Le pas est arrondi au multiple le plus proche du pas des segments de Welch : chaque
+    fenêtre commence alors sur un segment et sa moyenne est exactement celle de
+    scipy.signal.welch sur la fenêtre (le pas réellement utilisé est dans les métadonnées).
+    Renvoie (indices de fin de fenêtre, puissances fenêtres x canaux x bandes, métadonnées).
+    """
+    data, meta = load_recording(basename)
+    fs = meta['fs']
+    rows = list(meta.get('eeg_channels') or range(meta['n_rows']))
+    bands = dict(DEFAULT_BANDS if bands is None else bands)
+    win_n = max(1, int(round(win_size * fs)))
+    buffer = EEGRingBuffer(len(rows), win_n)
+    engine = WelchEngine(len(rows), fs, win_n)
+    # Les segments sont alignés sur k * step : un début de fenêtre hors de cette grille
+    # moyennerait des segments décalés par rapport à la fenêtre
+    hop_n = max(1, int(round(hop * fs / engine.step))) * engine.step
+    n_samples = data.shape[1]
+    n_windows = max(0, (n_samples - win_n) // hop_n + 1)
+    ends = win_n + hop_n * np.arange(n_windows, dtype=np.int64)
+    powers = np.zeros((n_windows, len(rows), len(bands)))
+    stream_filter = (StreamingEEGFilter(len(rows), fs, notch_freq=notch_freq, harmonics=harmonics)
+                     if filtering else None)
+    calculator = None
+    window = 0
+    chunk_n = max(1, int(chunk_seconds * fs))
+    for start in range(0, n_samples if n_windows else 0, chunk_n):
+        block = np.asarray(data[rows, start:start + chunk_n], dtype=np.float64)
+        if stream_filter is not None:
+            block = stream_filter.process(block)
+        pos = 0
+        while pos < block.shape[1] and window < n_windows:
+            # Avancer jusqu'à la fin de la prochaine fenêtre (ou du bloc)
+            take = min(block.shape[1] - pos, ends[window] - (start + pos))
+            buffer.append(block[:, pos:pos + take])
+            pos += take
+            if buffer.total_samples == ends[window]:
+                freqs, psds = engine.update(buffer)
+                if calculator is None:
+                    calculator = get_band_power_calculator(freqs, bands)
+                powers[window] = calculator.compute(psds)
+                window += 1
+    meta = dict(meta, eeg_channels=rows, bands=list(bands), win_size=win_n / fs, hop=hop_n / fs,
+                filtering=filtering, notch_freq=notch_freq, harmonics=harmonics)
+    return ends, powers, meta
+
+def band_power_columns(ends, powers, meta, timestamps=None):
+    """
+    Table en colonnes : 'sample' (fin de fenêtre), 'time_s' (depuis le début de l'enregistrement),
+    'timestamp' (horodatage Unix du dernier échantillon de la fenêtre, si connu), puis une colonne
+    par canal et par bande ('Ch1_Alpha') et la moyenne sur les canaux par bande ('Alpha').
+    'timestamps' sont les horodatages par échantillon de l'enregistrement (load_timestamps) ;
+    à défaut, l'heure de début à la seconde près ('started_at') sert d'estimation.
+    """
+    fs = meta['fs']
+    columns = {'sample': ends, 'time_s': ends / fs}
+    if timestamps is not None and (not len(ends) or len(timestamps) >= ends[-1]):
+        columns['timestamp'] = np.asarray(timestamps[ends - 1], dtype=np.float64)
+    elif meta.get('started_at'):
+        origin = datetime.fromisoformat(meta['started_at']).timestamp()
+        columns['timestamp'] = origin + ends / fs
+    for b, band in enumerate(meta['bands']):
+        for c in range(powers.shape[1]):
+            columns[f"Ch{c + 1}_{band}"] = powers[:, c, b]
+    for b, band in enumerate(meta['bands']):
+        columns[band] = powers[:, :, b].mean(axis=1)
+    return columns
+
+def write_columns(path, columns, fmt='npz'):
+    """Écrit une table en colonnes (.npz, ou .parquet si pyarrow est installé)."""
+    if fmt == 'parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Le format parquet nécessite pyarrow (pip install pyarrow)")
+        pyarrow.parquet.write_table(pyarrow.table(columns), path)
+    else:
+        np.savez(path, **columns)
+
+def reprocess_session(basename, output_dir, win_size=2.0, hop=0.5, filtering=True, bands=None, fmt='npz',
+                      notch_freq=60, harmonics=1):
+    """
+    Retraite une session et écrit <session>_bands.<fmt> + description JSON.
+    Renvoie un résumé (chemin de sortie, nombre de fenêtres, durée de traitement).
+    """
+    start = time.perf_counter()
+    basename = session_basename(basename)
+    ends, powers, meta = sliding_band_powers(basename, win_size, hop, filtering, bands,
+                                             notch_freq=notch_freq, harmonics=harmonics)
+    os.makedirs(output_dir, exist_ok=True)
+    output = os.path.join(output_dir, os.path.basename(basename) + '_bands.' + fmt)
+    write_columns(output, band_power_columns(ends, powers, meta, load_timestamps(basename)), fmt)
+    meta.update({'source': os.path.abspath(basename), 'windows': len(ends),
+                 'processed_at': datetime.now().isoformat(timespec='seconds')})
+    with open(os.path.splitext(output)[0] + '.json', 'w') as file:
+        json.dump(meta, file, indent=2)
+    return {'session': basename, 'output': output, 'windows': len(ends),
+            'seconds': time.perf_counter() - start}
+
+def reprocess_sessions(basenames, output_dir, workers=None, **options):
+    """
+    Retraite plusieurs sessions en parallèle (une session par processus).
+    Renvoie les résumés dans l'ordre des sessions ; une erreur n'arrête pas les autres.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(reprocess_session, basename, output_dir, **options) for basename in basenames]
+        for basename, future in zip(basenames, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'session': basename, 'error': f"{type(e).__name__}: {e}"})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retraitement hors ligne de sessions enregistrées "
+                                                 "(puissance par bande sur fenêtres glissantes).")
+    parser.add_argument('sessions', nargs='+', help="Sessions (chemin sans extension, .json ou motif glob)")
+    parser.add_argument('--output-dir', default='batch_results', help="Dossier des résultats")
+    parser.add_argument('--win-size', type=float, default=2.0, help="Fenêtre d'analyse (s)")
+    parser.add_argument('--hop', type=float, default=0.5,
+                        help="Pas entre deux fenêtres (s), arrondi à un multiple du pas des segments de Welch")
+    parser.add_argument('--no-filter', action='store_true', help="Désactiver le filtrage passe-bande + notch")
+    parser.add_argument('--mains', type=int, choices=MAINS_FREQUENCIES, default=60,
+                        help="Fréquence du secteur à rejeter (Hz)")
+    parser.add_argument('--harmonics', type=int, default=1, help="Nombre d'harmoniques du secteur à rejeter")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='npz', help="Format en colonnes des résultats")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    args = parser.parse_args(argv)
+    if args.format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        parser.error("le format parquet nécessite pyarrow (pip install pyarrow)")
+
+    basenames = []
+    for pattern in args.sessions:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            basenames.append(session_basename(pattern))  # session absente : signalée par reprocess_sessions
+            continue
+        # Seuls les enregistrements complets (.json + .f32) sont des sessions : les autres fichiers
+        # du dossier (horodatages _ts.f64, _power.csv, _epochs.npz, résultats) sont ignorés
+        basenames += [basename for basename in map(session_basename, matches) if is_session(basename)]
+    basenames = list(dict.fromkeys(basenames))
+    start = time.perf_counter()
+    results = reprocess_sessions(basenames, args.output_dir, args.workers, win_size=args.win_size,
+                                 hop=args.hop, filtering=not args.no_filter, fmt=args.format,
+                                 notch_freq=args.mains, harmonics=args.harmonics)
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+            print(f"{result['session']}: ERREUR {result['error']}")
+        else:
+            print(f"{result['session']}: {result['windows']} fenêtres -> {result['output']} "
+                  f"({result['seconds']:.1f} s)")
+    print(f"{len(results) - failed}/{len(results)} sessions traitées en {time.perf_counter() - start:.1f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
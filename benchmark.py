@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import scipy
+from function import (eeg_filtering, compute_fft_welch, compute_power_bands, EEGRingBuffer,
+                      StreamingEEGFilter, WelchEngine, get_band_power_calculator)
+from decimation import DisplayDecimator
+from timefreq import StreamingSpectrogram
+
+# Budget d'import (ms, temps cumulé mesuré par -X importtime) et modules lourds
+# qui ne doivent pas être chargés par l'import (ils le sont à la première utilisation)
+IMPORT_BUDGETS = {
+    'function': (250, ('scipy', 'brainflow')),
+    'pipeline': (300, ('scipy', 'brainflow')),
+    'headless': (350, ('scipy', 'brainflow')),
+    'main': (1500, ('scipy', 'brainflow', 'pyqtgraph.opengl')),
+}
+
+def synthetic_eeg(n_channels, n_samples, fs, seed=0):
+    """
+    Signal EEG synthétique reproductible : bruit, rythme alpha, secteur 60 Hz et offset DC.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / fs
+    data = rng.normal(0, 20, (n_channels, n_samples))
+    data += 30 * np.sin(2 * np.pi * 10 * t) + 10 * np.sin(2 * np.pi * 60 * t)
+    data += rng.uniform(-5000, 5000, (n_channels, 1))
+    return data
+
+def time_calls(call, min_calls=5, max_calls=200, budget=1.0):
+    """
+    Exécute call() plusieurs fois (après un appel de chauffe) et renvoie les durées (s).
+    """
+    call()
+    durations = []
+    start = time.perf_counter()
+    while len(durations) < max_calls:
+        t0 = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - t0)
+        if len(durations) >= min_calls and time.perf_counter() - start > budget:
+            break
+    return np.array(durations)
+
+def peak_memory(call):
+    """Pic d'allocation (octets) mesuré par tracemalloc pendant un appel."""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(name, call, samples_per_call, params, budget):
+    """
+    Mesure une fonction et renvoie un dictionnaire de résultats.
+    """
+    durations = time_calls(call, budget=budget)
+    p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+    return dict(params, name=name, calls=len(durations),
+                p50_ms=p50 * 1e3, p90_ms=p90 * 1e3, p99_ms=p99 * 1e3, mean_ms=durations.mean() * 1e3,
+                samples_per_s=samples_per_call / durations.mean(),
+                peak_bytes=peak_memory(call))
+
+def streaming_case(n_channels, fs, window, hop):
+    """
+    Prépare un état en régime établi (buffer plein) et renvoie les appels par pas de 'hop' secondes.
+    """
+    capacity = int(window * fs)
+    step = max(1, int(hop * fs))
+    data = synthetic_eeg(n_channels, capacity + 64 * step, fs)
+    buffer = EEGRingBuffer(n_channels, capacity)
+    stream_filter = StreamingEEGFilter(n_channels, fs)
+    engine = WelchEngine(n_channels, fs, capacity)
+    buffer.append(data[:, :capacity])
+    stream_filter.process(data[:, :capacity])
+    engine.update(buffer)
+    decimators = {mode: DisplayDecimator(mode) for mode in ('minmax', 'lttb')}
+    # Largeur de tracé d'au plus 1000 pixels, mais assez étroite pour que la réduction ait lieu :
+    # paquets d'au moins 4 échantillons en minmax (deux points par paquet), 3 en lttb (deux paquets par pixel)
+    widths = {'minmax': min(1000, capacity // 4), 'lttb': min(1000, capacity // 6)}
+    for mode, decimator in decimators.items():
+        _, y = decimator.update(buffer.latest(), buffer.total_samples, widths[mode])
+        assert y.shape[1] < capacity, f"fenêtre trop courte pour la réduction {mode}"
+    spectrograms = {method: StreamingSpectrogram(n_channels, fs, 100, hop=step, method=method)
+                    for method in ('stft', 'multitaper')}
+    for spectrogram in spectrograms.values():
+        spectrogram.update(buffer)
+    state = {'pos': capacity}
+
+    def next_chunk():
+        start = state['pos']
+        if start + step > data.shape[1]:
+            start = capacity
+        state['pos'] = start + step
+        return data[:, start:start + step]
+
+    def append():
+        buffer.append(next_chunk())
+
+    def filter_chunk():
+        stream_filter.process(next_chunk())
+
+    def welch_update():
+        buffer.append(next_chunk())
+        engine.update(buffer)
+
+    def decimate(mode):
+        def call():
+            buffer.append(next_chunk())
+            decimators[mode].update(buffer.latest(), buffer.total_samples, widths[mode])
+        return call
+
+    def spectrogram_update(method):
+        def call():
+            buffer.append(next_chunk())
+            spectrograms[method].update(buffer)
+        return call
+
+    return step, {'ring_buffer.append': append,
+                  'StreamingEEGFilter.process': filter_chunk,
+                  'WelchEngine.update': welch_update,
+                  'DisplayDecimator.minmax': decimate('minmax'),
+                  'DisplayDecimator.lttb': decimate('lttb'),
+                  'StreamingSpectrogram.stft': spectrogram_update('stft'),
+                  'StreamingSpectrogram.multitaper': spectrogram_update('multitaper')}
+
+def run_suite(channels, rates, windows, hop=0.1, budget=1.0, verbose=True):
+    """
+    Balaye canaux x fréquences d'échantillonnage x fenêtres et renvoie la liste des mesures.
+    """
+    results = []
+    for fs in rates:
+        for window in windows:
+            for n_channels in channels:
+                params = {'channels': n_channels, 'fs': fs, 'window_s': window, 'hop_s': hop}
+                n_samples = int(window * fs)
+                data = synthetic_eeg(n_channels, n_samples, fs)
+                filtered = eeg_filtering(data, fs)
+                freqs, psds = compute_fft_welch(filtered, fs)
+                calculator = get_band_power_calculator(freqs)
+                window_samples = n_channels * n_samples
+                # Fonctions « fenêtre complète » (chemin historique)
+                cases = [
+                    ('eeg_filtering', lambda: eeg_filtering(data, fs), window_samples),
+                    ('compute_fft_welch', lambda: compute_fft_welch(filtered, fs), window_samples),
+                    ('compute_power_bands', lambda: compute_power_bands(freqs, psds), psds.size),
+                    ('BandPowerCalculator.compute', lambda: calculator.compute(psds), psds.size),
+                ]
+                # Remplaçants en continu (coût par pas de 'hop' secondes)
+                step, streaming = streaming_case(n_channels, fs, window, hop)
+                cases += [(name, call, n_channels * step) for name, call in streaming.items()]
+                for name, call, samples in cases:
+                    result = measure(name, call, samples, params, budget)
+                    results.append(result)
+                    if verbose:
+                        print(f"{name:28s} ch={n_channels:<3d} fs={fs:<6d} win={window:<5g}s "
+                              f"p50={result['p50_ms']:9.3f}ms p99={result['p99_ms']:9.3f}ms "
+                              f"{result['samples_per_s'] / 1e6:9.2f} Msamples/s "
+                              f"peak={result['peak_bytes'] / 1e6:8.2f}MB")
+    return results
+
+def import_time(module):
+    """
+    Importe 'module' dans un nouvel interpréteur (python -X importtime).
+    Renvoie (temps cumulé en ms, ensemble des modules chargés) ; RuntimeError si l'import échoue.
+    """
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ['import impossible'])[-1])
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    return cumulative / 1e3, set(proc.stdout.split())
+
+def check_imports(budgets=None, repeat=3, verbose=True):
+    """
+    Vérifie le temps d'import de chaque module (meilleur de 'repeat' essais) et l'absence
+    des modules lourds différés. 'ok' vaut None si le module ne peut pas être importé ici.
+    """
+    results = []
+    for module, (budget_ms, deferred) in (budgets or IMPORT_BUDGETS).items():
+        try:
+            times, loaded = zip(*(import_time(module) for _ in range(repeat)))
+        except RuntimeError as e:
+            result = {'module': module, 'budget_ms': budget_ms, 'error': str(e), 'ok': None}
+        else:
+            eager = [name for name in deferred if name in loaded[0]]
+            result = {'module': module, 'import_ms': min(times), 'budget_ms': budget_ms,
+                      'eager_modules': eager, 'ok': min(times) <= budget_ms and not eager}
+        results.append(result)
+        if verbose:
+            if result['ok'] is None:
+                print(f"import {module:10s} ignoré ({result['error']})")
+            else:
+                status = 'OK' if result['ok'] else 'DÉPASSÉ'
+                eager = f" chargés trop tôt : {', '.join(result['eager_modules'])}" if result['eager_modules'] else ''
+                print(f"import {module:10s} {result['import_ms']:8.1f} ms / {budget_ms} ms  {status}{eager}")
+    return results
+
+def environment():
+    """Informations permettant de comparer deux exécutions."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        commit = None
+    return {'date': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'system': platform.system()}
+
+def compare(baseline, results):
+    """Affiche le rapport p50 (nouveau / référence) pour chaque mesure commune."""
+    key = lambda r: (r['name'], r['channels'], r['fs'], r['window_s'])
+    reference = {key(r): r for r in baseline['results']}
+    print(f"\nComparaison avec {baseline['environment'].get('commit')} (p50 nouveau / référence) :")
+    for result in results:
+        ref = reference.get(key(result))
+        if ref:
+            ratio = result['p50_ms'] / ref['p50_ms'] if ref['p50_ms'] else float('nan')
+            flag = '  <-- régression' if ratio > 1.2 else ''
+            print(f"{result['name']:28s} ch={result['channels']:<3d} fs={result['fs']:<6d} "
+                  f"win={result['window_s']:<5g}s x{ratio:6.2f}{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des traitements EEG (données synthétiques).")
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--rates', type=int, nargs='+', default=[250, 500, 1000, 16000])
+    parser.add_argument('--windows', type=float, nargs='+', default=[2, 10, 60], help="Fenêtres (s)")
+    parser.add_argument('--hop', type=float, default=0.1, help="Pas des traitements en continu (s)")
+    parser.add_argument('--budget', type=float, default=1.0, help="Temps de mesure par cas (s)")
+    parser.add_argument('--output', default='benchmark_results.json', help="Fichier JSON de résultats")
+    parser.add_argument('--compare', metavar='JSON', help="Résultats de référence à comparer")
+    parser.add_argument('--imports-only', action='store_true', help="Ne vérifier que le budget de temps d'import")
+    args = parser.parse_args(argv)
+
+    imports = check_imports()
+    failed = any(result['ok'] is False for result in imports)
+    if args.imports_only:
+        return 1 if failed else 0
+    results = run_suite(args.channels, args.rates, args.windows, args.hop, args.budget)
+    report = {'environment': environment(), 'config': vars(args), 'imports': imports, 'results': results}
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Résultats enregistrés dans {args.output}")
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import time
+import numpy as np
+import function
+from function import prepare_board
+from recorder import load_recording, load_timestamps
+
+BOARD_SOURCES = ('cyton', 'daisy', 'synthetic', 'replay')
+
+class ReplayBoard:
+    """
+    Source de données en pur numpy rejouant une session enregistrée (RawRecorder).
+    Respecte le contrat de BoardShim utilisé par l'application (start_stream,
+    get_board_data, stop_stream, release_session). speed=1 rejoue en temps réel,
+    speed=N N fois plus vite, speed=0 aussi vite que possible (blocs de chunk_size).
+    """
+    def __init__(self, basename, speed=1.0, chunk_size=None, loop=False):
+        self.data, self.metadata = load_recording(basename)
+        # Horodatages en pleine précision (la ligne float32 n'a qu'une résolution de ~128 s)
+        self.timestamps = load_timestamps(basename)
+        self.timestamp_row = self.metadata.get('timestamp_channel')
+        self.board_id = self.metadata.get('board_id')
+        if self.board_id is None:
+            self.board_id = function.BoardIds.CYTON_BOARD.value
+        self.fs = self.metadata['fs']
+        self.speed = speed
+        self.chunk_size = int(chunk_size or self.fs)
+        self.loop = loop
+        self.position = 0
+        self._start = None
+        self._released = 0  # échantillons « émis » depuis le début du stream
+
+    def prepare_session(self):
+        pass
+
+    def start_stream(self, buffer_size=45000, streamer_params=None):
+        self.buffer_size = buffer_size
+        self._start = time.monotonic()
+        self._released = 0
+
+    def stop_stream(self):
+        self._start = None
+
+    def release_session(self):
+        pass
+
+    @property
+    def finished(self):
+        return not self.loop and self.position >= self.data.shape[1]
+
+    def get_board_data(self, num_samples=None):
+        """
+        Renvoie les échantillons disponibles depuis le dernier appel (lignes x échantillons, float64).
+        """
+        if self._start is None:
+            return np.zeros((self.data.shape[0], 0))
+        if self.speed:
+            # Nombre d'échantillons écoulés selon l'horloge, borné par le buffer interne
+            due = int((time.monotonic() - self._start) * self.fs * self.speed)
+            count = min(due - self._released, self.buffer_size)
+            self._released = due
+        else:
+            count = self.chunk_size
+        if num_samples is not None:
+            count = min(count, num_samples)
+        return self._read(count)
+
+    def _read(self, count):
+        total = self.data.shape[1]
+        parts = []
+        while count > 0 and total:
+            if self.position >= total:
+                if not self.loop:
+                    break
+                self.position = 0
+            n = min(count, total - self.position)
+            part = np.array(self.data[:, self.position:self.position + n], dtype=np.float64)
+            if self.timestamps is not None and self.timestamp_row is not None:
+                part[self.timestamp_row] = self.timestamps[self.position:self.position + n]
+            parts.append(part)
+            self.position += n
+            count -= n
+        if not parts:
+            return np.zeros((self.data.shape[0], 0))
+        return np.concatenate(parts, axis=1)
+
+def get_timestamp_row(board_id):
+    """Ligne des horodatages de la carte, ou None si elle n'en a pas."""
+    try:
+        return function.BoardShim.get_timestamp_channel(board_id)
+    except Exception:
+        return None
+
+def get_marker_row(board_id):
+    """Ligne des marqueurs de stimulation de la carte, ou None si elle n'en a pas."""
+    try:
+        return function.BoardShim.get_marker_channel(board_id)
+    except Exception:
+        return None
+
+def open_board(source='cyton', com_port=None, replay_file=None, speed=1.0, loop=False):
+    """
+    Ouvre une source de données et renvoie (board, board_id, status) comme prepare_board.
+    """
+    if source == 'cyton':
+        return prepare_board(com_port)
+    if source == 'daisy':
+        return prepare_board(com_port, function.BoardIds.CYTON_DAISY_BOARD.value)  # Cyton + Daisy, 16 canaux
+    if source == 'synthetic':
+        return prepare_board(com_port, function.BoardIds.SYNTHETIC_BOARD.value)
+    if source == 'replay':
+        try:
+            board = ReplayBoard(replay_file, speed, loop=loop)
+        except Exception as e:
+            print('Error: ', e)
+            return None, None, e
+        return board, board.board_id, f'Replaying {replay_file} (x{speed or "max"})'
+    raise ValueError(f"Source inconnue : {source} (attendu : {', '.join(BOARD_SOURCES)})")
@@ -0,0 +1,177 @@
+import numpy as np
+from history import envelope_curve
+
+DECIMATION_MODES = ('minmax', 'lttb')
+
+def minmax_bins(data, bin_size):
+    """Minimum et maximum de chaque paquet de 'bin_size' échantillons (data.shape[1] multiple de bin_size)."""
+    blocks = data.reshape(data.shape[0], -1, bin_size)
+    return blocks.min(axis=2), blocks.max(axis=2)
+
+def _lttb_pick(block, block_x, anchor_x, anchor_y, next_x, next_y):
+    """
+    Étape LTTB pour tous les canaux : dans chaque ligne de 'block' (canaux x points),
+    le point formant le plus grand triangle avec le point retenu précédent (anchor)
+    et la moyenne du paquet suivant (next). Renvoie (positions, valeurs) par canal.
+    """
+    area = np.abs((anchor_x[:, np.newaxis] - next_x) * (block - anchor_y[:, np.newaxis])
+                  - (anchor_x[:, np.newaxis] - block_x) * (next_y - anchor_y)[:, np.newaxis])
+    best = area.argmax(axis=1)
+    rows = np.arange(block.shape[0])
+    return block_x[best], block[rows, best]
+
+def lttb(data, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets sur un tableau complet (canaux x échantillons) :
+    'n_out' points par canal, premier et dernier conservés. Renvoie (x, y), canaux x n_out.
+    """
+    n_channels, n = data.shape
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    if n_out >= n or n_out < 3:
+        return np.broadcast_to(x, data.shape), data
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    out_x = np.empty((n_channels, n_out))
+    out_y = np.empty((n_channels, n_out))
+    out_x[:, 0], out_y[:, 0] = x[0], data[:, 0]
+    out_x[:, -1], out_y[:, -1] = x[-1], data[:, -1]
+    for k in range(n_out - 2):
+        lo, hi = edges[k], edges[k + 1]
+        nxt = slice(hi, edges[k + 2] if k + 2 < len(edges) else n)
+        out_x[:, k + 1], out_y[:, k + 1] = _lttb_pick(data[:, lo:hi], x[lo:hi], out_x[:, k], out_y[:, k],
+                                                      x[nxt].mean(), data[:, nxt].mean(axis=1))
+    return out_x, out_y
+
+class DisplayDecimator:
+    """
+    Réduction de la fenêtre affichée à la largeur du tracé, entre le buffer et les courbes.
+    Les paquets sont alignés sur les indices absolus des échantillons (total_samples) :
+    un paquet complet garde le même contenu tant qu'il reste dans la fenêtre, son résultat
+    est donc mis en cache et seuls les paquets des nouveaux échantillons sont calculés.
+    - 'minmax' : enveloppe min/max, un paquet par pixel (aucun pic perdu) ;
+    - 'lttb' : Largest-Triangle-Three-Buckets, deux paquets par pixel (forme du signal).
+      Chaque point retenu dépend du précédent : le premier paquet de la fenêtre, puis les
+      suivants tant que leur point change, sont recalculés quand la fenêtre avance. Le résultat
+      est celui d'un décimateur neuf sur la même fenêtre (paquets alignés, différents de ceux de lttb()).
+    Le cache est vidé si la clé (canaux, filtrage...), la taille des paquets ou le flux changent.
+    """
+    def __init__(self, mode='minmax'):
+        if mode not in DECIMATION_MODES:
+            raise ValueError(f"Mode de réduction inconnu : {mode}")
+        self.mode = mode
+        self._key = None
+        self._total = 0
+        self.bin_size = 1
+
+    def _reset(self, key, n_channels, capacity):
+        self._key = key
+        self._ids = np.full(capacity, -1, dtype=np.int64)   # paquet stocké dans chaque emplacement
+        self._a = np.zeros((n_channels, capacity))           # min (minmax) ou position retenue (lttb)
+        self._b = np.zeros((n_channels, capacity))           # max (minmax) ou valeur retenue (lttb)
+
+    def update(self, data, total_samples, width, key=None):
+        """
+        Réduit la fenêtre 'data' (canaux x échantillons, les derniers reçus jusqu'à
+        'total_samples') pour un tracé de 'width' pixels.
+        Renvoie (x, y) : positions absolues (échantillons) et valeurs, canaux x points.
+        """
+        n_channels, n = data.shape
+        base = total_samples - n
+        bins = max(1, int(width)) * (1 if self.mode == 'minmax' else 2)
+        bin_size = -(-n // bins)
+        if bin_size < (2 if self.mode == 'minmax' else 3):
+            x = np.arange(base, total_samples, dtype=np.float64)
+            return np.broadcast_to(x, data.shape), data
+        capacity = n // bin_size + 2
+        full_key = (key, self.mode, n_channels, bin_size)
+        if full_key != self._key or capacity > self._ids.size or total_samples < self._total:
+            self._reset(full_key, n_channels, capacity)
+        self._total = total_samples
+        self.bin_size = bin_size
+        first = -(-base // bin_size)        # premier paquet entièrement dans la fenêtre
+        end = total_samples // bin_size     # paquets complets : first .. end-1
+        if self.mode == 'minmax':
+            return self._minmax(data, base, first, end)
+        return self._lttb(data, base, first, end)
+
+    def _cached(self, ids):
+        slots = ids % self._ids.size
+        return slots, ids[self._ids[slots] != ids]
+
+    def _minmax(self, data, base, first, end):
+        size = self.bin_size
+        ids = np.arange(first, max(first, end))
+        slots, missing = self._cached(ids)
+        if missing.size:
+            # Les paquets manquants sont consécutifs (fin de fenêtre) : un seul calcul vectorisé
+            new = np.arange(missing[0], missing[-1] + 1)
+            lo, hi = minmax_bins(data[:, new[0] * size - base:(new[-1] + 1) * size - base], size)
+            self._a[:, new % self._ids.size], self._b[:, new % self._ids.size] = lo, hi
+            self._ids[new % self._ids.size] = new
+        t, lo, hi = [ids * size + size / 2], [self._a[:, slots]], [self._b[:, slots]]
+        # Bords partiels (début et fin de fenêtre) : recalculés à chaque appel
+        head = data[:, :max(0, first * size - base)]
+        tail = data[:, max(0, max(first, end) * size - base):]
+        if head.shape[1]:
+            t.insert(0, [base + head.shape[1] / 2])
+            lo.insert(0, head.min(axis=1, keepdims=True))
+            hi.insert(0, head.max(axis=1, keepdims=True))
+        if tail.shape[1]:
+            t.append([base + data.shape[1] - tail.shape[1] / 2])
+            lo.append(tail.min(axis=1, keepdims=True))
+            hi.append(tail.max(axis=1, keepdims=True))
+        x, y = envelope_curve(np.concatenate(t), np.hstack(lo), np.hstack(hi))
+        return np.broadcast_to(x, y.shape), y
+
+    def _lttb(self, data, base, first, end):
+        size = self.bin_size
+        n_channels, n = data.shape
+        total = base + n
+        positions = np.arange(size, dtype=np.float64)
+        tail = data[:, max(0, max(first, end) * size - base):]
+        tail_mean = (total - tail.shape[1] / 2 - 0.5, tail.mean(axis=1)) if tail.shape[1] else \
+                    (total - 1.0, data[:, -1])
+
+        def block(k):
+            return data[:, k * size - base:(k + 1) * size - base]
+
+        def next_mean(k):
+            return (k + 1) * size + size / 2 - 0.5, block(k + 1).mean(axis=1)
+
+        def pick(k):
+            # Calcule le paquet k et le met en cache ; vrai si son point retenu a changé
+            slot, prev = k % self._ids.size, (k - 1) % self._ids.size
+            anchor = (self._a[:, prev], self._b[:, prev]) if k > first else \
+                     (np.full(n_channels, float(base)), data[:, 0])
+            x, y = _lttb_pick(block(k), k * size + positions, *anchor, *next_mean(k))
+            changed = self._ids[slot] != k or not (np.array_equal(x, self._a[:, slot])
+                                                   and np.array_equal(y, self._b[:, slot]))
+            self._a[:, slot], self._b[:, slot], self._ids[slot] = x, y, k
+            return changed
+
+        # Un paquet est mis en cache dès que le suivant est complet. Sont recalculés : le premier
+        # paquet (ancré sur le premier échantillon de la fenêtre, et non plus sur un paquet sorti),
+        # les paquets manquants, et les suivants de chacun tant que le point retenu change
+        ids = np.arange(first, max(first, end - 1))
+        slots, missing = self._cached(ids)
+        k = first
+        for start in [first, *missing]:
+            if start < k:
+                continue  # déjà recalculé
+            k = start
+            while k < first + ids.size and pick(k):
+                k += 1
+            k += 1
+        xs, ys = [np.full((n_channels, 1), float(base))], [data[:, :1]]
+        xs.append(self._a[:, slots])
+        ys.append(self._b[:, slots])
+        if end - 1 >= first:
+            # Dernier paquet complet : dépend de la fin partielle, recalculé à chaque appel
+            k = end - 1
+            prev = (k - 1) % self._ids.size
+            anchor = (self._a[:, prev], self._b[:, prev]) if self._ids[prev] == k - 1 else (xs[0][:, 0], ys[0][:, 0])
+            x, y = _lttb_pick(block(k), k * size + positions, *anchor, *tail_mean)
+            xs.append(x[:, np.newaxis])
+            ys.append(y[:, np.newaxis])
+        xs.append(np.full((n_channels, 1), float(total - 1)))
+        ys.append(data[:, -1:])
+        return np.hstack(xs), np.hstack(ys)
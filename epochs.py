@@ -0,0 +1,168 @@
+import collections
+import numpy as np
+from function import compute_fft_welch, get_band_power_calculator, DEFAULT_BANDS
+from recorder import load_recording
+
+def find_markers(marker_values, first_sample=0):
+    """
+    Événements d'une ligne marqueur BrainFlow (0 = pas d'événement) :
+    renvoie (indices absolus des échantillons, codes).
+    """
+    marker_values = np.asarray(marker_values)
+    index = np.flatnonzero(marker_values)
+    return first_sample + index, marker_values[index]
+
+class EpochCollector:
+    """
+    Découpage en époques autour des marqueurs de stimulation et moyennes évoquées (ERP).
+    Les événements sont mis en attente jusqu'à ce que les échantillons post-stimulus
+    soient arrivés, puis l'époque [tmin, tmax[ est découpée dans le buffer (ou dans
+    l'historique de session si elle n'y est plus). Les époques sont rangées dans un
+    tableau préalloué époques x canaux x échantillons (capacité doublée si nécessaire),
+    avec leur code, leur position et leur puissance par bande ; la moyenne de chaque
+    code est tenue à jour de façon incrémentale.
+    La ligne de base (moyenne avant le stimulus) est retirée de chaque époque.
+    """
+    def __init__(self, n_channels, fs, tmin=-0.2, tmax=0.8, bands=None, capacity=256, baseline=True):
+        self.n_channels = n_channels
+        self.fs = fs
+        self.pre = int(round(-tmin * fs))
+        self.post = int(round(tmax * fs))
+        if self.pre + self.post <= 0:
+            raise ValueError("Fenêtre d'époque vide (tmax doit être supérieur à tmin)")
+        self.n_samples = self.pre + self.post
+        self.times = (np.arange(self.n_samples) - self.pre) / fs
+        self.baseline = baseline and self.pre > 0
+        self.bands = dict(DEFAULT_BANDS if bands is None else bands)
+        self._epochs = np.zeros((capacity, n_channels, self.n_samples), dtype=np.float32)
+        self._codes = np.zeros(capacity)
+        self._onsets = np.zeros(capacity, dtype=np.int64)
+        self._band_power = np.zeros((capacity, n_channels, len(self.bands)))
+        self.count = 0
+        self.averages = {}  # code -> ERP (canaux x échantillons)
+        self.counts = {}    # code -> nombre d'époques moyennées
+        self.pending = collections.deque()  # (début absolu, code) en attente des échantillons
+        self.missed = 0     # événements dont les données n'étaient plus disponibles
+        self.history = None  # SessionHistory de secours pour les époques sorties du buffer
+
+    def add_events(self, onsets, codes):
+        """Ajoute des événements (indices absolus des échantillons, codes)."""
+        for onset, code in zip(onsets, codes):
+            self.pending.append((int(onset) - self.pre, code))
+
+    def update(self, buffer):
+        """
+        Découpe les époques complètes depuis un EEGRingBuffer (mêmes lignes que les époques).
+        Renvoie le nombre d'époques ajoutées.
+        """
+        total = buffer.total_samples
+        view = buffer.latest()
+        base = total - view.shape[1]
+        segments, onsets, codes = [], [], []
+        while self.pending and self.pending[0][0] + self.n_samples <= total:
+            start, code = self.pending[0]
+            stop = start + self.n_samples
+            if start >= base:
+                segment = view[:, start - base:stop - base]
+            elif self.history is not None and start >= 0 and len(self.history) < stop:
+                break  # historique pas encore écrit jusque-là : réessayer au prochain bloc
+            elif self.history is not None and start >= 0:
+                segment = self.history.read(start, stop)
+            else:
+                segment = None
+            self.pending.popleft()
+            if segment is None:
+                self.missed += 1
+                continue
+            segments.append(segment)
+            onsets.append(start + self.pre)
+            codes.append(code)
+        if segments:
+            self.store(np.stack(segments), onsets, codes)
+        return len(segments)
+
+    def store(self, segments, onsets, codes):
+        """
+        Range un lot d'époques (époques x canaux x échantillons) : ligne de base, ERP par code
+        et puissance par bande (un seul calcul de Welch pour tout le lot).
+        """
+        segments = np.asarray(segments, dtype=np.float64)
+        if self.baseline:
+            segments = segments - segments[:, :, :self.pre].mean(axis=2, keepdims=True)
+        k = segments.shape[0]
+        if self.count + k > self._epochs.shape[0]:
+            self._grow(self.count + k)
+        window = slice(self.count, self.count + k)
+        self._epochs[window] = segments
+        self._codes[window] = codes
+        self._onsets[window] = onsets
+        freqs, psds = compute_fft_welch(segments.reshape(k * self.n_channels, self.n_samples), self.fs)
+        calculator = get_band_power_calculator(freqs, self.bands)
+        self._band_power[window] = calculator.compute(psds).reshape(k, self.n_channels, -1)
+        for segment, code in zip(segments, codes):
+            # Moyenne glissante : ERP += (époque - ERP) / n
+            n = self.counts[code] = self.counts.get(code, 0) + 1
+            average = self.averages.setdefault(code, np.zeros((self.n_channels, self.n_samples)))
+            average += (segment - average) / n
+        self.count += k
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * self._epochs.shape[0])
+        for name in ('_epochs', '_codes', '_onsets', '_band_power'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    @property
+    def epochs(self):
+        """Époques stockées (époques x canaux x échantillons, vue sans copie)."""
+        return self._epochs[:self.count]
+
+    @property
+    def codes(self):
+        return self._codes[:self.count]
+
+    @property
+    def onsets(self):
+        """Indice absolu de l'échantillon du stimulus de chaque époque."""
+        return self._onsets[:self.count]
+
+    @property
+    def band_power(self):
+        """Puissance par bande de chaque époque (époques x canaux x bandes)."""
+        return self._band_power[:self.count]
+
+    def erp(self, code=None):
+        """ERP d'un code, ou moyenne de toutes les époques si code est None (canaux x échantillons)."""
+        if code is not None:
+            return self.averages.get(code)
+        if not self.counts:
+            return None
+        return sum(self.averages[c] * n for c, n in self.counts.items()) / sum(self.counts.values())
+
+    def save(self, path, first=0):
+        """Écrit les époques à partir de la n° 'first' (et les temps, codes, puissances) dans un .npz."""
+        np.savez(path, epochs=self.epochs[first:], codes=self.codes[first:], onsets=self.onsets[first:],
+                 band_power=self.band_power[first:], times=self.times, bands=np.array(list(self.bands)),
+                 fs=self.fs)
+
+def epochs_from_recording(basename, tmin=-0.2, tmax=0.8, bands=None, marker_row=None, rows=None):
+    """
+    Époques d'un enregistrement (RawRecorder) : marqueurs lus sur la ligne 'marker_row'
+    (par défaut 'marker_channel' des métadonnées), époques découpées dans la mémoire projetée.
+    """
+    data, meta = load_recording(basename)
+    marker_row = meta.get('marker_channel') if marker_row is None else marker_row
+    if marker_row is None:
+        raise ValueError("Ligne des marqueurs inconnue (préciser marker_row)")
+    rows = list(meta.get('eeg_channels') or range(meta['n_rows'])) if rows is None else list(rows)
+    collector = EpochCollector(len(rows), meta['fs'], tmin, tmax, bands)
+    onsets, codes = find_markers(data[marker_row])
+    starts = onsets - collector.pre
+    keep = (starts >= 0) & (starts + collector.n_samples <= data.shape[1])
+    collector.missed = int((~keep).sum())
+    if keep.any():
+        segments = np.stack([np.asarray(data[rows, start:start + collector.n_samples]) for start in starts[keep]])
+        collector.store(segments, onsets[keep], codes[keep])
+    return collector
@@ -1,17 +1,34 @@
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
-from scipy.signal import welch, filtfilt, cheby1
+from functools import lru_cache
 import numpy as np
 
-def prepare_board(com_port):
+# BrainFlow et SciPy sont importés à la première utilisation : l'interface s'affiche
+# sans attendre leur chargement.
+_BRAINFLOW_NAMES = ('BoardShim', 'BrainFlowInputParams', 'BoardIds')
+
+def __getattr__(name):
+    """function.BoardShim, function.BoardIds... : import de BrainFlow au premier accès."""
+    if name in _BRAINFLOW_NAMES:
+        import brainflow.board_shim
+        return getattr(brainflow.board_shim, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _signal():
+    """Module scipy.signal (importé au premier appel)."""
+    import scipy.signal
+    return scipy.signal
+
+def prepare_board(com_port, board_id=None):
     """
-    Prépare la connexion à la carte OpenBCI Cyton.
+    Prépare la connexion à la carte OpenBCI Cyton (ou à une autre carte BrainFlow via board_id).
     """
+    from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+    if board_id is None:
+        board_id = BoardIds.CYTON_BOARD.value
     # Initialiser les paramètres de la carte (port série, etc.)
     params = BrainFlowInputParams()
-    params.serial_port = com_port  # Remplacez 'COM3' par votre port COM réel
+    params.serial_port = com_port or ''  # Remplacez 'COM3' par votre port COM réel
 
-    # Créer un objet Board pour la carte Cyton
-    board_id = BoardIds.CYTON_BOARD.value
+    # Créer un objet Board (Cyton par défaut)
     board = BoardShim(board_id, params)
 
     # Préparer la carte pour l'acquisition de données
@@ -27,44 +44,231 @@ def prepare_board(com_port):
 def compute_fft_welch(eeg_data, fs, nperseg=None):
     """
     Calcule la FFT (méthode de Welch) pour les données EEG fournies.
+    Tous les canaux sont traités en un seul appel vectorisé (axe 1).
     """
     # Ajuster nperseg pour qu'il ne dépasse pas la longueur des données
     if nperseg is None or nperseg > eeg_data.shape[1]:
         nperseg = min(fs, eeg_data.shape[1])
-    # Pré-allouer le tableau PSD (chaque canal aura nperseg//2+1 points de fréquence)
-    psds = np.empty((eeg_data.shape[0], nperseg//2 + 1))
-    valid_channels = [i for i, ch_data in enumerate(eeg_data) if len(ch_data) >= nperseg]
+    freqs, psds = _signal().welch(eeg_data, fs=fs, nperseg=nperseg, axis=1)
+    return freqs, psds
 
-    # Calculer la densité spectrale de puissance pour chaque canal valide
-    for i in valid_channels:
-        _, psd = welch(eeg_data[i], fs=fs, nperseg=nperseg)
-        psds[i] = psd
+@lru_cache(maxsize=None)
+def _welch_window(nperseg, fs):
+    """
+    Fenêtre de Hann et facteur d'échelle (densité) mis en cache par (nperseg, fs).
+    """
+    win = _signal().get_window('hann', nperseg)
+    win.setflags(write=False)
+    scale = 1.0 / (fs * np.sum(win ** 2))
+    return win, scale
 
-    freqs = np.fft.rfftfreq(nperseg, 1/fs)
-    return freqs, psds
+class WelchEngine:
+    """
+    Estimation de Welch incrémentale et multi-canaux sur un EEGRingBuffer.
+    Les périodogrammes des segments déjà calculés sont conservés : à chaque
+    appel, seuls les segments complétés depuis le dernier appel sont transformés,
+    puis la moyenne glissante sur la fenêtre est mise à jour.
+    Un masque d'artefacts optionnel exclut de la moyenne, canal par canal,
+    les segments contenant un échantillon marqué.
+    Les segments sont alignés sur les indices absolus (k * step) et retirés de la
+    moyenne dès que leur début sort de la fenêtre du buffer.
+    """
+    def __init__(self, n_channels, fs, capacity, nperseg=None, noverlap=None):
+        self.n_channels = n_channels
+        self.fs = fs
+        self.nperseg = int(nperseg or fs)
+        self.noverlap = self.nperseg // 2 if noverlap is None else int(noverlap)
+        self.step = self.nperseg - self.noverlap
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1 / fs)
+        self.capacity = int(capacity)
+        # Nombre maximal de segments contenus dans la fenêtre du buffer
+        self.max_segments = max(1, (self.capacity - self.nperseg) // self.step + 1)
+        self._periodograms = np.zeros((self.max_segments, n_channels, self.freqs.size))
+        self._weights = np.zeros((self.max_segments, n_channels))  # 1 si le segment est propre
+        self._segment_ids = np.full(self.max_segments, -1, dtype=np.int64)  # k de chaque emplacement, -1 si libre
+        self._source = None
+        self._rows = None
+        self.reset()
+
+    def reset(self):
+        """
+        Oublie tous les segments accumulés.
+        """
+        self._periodograms[:] = 0
+        self._weights[:] = 0
+        self._segment_ids[:] = -1
+        self._sum = np.zeros((self.n_channels, self.freqs.size))
+        self._clean_sum = np.zeros((self.n_channels, self.freqs.size))
+        self._clean_count = np.zeros(self.n_channels)
+        self._count = 0
+        self._slot = 0
+        self._next_segment = 0
+
+    def _drop_oldest(self):
+        """Retire de la moyenne le plus ancien segment conservé."""
+        oldest = (self._slot - self._count) % self.max_segments
+        self._sum -= self._periodograms[oldest]
+        self._clean_sum -= self._periodograms[oldest] * self._weights[oldest, :, np.newaxis]
+        self._clean_count -= self._weights[oldest]
+        self._segment_ids[oldest] = -1
+        self._count -= 1
+
+    def _resync(self):
+        """Recalcule les sommes à partir des segments conservés (évite la dérive numérique)."""
+        valid = self._segment_ids >= 0
+        self._sum = self._periodograms[valid].sum(axis=0)
+        self._clean_sum = np.einsum('sc,scf->cf', self._weights[valid], self._periodograms[valid])
+        self._clean_count = self._weights[valid].sum(axis=0)
+
+    def _segment_psd(self, segments):
+        """
+        Périodogrammes (densité, unilatéraux) d'un lot de segments (nseg, canaux, nperseg).
+        """
+        win, scale = _welch_window(self.nperseg, self.fs)
+        # Retirer la moyenne de chaque segment (detrend='constant' comme scipy)
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spec = np.fft.rfft(segments * win, axis=-1)
+        psd = (spec.real ** 2 + spec.imag ** 2) * scale
+        # Doubler les fréquences non DC (et non Nyquist si nperseg pair)
+        if self.nperseg % 2:
+            psd[..., 1:] *= 2
+        else:
+            psd[..., 1:-1] *= 2
+        return psd
+
+    def update(self, buffer, rows=None, mask=None):
+        """
+        Intègre les nouveaux segments disponibles dans le buffer et renvoie (freqs, psds).
+        'rows' limite le calcul à certaines lignes du buffer (canaux affichés).
+        'mask' est un EEGRingBuffer booléen aligné sur 'buffer' (échantillons marqués) :
+        un canal sans aucun segment propre garde la moyenne de tous ses segments.
+        """
+        rows = None if rows is None else list(rows)
+        if buffer is not self._source or rows != self._rows:
+            # Nouvelle source (filtrage activé/désactivé, fenêtre redimensionnée, sélection modifiée)
+            self._source = buffer
+            self._rows = rows
+            self.reset()
+        total = buffer.total_samples
+        view = buffer.latest()
+        base = total - view.shape[1]  # indice absolu du premier échantillon visible
+        # Retirer les segments qui commencent avant la fenêtre (même si aucun nouveau segment n'arrive)
+        first_valid = -(-base // self.step)
+        if self._count and self._segment_ids[(self._slot - self._count) % self.max_segments] < first_valid:
+            while self._count and self._segment_ids[(self._slot - self._count) % self.max_segments] < first_valid:
+                self._drop_oldest()
+            self._resync()
+        # Segments complets non encore traités (indices absolus k*step)
+        last = (total - self.nperseg) // self.step
+        first = max(self._next_segment, first_valid)
+        if total >= self.nperseg and last >= first:
+            # Ne garder que les segments pouvant encore figurer dans la fenêtre
+            first = max(first, last - self.max_segments + 1)
+            start = first * self.step - base
+            stop = last * self.step - base + self.nperseg
+            # Vue glissante sans copie : (canaux, nseg, nperseg) -> (nseg, canaux, nperseg)
+            region = view[:, start:stop] if rows is None else view[rows, start:stop]
+            segments = np.lib.stride_tricks.sliding_window_view(
+                region, self.nperseg, axis=1)[:, ::self.step].transpose(1, 0, 2)
+            weights = np.ones((segments.shape[0], segments.shape[1]))
+            marks = mask.latest(view.shape[1]) if mask is not None else None
+            if marks is not None and marks.shape[1] == view.shape[1]:
+                marks = marks[:, start:stop] if rows is None else marks[rows, start:stop]
+                # Un segment est exclu si l'un de ses échantillons est marqué (par canal)
+                flagged = np.lib.stride_tricks.sliding_window_view(
+                    marks, self.nperseg, axis=1)[:, ::self.step].any(axis=-1).T
+                weights[flagged] = 0
+            for k, psd, weight in zip(range(first, last + 1), self._segment_psd(segments), weights):
+                if self._count == self.max_segments:
+                    self._drop_oldest()
+                self._count += 1
+                self._periodograms[self._slot] = psd
+                self._weights[self._slot] = weight
+                self._segment_ids[self._slot] = k
+                self._sum += psd
+                self._clean_sum += psd * weight[:, np.newaxis]
+                self._clean_count += weight
+                self._slot = (self._slot + 1) % self.max_segments
+                if self._slot == 0:
+                    self._resync()
+            self._next_segment = last + 1
+        if self._count == 0:
+            # Pas encore de segment complet : estimation directe sur les données disponibles
+            if not view.shape[1]:
+                return self.freqs, self._sum.copy()
+            return compute_fft_welch(view if rows is None else view[rows], self.fs)
+        clean = self._clean_count > 0.5
+        if clean.all():
+            return self.freqs, self._clean_sum / self._clean_count[:, np.newaxis]
+        psds = self._sum / self._count
+        psds[clean] = self._clean_sum[clean] / self._clean_count[clean, np.newaxis]
+        return self.freqs, psds
+
+# Bandes de fréquences EEG par défaut (Hz)
+DEFAULT_BANDS = {
+    'Delta': (1, 4),
+    'Theta': (4, 8),
+    'Alpha': (8, 13),
+    'Beta': (13, 30),
+    'Gamma': (30, 100)
+}
 
-def compute_power_bands(freqs, psds):
+class BandPowerCalculator:
+    """
+    Calcul de la puissance par bande pour chaque canal.
+    Construit une seule fois pour un couple (freqs, bandes) : les poids
+    d'intégration trapézoïdale de chaque bande sont regroupés dans une matrice
+    (bandes x fréquences), et toutes les bandes de tous les canaux sont obtenues
+    par un seul produit matriciel.
+    """
+    def __init__(self, freqs, bands=None):
+        self.freqs = np.asarray(freqs, dtype=np.float64)
+        self.bands = dict(DEFAULT_BANDS if bands is None else bands)
+        self.band_names = list(self.bands)
+        self.weights = np.zeros((len(self.bands), self.freqs.size))
+        for row, (low, high) in enumerate(self.bands.values()):
+            idx = np.flatnonzero((self.freqs >= low) & (self.freqs <= high))
+            if idx.size < 2:
+                continue  # intégrale nulle, comme np.trapz sur moins de deux points
+            # Poids de la règle des trapèzes : (f[i+1] - f[i]) / 2 partagé entre les deux bornes
+            dx = np.diff(self.freqs[idx])
+            self.weights[row, idx[:-1]] += dx / 2
+            self.weights[row, idx[1:]] += dx / 2
+
+    def compute(self, psds, relative=False):
+        """
+        Renvoie la puissance par bande (canaux x bandes) ; relative=True normalise
+        chaque canal par la somme de ses puissances de bande.
+        """
+        powers = np.atleast_2d(psds) @ self.weights.T
+        if relative:
+            total = powers.sum(axis=1, keepdims=True)
+            powers = np.divide(powers, total, out=np.zeros_like(powers), where=total > 0)
+        return powers
+
+_band_power_calculators = {}
+
+def get_band_power_calculator(freqs, bands=None):
+    """
+    Renvoie le calculateur mis en cache pour ces fréquences et cette définition de bandes.
+    """
+    bands = DEFAULT_BANDS if bands is None else bands
+    key = (np.asarray(freqs, dtype=np.float64).tobytes(), tuple(bands.items()))
+    calculator = _band_power_calculators.get(key)
+    if calculator is None:
+        calculator = _band_power_calculators[key] = BandPowerCalculator(freqs, bands)
+    return calculator
+
+def compute_power_bands(freqs, psds, bands=None, relative=False, per_channel=False):
     """
     Calcule la puissance par bande de fréquences (Delta, Theta, Alpha, Beta, Gamma).
+    Par défaut, renvoie la moyenne sur les canaux ; per_channel=True renvoie
+    la matrice complète (canaux x bandes).
     """
-    bands = {
-        'Delta': (1, 4),
-        'Theta': (4, 8),
-        'Alpha': (8, 13),
-        'Beta': (13, 30),
-        'Gamma': (30, 100)
-    }
-    # Indices de fréquence pour chaque bande
-    band_indices = {
-        band: np.logical_and(freqs >= low, freqs <= high)
-        for band, (low, high) in bands.items()
-    }
-    psd_mean = np.mean(psds, axis=0)
-    # Intégrer la PSD sur chaque bande de fréquence
-    band_powers = {
-        band: np.trapz(psd_mean[idx], freqs[idx]) for band, idx in band_indices.items()
-    }
-    return np.array(list(band_powers.values()))
+    powers = get_band_power_calculator(freqs, bands).compute(psds, relative)
+    if per_channel:
+        return powers
+    return powers.mean(axis=0)
 
 def cheby1_bandpass(lowcut, highcut, fs, order=4, rp=0.5):
     """
@@ -73,7 +277,7 @@ def cheby1_bandpass(lowcut, highcut, fs, order=4, rp=0.5):
     nyq = 0.5 * fs  # Fréquence de Nyquist
     low = lowcut / nyq
     high = highcut / nyq
-    b, a = cheby1(order, rp, [low, high], btype='band')
+    b, a = _signal().cheby1(order, rp, [low, high], btype='band')
     return b, a
 
 def cheby1_notch(fs, center_freq=60, band_width=1, order=4, rp=0.5):
@@ -83,24 +287,225 @@ def cheby1_notch(fs, center_freq=60, band_width=1, order=4, rp=0.5):
     nyq = 0.5 * fs  # Fréquence de Nyquist
     low = (center_freq - band_width / 2) / nyq
     high = (center_freq + band_width / 2) / nyq
-    b, a = cheby1(order, rp, [low, high], btype='bandstop')
+    b, a = _signal().cheby1(order, rp, [low, high], btype='bandstop')
     return b, a
 
-def eeg_filtering(eeg_data, fs, lowcut=0.1, highcut=100, order=4, rp=0.5):
+def cheby1_bandpass_sos(lowcut, highcut, fs, order=4, rp=0.5):
+    """
+    Conçoit un filtre passe-bande Chebyshev de type I en sections du second ordre (SOS).
+    """
+    nyq = 0.5 * fs  # Fréquence de Nyquist
+    return _signal().cheby1(order, rp, [lowcut / nyq, highcut / nyq], btype='band', output='sos')
+
+def cheby1_notch_sos(fs, center_freq=60, band_width=1, order=4, rp=0.5):
+    """
+    Conçoit un filtre coupe-bande (notch) Chebyshev de type I en sections du second ordre (SOS).
+    """
+    nyq = 0.5 * fs  # Fréquence de Nyquist
+    low = (center_freq - band_width / 2) / nyq
+    high = (center_freq + band_width / 2) / nyq
+    return _signal().cheby1(order, rp, [low, high], btype='bandstop', output='sos')
+
+# Fréquences du secteur prises en charge par le notch (Hz)
+MAINS_FREQUENCIES = (50, 60)
+
+class FilterDesign:
+    """
+    Cascade passe-bande + notch(s) en sections du second ordre, conçue une seule fois.
+    'sos' et 'zi_unit' (état initial pour une entrée constante unitaire) ne doivent pas être
+    modifiés : la même conception est partagée par tous les canaux et toutes les cartes.
+    La coupure haute est ramenée sous la fréquence de Nyquist (au plus 0.45 * fs : 56 Hz
+    pour le Cyton + Daisy à 125 Hz) ; 'highcut' est la coupure réellement appliquée.
+    """
+    def __init__(self, fs, lowcut=0.1, highcut=100, order=4, rp=0.5, notch_freq=60, harmonics=1,
+                 notch_width=1):
+        self.key = (fs, lowcut, highcut, order, rp, notch_freq, harmonics, notch_width)
+        self.highcut = min(highcut, 0.45 * fs)
+        if not 0 < lowcut < self.highcut:
+            raise ValueError(f"Bande passante invalide à fs={fs} Hz : {lowcut}-{self.highcut:g} Hz")
+        sections = [cheby1_bandpass_sos(lowcut, self.highcut, fs, order, rp)]
+        # Notch au fondamental du secteur et à ses harmoniques sous la fréquence de Nyquist
+        self.notch_freqs = [k * notch_freq for k in range(1, harmonics + 1)
+                            if notch_freq and k * notch_freq + notch_width / 2 < fs / 2]
+        for freq in self.notch_freqs:
+            sections.append(cheby1_notch_sos(fs, freq, notch_width, order, rp))
+        self.sos = np.vstack(sections)
+        self.zi_unit = _signal().sosfilt_zi(self.sos)
+        self.zi_unit.setflags(write=False)
+
+_filter_designs = {}
+
+def get_filter_design(fs, lowcut=0.1, highcut=100, order=4, rp=0.5, notch_freq=60, harmonics=1):
+    """
+    Renvoie la conception mise en cache pour (fs, lowcut, highcut, order, rp, notch_freq, harmonics).
+    """
+    key = (float(fs), float(lowcut), float(highcut), int(order), float(rp), notch_freq, int(harmonics))
+    design = _filter_designs.get(key)
+    if design is None:
+        design = _filter_designs[key] = FilterDesign(*key)
+    return design
+
+def precompute_filter_designs(rates, notch_freqs=MAINS_FREQUENCIES, **params):
+    """
+    Conçoit à l'avance les filtres des fréquences d'échantillonnage et secteurs donnés
+    (au démarrage) : aucun calcul de conception n'a lieu ensuite pendant l'acquisition.
+    """
+    return [get_filter_design(fs, notch_freq=notch_freq, **params) for fs in rates for notch_freq in notch_freqs]
+
+class StreamingEEGFilter:
     """
-    Filtre passe-bande + notch 60 Hz sur les données EEG de chaque canal.
+    Filtre causal passe-bande + notch appliqué bloc par bloc.
+    Les filtres viennent du cache de conceptions (get_filter_design) et l'état (zi)
+    de chaque canal est conservé entre deux blocs : seuls les nouveaux échantillons sont filtrés.
     """
-    # Conception des filtres passe-bande et notch
-    b, a = cheby1_bandpass(lowcut, highcut, fs, order, rp)
-    b1, a1 = cheby1_notch(fs, 60, 1, order, rp)
-    filtered_data = np.zeros_like(eeg_data)  # Tableau pour les données filtrées
+    def __init__(self, n_channels, fs, lowcut=0.1, highcut=100, order=4, rp=0.5, notch_freq=60, harmonics=1):
+        self.n_channels = n_channels
+        self.fs = fs
+        # Cascade passe-bande puis notch(s) dans une seule matrice SOS partagée
+        design = get_filter_design(fs, lowcut, highcut, order, rp, notch_freq, harmonics)
+        self.sos = design.sos
+        # État initial pour une entrée constante unitaire (régime établi)
+        self._zi_unit = design.zi_unit
+        self.zi = np.zeros((self.sos.shape[0], n_channels, 2))
+        self.primed = np.zeros(n_channels, dtype=bool)
+
+    def reset(self, channels=None):
+        """
+        Réinitialise l'état du filtre (tous les canaux ou seulement 'channels') ;
+        le prochain bloc de chaque canal concerné sert d'amorce.
+        """
+        if channels is None:
+            self.primed[:] = False
+        else:
+            self.primed[list(channels)] = False
+
+    def process(self, chunk, channels=None):
+        """
+        Filtre un bloc (canaux x échantillons) et met à jour l'état de chaque canal.
+        Si 'channels' est donné, le bloc ne contient que ces canaux : l'état des
+        autres canaux est conservé tel quel.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.shape[1] == 0:
+            return chunk.copy()
+        if channels is None:
+            channels = slice(None)
+            zi = self.zi
+        else:
+            channels = list(channels)
+            zi = self.zi[:, channels, :]
+        cold = ~self.primed[channels]
+        if cold.any():
+            # Amorcer l'état sur le premier échantillon pour éviter le transitoire dû à l'offset DC
+            zi[:, cold, :] = self._zi_unit[:, np.newaxis, :] * chunk[np.newaxis, cold, 0, np.newaxis]
+            self.primed[channels] = True
+        filtered, zi = _signal().sosfilt(self.sos, chunk, axis=-1, zi=zi)
+        self.zi[:, channels, :] = zi
+        return filtered
+
+def eeg_filtering(eeg_data, fs, lowcut=0.1, highcut=100, order=4, rp=0.5, notch_freq=60, harmonics=1):
+    """
+    Filtre passe-bande + notch secteur (60 Hz par défaut) sur les données EEG de chaque canal.
+    Version hors-ligne à phase nulle (sosfiltfilt) sur toute la fenêtre ;
+    utiliser StreamingEEGFilter pour le filtrage en temps réel.
+    """
+    # Conception mise en cache (sections du second ordre, stables aux basses fréquences de coupure)
+    sos = get_filter_design(fs, lowcut, highcut, order, rp, notch_freq, harmonics).sos
+    # Retirer la composante DC (moyenne) de chaque canal, puis filtrer tous les canaux en un appel
+    centered = eeg_data - np.mean(eeg_data, axis=1, keepdims=True)
+    return _signal().sosfiltfilt(sos, centered, axis=1)
+
+class EEGRingBuffer:
+    """
+    Buffer circulaire à capacité fixe pour la fenêtre d'acquisition EEG.
+    Les données sont écrites deux fois (miroir) afin que les N derniers
+    échantillons soient toujours contigus et renvoyés sans copie.
+    """
+    def __init__(self, n_channels, capacity, dtype=np.float64):
+        self.n_channels = int(n_channels)
+        self.capacity = max(1, int(capacity))
+        # Tableau doublé : [0, capacity) et [capacity, 2*capacity) sont identiques
+        self._data = np.zeros((self.n_channels, 2 * self.capacity), dtype=dtype)
+        self._pos = 0          # prochaine colonne d'écriture dans [0, capacity)
+        self.size = 0          # nombre d'échantillons valides
+        self.total_samples = 0  # nombre total d'échantillons reçus depuis la création
+
+    @classmethod
+    def from_window(cls, n_channels, win_size, fs, dtype=np.float64):
+        """
+        Crée un buffer dimensionné à partir de la taille de fenêtre (s) et de fs.
+        """
+        return cls(n_channels, int(float(win_size) * fs), dtype)
+
+    def resized(self, capacity):
+        """
+        Nouveau buffer de capacité 'capacity' contenant les derniers échantillons de celui-ci.
+        total_samples est conservé : les indices absolus (marqueurs, segments, historique) restent valides.
+        """
+        buffer = type(self)(self.n_channels, capacity, self._data.dtype)
+        buffer.append(self.latest())
+        buffer.total_samples = self.total_samples
+        return buffer
+
+    def append(self, chunk):
+        """
+        Ajoute un bloc (canaux x échantillons) au buffer en O(taille du bloc).
+        """
+        chunk = np.asarray(chunk)
+        n = chunk.shape[1]
+        if n == 0:
+            return
+        self.total_samples += n
+        # Seuls les derniers 'capacity' échantillons peuvent être conservés
+        if n > self.capacity:
+            chunk = chunk[:, -self.capacity:]
+            n = self.capacity
+        cap = self.capacity
+        first = min(n, cap - self._pos)
+        # Écriture dans la première moitié et dans son miroir
+        self._data[:, self._pos:self._pos + first] = chunk[:, :first]
+        self._data[:, self._pos + cap:self._pos + cap + first] = chunk[:, :first]
+        rest = n - first
+        if rest:
+            self._data[:, :rest] = chunk[:, first:]
+            self._data[:, cap:cap + rest] = chunk[:, first:]
+        self._pos = (self._pos + n) % cap
+        self.size = min(cap, self.size + n)
+
+    def latest(self, n=None):
+        """
+        Renvoie une vue (sans copie) des n derniers échantillons, dans l'ordre chronologique.
+        """
+        if n is None or n > self.size:
+            n = self.size
+        end = self._pos + self.capacity
+        return self._data[:, end - n:end]
+
+    def write_latest(self, data, rows=None):
+        """
+        Réécrit les derniers échantillons (data.shape[1]) des lignes 'rows' sans déplacer
+        la position d'écriture (ex. recalcul du filtrage d'un canal réactivé).
+        """
+        rows = slice(None) if rows is None else list(rows)
+        cap = self.capacity
+        n = min(data.shape[1], self.size)
+        data = data[:, data.shape[1] - n:]
+        end = self._pos + cap
+        start = end - n
+        self._data[rows, start:end] = data
+        # Recopier dans la moitié miroir
+        split = max(start, cap)
+        self._data[rows, split - cap:end - cap] = self._data[rows, split:end]
+        if start < cap:
+            self._data[rows, start + cap:2 * cap] = self._data[rows, start:cap]
+
+    def clear(self):
+        """
+        Vide le buffer sans réallouer la mémoire.
+        """
+        self._pos = 0
+        self.size = 0
+        self.total_samples = 0
 
-    # Appliquer le filtre sur chaque canal EEG
-    for i in range(eeg_data.shape[0]):
-        # Retirer la composante DC (moyenne) du canal
-        filtered_data[i] = eeg_data[i] - np.mean(eeg_data[i])
-        # Filtre passe-bande
-        filtered_data[i] = filtfilt(b, a, filtered_data[i], axis=-1)
-        # Filtre notch 60 Hz
-        filtered_data[i] = filtfilt(b1, a1, filtered_data[i], axis=-1)
-    return filtered_data
+    def __len__(self):
+        return self.size
@@ -0,0 +1,77 @@
+import ctypes
+from OpenGL import GL
+from pyqtgraph.opengl import GLGraphicsItem
+
+class WaterfallItem(GLGraphicsItem):
+    """
+    Objet 3D qui trace un WaterfallBuffer depuis des tampons graphiques (VBO) persistants.
+    La géométrie complète n'est transférée qu'une fois par tampon ; à chaque image, seules les
+    colonnes écrites depuis la précédente sont copiées (glBufferSubData), soit O(n_points) par
+    colonne quelle que soit la profondeur, là où setMeshData renvoie tout le maillage.
+    """
+    def __init__(self, buffer=None, glOptions='opaque', parentItem=None):
+        super().__init__(parentItem=parentItem)
+        self.setGLOptions(glOptions)
+        self.buffer = None
+        self._vbos = None       # (sommets, couleurs, faces)
+        self._uploaded = None   # tampon dont la géométrie complète est en mémoire graphique
+        if buffer is not None:
+            self.setBuffer(buffer)
+
+    def setBuffer(self, buffer):
+        """Change de tampon (nouvelle grille de fréquences) : il sera transféré en entier au prochain tracé."""
+        self.buffer = buffer
+        self._uploaded = None
+        self.update()
+
+    def initializeGL(self):
+        # Nouveau contexte OpenGL : les anciens tampons n'y existent pas
+        self._vbos = None
+        self._uploaded = None
+
+    def _upload(self):
+        buffer = self.buffer
+        vertexes, colors, faces = self._vbos
+        updated = buffer.take_updates()
+        if self._uploaded is not buffer:
+            for vbo, array in ((vertexes, buffer.vertexes), (colors, buffer.colors)):
+                GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vbo)
+                GL.glBufferData(GL.GL_ARRAY_BUFFER, array.nbytes, array, GL.GL_DYNAMIC_DRAW)
+            GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, faces)
+            GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, buffer.faces.nbytes, buffer.faces, GL.GL_STATIC_DRAW)
+            self._uploaded = buffer
+            return
+        n = buffer.n_points
+        for vbo, array in ((vertexes, buffer.vertexes), (colors, buffer.colors)):
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vbo)
+            for slot in updated:
+                block = array[slot * n:(slot + 1) * n]
+                GL.glBufferSubData(GL.GL_ARRAY_BUFFER, slot * block.nbytes, block.nbytes, block)
+
+    def paint(self):
+        if self.buffer is None:
+            return
+        if self._vbos is None:
+            self._vbos = GL.glGenBuffers(3)
+        self._upload()
+        ranges = self.buffer.draw_ranges()
+        if not ranges:
+            return
+        vertexes, colors, faces = self._vbos
+        self.setupGLState()
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+        try:
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertexes)
+            GL.glVertexPointer(3, GL.GL_FLOAT, 0, None)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, colors)
+            GL.glColorPointer(4, GL.GL_FLOAT, 0, None)
+            GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, faces)
+            for first, count in ranges:
+                # Faces de trois indices uint32 (4 octets)
+                GL.glDrawElements(GL.GL_TRIANGLES, 3 * count, GL.GL_UNSIGNED_INT, ctypes.c_void_p(first * 12))
+        finally:
+            GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+            GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
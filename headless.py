@@ -0,0 +1,144 @@
+import argparse
+import os
+import sys
+import time
+import function
+from function import DEFAULT_BANDS, MAINS_FREQUENCIES
+from boards import open_board, get_marker_row, get_timestamp_row, BOARD_SOURCES
+from epochs import epochs_from_recording
+from pipeline import EEGProcessor
+from recorder import RawRecorder, BandPowerLog
+from streaming import FramePublisher
+
+def process_chunks(chunks, fs, eeg_channels, win_size=10, filtering=True, spectrum=True, bands=None,
+                   channels=None, notch_freq=60, harmonics=1, marker_row=None):
+    """
+    Traite une suite de blocs (lignes x échantillons, format get_board_data())
+    et produit un ProcessedFrame par bloc. Aucune dépendance graphique.
+    'channels' : indices des canaux EEG à traiter (tous par défaut).
+    'marker_row' : ligne des marqueurs, pour découper les époques (processor.epochs).
+    """
+    processor = EEGProcessor(fs, eeg_channels, win_size, filtering, spectrum, bands, channels=channels,
+                             notch_freq=notch_freq, harmonics=harmonics, marker_row=marker_row)
+    for data_chunk in chunks:
+        if data_chunk.shape[1] == 0:
+            continue
+        processor.process(data_chunk)
+        processor.update_spectrum()
+        yield processor.snapshot()
+
+def board_chunks(board, poll_interval=0.02, duration=None, chunk_sinks=()):
+    """
+    Interroge la carte et renvoie chaque bloc non vide (arrêt après 'duration' secondes si précisé).
+    """
+    start = time.monotonic()
+    while duration is None or time.monotonic() - start < duration:
+        if getattr(board, 'finished', False):
+            break  # fin d'une session rejouée
+        data_chunk = board.get_board_data()
+        if data_chunk.size:
+            for sink in chunk_sinks:
+                sink(data_chunk)
+            yield data_chunk
+        time.sleep(poll_interval)
+
+def stream_frames(board, board_id, win_size=10, hop=0.1, duration=None, filtering=True,
+                  spectrum=True, bands=None, chunk_sinks=(), notch_freq=60, harmonics=1):
+    """
+    Itérateur de résultats traités depuis une carte déjà préparée et en streaming.
+    Un résultat est produit toutes les 'hop' secondes environ.
+    """
+    fs = function.BoardShim.get_sampling_rate(board_id)
+    eeg_channels = function.BoardShim.get_eeg_channels(board_id)
+    chunks = board_chunks(board, hop, duration, chunk_sinks)
+    return process_chunks(chunks, fs, eeg_channels, win_size, filtering, spectrum, bands,
+                          notch_freq=notch_freq, harmonics=harmonics)
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande (sans interface graphique)."""
+    parser = argparse.ArgumentParser(description="Acquisition et traitement EEG sans interface graphique.")
+    parser.add_argument('--source', choices=BOARD_SOURCES, default='cyton', help="Source des données")
+    parser.add_argument('--port', help="Port série de la carte Cyton (ex: COM3, /dev/ttyUSB0)")
+    parser.add_argument('--replay-file', help="Session enregistrée à rejouer (chemin sans extension)")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Vitesse de relecture (1 = temps réel, N = N fois, 0 = aussi vite que possible)")
+    parser.add_argument('--win-size', type=float, default=10, help="Fenêtre d'analyse (s)")
+    parser.add_argument('--hop', type=float, default=0.1, help="Intervalle entre deux résultats (s)")
+    parser.add_argument('--duration', type=float, default=None, help="Durée d'acquisition (s), illimitée par défaut")
+    parser.add_argument('--no-filter', action='store_true', help="Désactiver le filtrage passe-bande + notch")
+    parser.add_argument('--mains', type=int, choices=MAINS_FREQUENCIES, default=60,
+                        help="Fréquence du secteur à rejeter (Hz)")
+    parser.add_argument('--harmonics', type=int, default=1, help="Nombre d'harmoniques du secteur à rejeter")
+    parser.add_argument('--record', metavar='TRIAL', help="Enregistrer les données brutes et la puissance par bande")
+    parser.add_argument('--output-dir', default='.', help="Dossier des fichiers d'enregistrement")
+    parser.add_argument('--epochs', type=float, nargs=2, metavar=('TMIN', 'TMAX'),
+                        help="Avec --record : écrire les époques autour des marqueurs (ex: -0.2 0.8 s)")
+    parser.add_argument('--publish', metavar='URL', action='append', default=[],
+                        help="Diffuser les résultats sur le réseau (udp://hôte:port ou tcp://hôte:port)")
+    parser.add_argument('--quiet', action='store_true', help="Ne pas afficher la puissance par bande")
+    args = parser.parse_args(argv)
+
+    if args.source in ('cyton', 'daisy') and not args.port:
+        parser.error("--port est requis pour les sources cyton et daisy")
+    if args.source == 'replay' and not args.replay_file:
+        parser.error("--replay-file est requis pour la source replay")
+    if args.epochs and not args.record:
+        parser.error("--epochs nécessite --record (les époques sont découpées dans l'enregistrement)")
+    if args.epochs and args.epochs[1] <= args.epochs[0]:
+        parser.error("--epochs : TMAX doit être supérieur à TMIN")
+    board, board_id, status = open_board(args.source, args.port, args.replay_file, args.speed)
+    print(status)
+    if not isinstance(status, str):
+        return 1
+    # En relecture accélérée au maximum, ne pas attendre entre deux blocs
+    hop = 0 if args.source == 'replay' and not args.speed else args.hop
+    board.start_stream(45000)
+    fs = function.BoardShim.get_sampling_rate(board_id)
+    bands = list(DEFAULT_BANDS)
+    sinks = []
+    recorder = power_log = None
+    if args.record:
+        os.makedirs(args.output_dir, exist_ok=True)
+        basename = os.path.join(args.output_dir, args.record)
+        metadata = {'board_id': board_id, 'eeg_channels': list(function.BoardShim.get_eeg_channels(board_id)),
+                    'marker_channel': get_marker_row(board_id), 'trial_name': args.record}
+        recorder = RawRecorder(basename + '_raw', function.BoardShim.get_num_rows(board_id), fs, metadata,
+                               timestamp_row=get_timestamp_row(board_id))
+        recorder.start()
+        sinks.append(recorder)
+        power_log = BandPowerLog(basename + '_power.csv', bands)
+    publishers = [FramePublisher(url).start() for url in args.publish]
+    try:
+        for frame in stream_frames(board, board_id, args.win_size, hop, args.duration,
+                                   not args.no_filter, chunk_sinks=sinks, notch_freq=args.mains,
+                                   harmonics=args.harmonics):
+            for publisher in publishers:
+                publisher.publish(frame)
+            if frame.band_power is None:
+                continue
+            band_power = frame.band_power.mean(axis=0)
+            if power_log is not None:
+                power_log.write(band_power)
+            if not args.quiet:
+                values = ' '.join(f"{name}={val:.3g}" for name, val in zip(bands, band_power))
+                print(f"{frame.total_samples / fs:9.2f}s {values}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.stop_stream()
+        board.release_session()
+        for publisher in publishers:
+            publisher.stop()
+        if recorder is not None:
+            recorder.close()
+        if power_log is not None:
+            power_log.close()
+    if recorder is not None and args.epochs:
+        # Époques découpées dans l'enregistrement complet (aucun événement perdu en fin de fenêtre)
+        collector = epochs_from_recording(basename + '_raw', *args.epochs)
+        collector.save(basename + '_epochs.npz')
+        print(f"{collector.count} époques ({collector.missed} incomplètes) -> {basename}_epochs.npz")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import os
+import queue
+import threading
+import numpy as np
+
+class SessionHistory:
+    """
+    Historique complet de la session sur disque, pour naviguer dans des heures de données.
+    Les échantillons EEG sont ajoutés à un fichier float32 (<nom>.f32, échantillons x canaux)
+    lu en mémoire projetée, et une pyramide min/max (un fichier par niveau, facteur 'factor'
+    entre deux niveaux) permet d'afficher n'importe quelle plage en lisant au plus quelques
+    milliers de points. L'écriture se fait dans un thread dédié, comme RawRecorder.
+    """
+    stage = 'history'  # étape du StageTimer lorsque l'historique est un puits de l'acquisition
+
+    def __init__(self, basename, rows, fs, factor=16, max_queue=1024):
+        self.basename = basename
+        self.rows = list(rows)  # lignes de la carte à conserver (canaux EEG)
+        self.n_channels = len(self.rows)
+        self.fs = fs
+        self.factor = int(factor)
+        self._files = []    # niveau 0 : échantillons ; niveau k : min puis max de chaque paquet
+        self._counts = []   # éléments écrits et lisibles par niveau
+        self._carry = []    # (min, max) en attente de compléter un paquet, par niveau
+        self._maps = {}     # niveau -> (nombre, memmap)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.error = None
+
+    def path(self, level):
+        return self.basename + ('.f32' if level == 0 else f'_L{level}.f32')
+
+    def width(self, level):
+        """Nombre de valeurs par élément du niveau (min et max à partir du niveau 1)."""
+        return self.n_channels if level == 0 else 2 * self.n_channels
+
+    def start(self):
+        self._add_level()
+        self._thread.start()
+
+    def _add_level(self):
+        level = len(self._files)
+        self._files.append(open(self.path(level), 'wb'))
+        self._counts.append(0)
+        self._carry.append(None)
+
+    def write(self, data_chunk):
+        """Ajoute un bloc de la carte (lignes x échantillons) ; seules les lignes 'rows' sont conservées."""
+        if data_chunk.shape[1]:
+            self._queue.put(data_chunk[self.rows])
+
+    __call__ = write
+
+    def _run(self):
+        while True:
+            eeg_chunk = self._queue.get()
+            if eeg_chunk is None:
+                break
+            try:
+                self._append(eeg_chunk)
+            except Exception as e:
+                print("Erreur d'écriture de l'historique :", e)
+                self.error = e
+
+    def _append(self, eeg_chunk):
+        samples = np.ascontiguousarray(eeg_chunk.T, dtype='<f4')
+        self._files[0].write(samples)
+        self._files[0].flush()
+        counts = [self._counts[0] + samples.shape[0]]
+        # Propager vers les niveaux supérieurs : paquets complets de 'factor' éléments
+        lo = hi = samples
+        level = 1
+        while lo.shape[0]:
+            if level == len(self._files):
+                if counts[-1] < self.factor:
+                    break  # niveau inutile tant que le précédent est plus court qu'un paquet
+                self._add_level()
+                # Nouveau niveau : agréger tout le niveau inférieur déjà écrit, pas seulement ce bloc
+                lo, hi = self._read_level(level - 1, counts[-1])
+            carry = self._carry[level]
+            if carry is not None:
+                lo, hi = np.concatenate([carry[0], lo]), np.concatenate([carry[1], hi])
+            n = lo.shape[0] // self.factor * self.factor
+            self._carry[level] = (lo[n:], hi[n:])
+            shape = (-1, self.factor, self.n_channels)
+            lo, hi = lo[:n].reshape(shape).min(axis=1), hi[:n].reshape(shape).max(axis=1)
+            if lo.shape[0]:
+                self._files[level].write(np.hstack([lo, hi]))
+                self._files[level].flush()
+            counts.append(self._counts[level] + lo.shape[0])
+            level += 1
+        with self._lock:
+            self._counts[:len(counts)] = counts
+
+    def _read_level(self, level, count):
+        """(min, max) des 'count' premiers éléments écrits d'un niveau (relus depuis le fichier)."""
+        values = np.fromfile(self.path(level), dtype='<f4', count=count * self.width(level))
+        values = values.reshape(count, self.width(level))
+        if level == 0:
+            return values, values
+        return values[:, :self.n_channels], values[:, self.n_channels:]
+
+    def __len__(self):
+        return self._counts[0] if self._counts else 0
+
+    @property
+    def duration(self):
+        return len(self) / self.fs
+
+    def _map(self, level):
+        """Vue en mémoire projetée du niveau (rouverte seulement si le fichier a grandi)."""
+        with self._lock:
+            count = self._counts[level] if level < len(self._counts) else 0
+        cached = self._maps.get(level)
+        if cached is None or cached[0] != count:
+            data = (np.memmap(self.path(level), dtype='<f4', mode='r', shape=(count, self.width(level)))
+                    if count else np.zeros((0, self.width(level)), dtype='<f4'))
+            cached = self._maps[level] = (count, data)
+        return cached[1]
+
+    def read(self, first, last):
+        """Échantillons [first, last[ (indices depuis le début de la session), canaux x échantillons."""
+        return np.asarray(self._map(0)[first:last]).T
+
+    def envelope(self, start, stop, max_points=2000):
+        """
+        Enveloppe min/max de la plage [start, stop[ (secondes) avec au plus ~max_points points.
+        Renvoie (t, lo, hi) : temps (s) des points et minima/maxima (canaux x points).
+        Au niveau 0 (zoom fort) lo et hi sont les échantillons eux-mêmes.
+        """
+        n = len(self)
+        first = int(np.clip(np.floor(start * self.fs), 0, n))
+        last = int(np.clip(np.ceil(stop * self.fs), first, n))
+        level = 0
+        while level + 1 < len(self._counts) and (last - first) / self.factor ** level > max_points:
+            level += 1
+        parts = self._envelope(level, first, last)
+        if not parts:
+            empty = np.zeros((self.n_channels, 0), dtype=np.float32)
+            return np.zeros(0), empty, empty
+        t = np.concatenate([p[0] for p in parts]) / self.fs
+        lo = np.concatenate([p[1] for p in parts]).T
+        hi = np.concatenate([p[2] for p in parts]).T
+        return t, lo, hi
+
+    def _envelope(self, level, first, last):
+        """Morceaux (position en échantillons, min, max) couvrant [first, last[ au niveau demandé."""
+        if last <= first:
+            return []
+        data = self._map(level)
+        if level == 0:
+            values = np.asarray(data[first:last])
+            return [(np.arange(first, last), values, values)]
+        size = self.factor ** level
+        b0, b1 = first // size, min(-(-last // size), data.shape[0])
+        parts = []
+        if b1 > b0:
+            block = np.asarray(data[b0:b1])
+            parts.append((np.arange(b0, b1) * size + size // 2,
+                          block[:, :self.n_channels], block[:, self.n_channels:]))
+        # Fin de plage pas encore agrégée à ce niveau : lue au niveau inférieur
+        return parts + self._envelope(level - 1, max(first, b1 * size), last)
+
+    def close(self, remove=False):
+        """Vide la file et ferme les fichiers ; remove=True supprime l'historique du disque."""
+        if not self._files:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        for file in self._files:
+            file.close()
+        self._maps = {}
+        if remove:
+            for level in range(len(self._files)):
+                try:
+                    os.remove(self.path(level))
+                except OSError:
+                    pass
+        self._files = []
+
+def envelope_curve(t, lo, hi):
+    """
+    Points d'un tracé d'enveloppe : chaque point devient un segment vertical min -> max.
+    Renvoie x (2 x points) et y (canaux x 2 x points).
+    """
+    x = np.repeat(t, 2)
+    y = np.empty((lo.shape[0], 2 * lo.shape[1]), dtype=lo.dtype)
+    y[:, 0::2] = lo
+    y[:, 1::2] = hi
+    return x, y
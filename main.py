@@ -1,14 +1,52 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from function import *  # Importation des fonctions externes (prepare_board, eeg_filtering, etc.)
+import function  # BrainFlow et SciPy ne sont chargés qu'à la connexion (voir function.py)
+from function import DEFAULT_BANDS
+from pipeline import EEGPipeline, RateScheduler
+from recorder import RawRecorder, BandPowerLog
+from history import SessionHistory, envelope_curve
+from streaming import FramePublisher
+from quality import QUALITY_NAMES
+from boards import open_board, get_marker_row, get_timestamp_row
+from waterfall import WaterfallBuffer
+from decimation import DisplayDecimator
 import pyqtgraph as pg
-import pyqtgraph.opengl as gl
 import numpy as np
 import sys
-import csv
 import os
+import tempfile
 from datetime import datetime
 
 class MainApp(QtWidgets.QWidget):
+    # Dossier des enregistrements, profils et traces
+    RESULTS_DIR = r"C:\Users\Konan\Desktop\EEG_GUI"
+    # Fréquence du secteur rejetée par le notch (50 Hz en Europe) et nombre d'harmoniques
+    MAINS_FREQUENCY = 60
+    MAINS_HARMONICS = 1
+    # Diffusion des résultats vers d'autres applications (ex: 'udp://127.0.0.1:5005'), désactivée si None
+    PUBLISH_URL = None
+    # Spectrogramme 3D : nombre de colonnes conservées, fréquence maximale (Hz), largeur d'une colonne
+    WATERFALL_DEPTH = 200
+    WATERFALL_MAX_FREQ = 60
+    WATERFALL_DX = 0.3
+    # Réduction du tracé temporel à la largeur en pixels : 'minmax' (enveloppe) ou 'lttb'
+    DISPLAY_DECIMATION = 'minmax'
+    # Époques autour des marqueurs de stimulation (s, relatif au marqueur)
+    EPOCH_WINDOW = (-0.2, 0.8)
+    # Couleurs des canaux (2D) et équivalents RGBA pour la vue 3D
+    CHANNEL_COLORS = ['r', 'g', 'b', 'c', 'm', 'y', 'w', (255, 165, 0)]
+    # Couleur du libellé de qualité : bon, artefacts, mauvais (saturé ou plat)
+    QUALITY_COLORS = ('#00FF7F', '#FFA500', '#FF4040')
+    GL_COLORS = [
+        (1, 0, 0, 1),     # rouge
+        (0, 1, 0, 1),     # vert
+        (0, 0, 1, 1),     # bleu
+        (0, 1, 1, 1),     # cyan
+        (1, 0, 1, 1),     # magenta
+        (1, 1, 0, 1),     # jaune
+        (1, 1, 1, 1),     # blanc
+        (1, 0.65, 0, 1)   # orange
+    ]
+
     def __init__(self, parent=None):
         super(MainApp, self).__init__(parent)
         self.ui = Ui_Form()
@@ -16,6 +54,9 @@ class MainApp(QtWidgets.QWidget):
         # Initialisation des variables d'état
         self.is_streaming = False
         self.record_data = False
+        # Stylos créés une seule fois et réutilisés par les courbes
+        self.channel_pens = [pg.mkPen(color) for color in self.CHANNEL_COLORS]
+        self.plot_selection = None
 
 
 
@@ -24,20 +65,26 @@ class MainApp(QtWidgets.QWidget):
         self.ui.com_port.clear()
         self.ui.win_size.clear()
         self.ui.fps.clear()
+        self.ui.hop.clear()
         self.ui.trial_name.clear()
 
         # Décocher toutes les cases à cocher
         for checkbox in [self.ui.BoxCh1, self.ui.BoxCh2, self.ui.BoxCh3, self.ui.BoxCh4,
                          self.ui.BoxCh5, self.ui.BoxCh6, self.ui.BoxCh7, self.ui.BoxCh8,
-                         self.ui.BoxFiltering, self.ui.BoxFFT, self.ui.BoxPSD, self.ui.BoxTime]:
+                         self.ui.BoxFiltering, self.ui.BoxFFT, self.ui.BoxPSD, self.ui.BoxTime,
+                         self.ui.BoxStats, self.ui.BoxProfile, self.ui.BoxHistory, self.ui.BoxWaterfall]:
             checkbox.setChecked(False)
 
-        # Effacer les graphiques
+        # Effacer les graphiques (les courbes seront recréées au prochain affichage)
         self.ui.TimeGraph.clear()
         self.ui.FFTGraph.clear()
         self.ui.PSD.clear()
+        self.plot_selection = None
 
-        # Arrêter le streaming s'il est actif
+        # Arrêter l'enregistrement puis le streaming s'ils sont actifs
+        if self.record_data:
+            self.end_recording()
+        self.stop_pipeline()
         if getattr(self, 'is_streaming', False):
             try:
                 self.board.stop_stream()
@@ -52,31 +99,60 @@ class MainApp(QtWidgets.QWidget):
 
     def closeEvent(self, event):
         """Surcharge de l'événement de fermeture pour arrêter correctement les flux de données."""
+        # Arrêter l'enregistrement s'il est en cours (fermer les fichiers et sauver les époques,
+        # qui sont lues dans le pipeline : avant stop_pipeline)
+        if self.record_data:
+            self.end_recording()
         # Arrêter le streaming s'il est en cours
+        self.stop_pipeline()
         if self.is_streaming:
             try:
                 self.board.stop_stream()
             except Exception as e:
                 print(f"Erreur lors de l'arrêt du flux de données : {e}")
-        # Arrêter l'enregistrement s'il est en cours (et fermer les fichiers)
-        if self.record_data:
-            self.end_recording()
         event.accept()
 
+    def stop_pipeline(self):
+        """Arrête les threads d'acquisition et de traitement (avant board.stop_stream())."""
+        if getattr(self, 'pipeline', None) is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        if getattr(self, 'publisher', None) is not None:
+            self.publisher.stop()
+            self.publisher = None
+        # L'historique de session est temporaire : il est supprimé à l'arrêt
+        if getattr(self, 'history', None) is not None:
+            self.history.close(remove=True)
+            self.history = None
+        # Le spectrogramme repart de zéro à la prochaine connexion (fréquence d'échantillonnage)
+        self.waterfall = None
+
+    def board_source(self):
+        """Interprète le champ port : numéro de COM, 'synthetic' ou chemin d'une session à rejouer."""
+        text = self.com_port.text().strip()
+        if text.lower() == 'synthetic':
+            return ('synthetic',)
+        if os.path.isfile(text + '.json'):
+            return ('replay', None, text)
+        return ('cyton', text if not text.isdigit() else f'COM{text}')
+
     def connect_board(self):
         """Prépare la connexion à la carte EEG et démarre le streaming."""
         if not self.com_port.text() or not self.win_size.text() or not self.fps.text():
             self.label_6.setText("Veuillez renseigner le port, la fenêtre et le FPS.")
             return
+        if self.window_size() is None:
+            self.label_6.setText("Fenêtre invalide : entrer une durée en secondes (ex: 10).")
+            return
         # Indiquer visuellement la tentative de connexion
         self.label_6.setText("Connecting to Board...")
         QtWidgets.QApplication.processEvents()
         QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
         # Préparer la connexion à la carte (peut prendre quelques secondes)
-        self.board, self.board_id, self.status = prepare_board(f'COM{self.com_port.text()}')
+        self.board, self.board_id, self.status = open_board(*self.board_source())
         QtWidgets.QApplication.restoreOverrideCursor()
-        self.label_6.setText(self.status)
-        if self.board is None:
+        self.label_6.setText(str(self.status))
+        if self.board is None or not isinstance(self.status, str):
             # Échec de connexion
             return
         # Démarrer le streaming EEG en cas de succès
@@ -92,167 +168,480 @@ class MainApp(QtWidgets.QWidget):
             self.label_6.setText(f"Échec du démarrage du stream : {e}")
             return
         # Obtenir la fréquence d'échantillonnage et les indices de canaux EEG
-        self.fs = BoardShim.get_sampling_rate(self.board_id)
-        self.eeg_channels = BoardShim.get_eeg_channels(self.board_id)
+        self.fs = function.BoardShim.get_sampling_rate(self.board_id)
+        self.eeg_channels = function.BoardShim.get_eeg_channels(self.board_id)
+        # Pipeline d'acquisition et de traitement dans des threads dédiés
+        win_size = self.window_size() or 10
+        self.marker_row = get_marker_row(self.board_id)
+        self.pipeline = EEGPipeline(self.board, self.fs, self.eeg_channels, win_size,
+                                    publish_interval=self.base_interval() / 1000,
+                                    spectrum_hop=self.spectrum_hop(), notch_freq=self.MAINS_FREQUENCY,
+                                    harmonics=self.MAINS_HARMONICS, marker_row=self.marker_row,
+                                    epoch_window=self.EPOCH_WINDOW)
+        # Historique complet de la session (fichier projeté + pyramide min/max) pour le défilement
+        self.history = SessionHistory(os.path.join(tempfile.gettempdir(),
+                                                   f"eeg_history_{datetime.now():%Y%m%d_%H%M%S}"),
+                                      self.eeg_channels, self.fs)
+        self.history.start()
+        self.pipeline.acquisition.chunk_sinks.append(self.history)
+        # Époques sorties de la fenêtre (retard de traitement) : relues dans l'historique
+        if self.pipeline.processor.epochs is not None:
+            self.pipeline.processor.epochs.history = self.history
+        # Diffusion réseau des résultats publiés (thread d'envoi dédié, jamais bloquant)
+        if self.PUBLISH_URL:
+            try:
+                self.publisher = FramePublisher(self.PUBLISH_URL).start()
+                self.pipeline.worker.frame_callbacks.append(self.publisher)
+            except OSError as e:
+                print("Diffusion réseau indisponible :", e)
+        # Échéances d'affichage : compte les images en retard ou sautées
+        # (tolérance : le QTimer, de même période, peut se déclencher un peu en avance)
+        self.render_schedule = RateScheduler(self.base_interval() / 1000, tolerance=0.25)
+        # Réduction du tracé temporel (cache par paquet d'échantillons, propre à cette session)
+        self.decimator = DisplayDecimator(self.DISPLAY_DECIMATION)
+        self.pipeline.start()
         # Configurer l'intervalle du timer en fonction du FPS souhaité
-        try:
-            base_interval = int(1000 / max(1, int(self.fps.text())))
-        except Exception:
-            base_interval = 1000
-        self.timer.start(base_interval)
+        self.timer.start(self.base_interval())
         self.label_6.setText("Connected and streaming data...")
         # Noms des bandes de fréquences pour l'affichage PSD
-        self.bands = ['Delta', 'Theta', 'Alpha', 'Beta', 'Gamma']
+        self.bands = list(DEFAULT_BANDS)
 
     def update_data_and_graphs(self):
-        """Récupère les nouvelles données EEG et met à jour les graphiques."""
-        if not self.is_streaming:
+        """Affiche le dernier résultat du pipeline (acquisition et DSP tournent hors du thread GUI)."""
+        if not self.is_streaming or getattr(self, 'pipeline', None) is None:
             return
-        # Obtenir les nouveaux échantillons du buffer interne de la carte
-        data_chunk = self.board.get_board_data()
-        if data_chunk.size == 0:
-            return  # pas de nouvelles données pour l'instant
-        eeg_data_chunk = data_chunk[self.eeg_channels, :]
-        # Ajouter ces données au buffer global en conservant l'historique
-        if hasattr(self, 'eeg_channel_data') and self.eeg_channel_data.size != 0:
-            if self.eeg_channel_data.shape[0] == len(getattr(self, 'eeg_channel_indices', [])):
-                self.eeg_channel_data = np.concatenate((self.eeg_channel_data, eeg_data_chunk), axis=1)
-            else:
-                self.eeg_channel_data = eeg_data_chunk
-        else:
-            self.eeg_channel_data = eeg_data_chunk
-        # Mettre à jour la liste des canaux sélectionnés
+        if self.check_errors():
+            return
+        # Transmettre les options courantes au thread de traitement
+        processor = self.pipeline.processor
+        processor.filtering = self.BoxFiltering.isChecked()
+        processor.spectrum = self.BoxFFT.isChecked() or self.BoxPSD.isChecked() or self.BoxWaterfall.isChecked()
+        # Saisie en cours ou invalide (ex: '.') : la fenêtre courante est conservée
+        win_size = self.window_size()
+        if win_size is not None:
+            processor.request_window(win_size)
+        # Seuls les canaux cochés sont filtrés et analysés par le thread de traitement
+        processor.request_selection(self.selected_channels())
+        # Cadences indépendantes : publication au rythme de l'affichage, spectre au pas demandé
+        self.pipeline.set_rates(self.timer.interval() / 1000, self.spectrum_hop())
+        self.render_schedule.period = self.timer.interval() / 1000
+        if not self.render_schedule.due():
+            return  # image pas encore due : le résultat reste dans la boîte pour le prochain tick
+        # Récupérer le dernier résultat publié (les plus anciens sont écrasés)
+        frame = self.pipeline.latest()
+        if frame is None:
+            return  # pas de nouveau résultat pour l'instant
+        self.frame = frame
+        with self.pipeline.timer.profiled():
+            self.draw_frame(frame)
+        self.adapt_refresh_interval()
+        self.update_stats_overlay()
+
+    def check_errors(self):
+        """
+        Erreurs signalées par les threads (acquisition, traitement, enregistrement, historique),
+        affichées dans le libellé d'état. Une acquisition interrompue arrête le streaming ;
+        un enregistrement ou un historique en erreur est fermé. Renvoie True si le streaming est arrêté.
+        """
+        error = self.pipeline.acquisition.error
+        if error is not None:
+            if self.record_data:
+                self.end_recording()
+            self.stop_pipeline()
+            try:
+                self.board.stop_stream()
+            except Exception as e:
+                print("Erreur lors de l'arrêt du stream:", e)
+            self.is_streaming = False
+            self.timer.stop()
+            self.label_6.setText(f"Acquisition interrompue : {error}")
+            return True
+        recorder = getattr(self, 'raw_recorder', None)
+        if recorder is not None and recorder.error is not None:
+            error = recorder.error
+            self.end_recording()
+            self.label_6.setText(f"Enregistrement arrêté : {error}")
+        history = getattr(self, 'history', None)
+        if history is not None and history.error is not None:
+            if history in self.pipeline.acquisition.chunk_sinks:
+                self.pipeline.acquisition.chunk_sinks.remove(history)
+            if self.pipeline.processor.epochs is not None:
+                self.pipeline.processor.epochs.history = None
+            self.history = None
+            history.close(remove=True)
+            self.BoxHistory.setChecked(False)
+            self.label_6.setText(f"Historique de session désactivé : {history.error}")
+        # Erreurs de traitement : le bloc est abandonné mais le thread continue (signalées une fois)
+        error, self.pipeline.worker.error = self.pipeline.worker.error, None
+        if error is not None:
+            self.label_6.setText(f"Erreur de traitement ({self.pipeline.worker.errors} blocs abandonnés) : {error}")
+        return False
+
+    def selected_channels(self):
+        """Indices (Ch1 = 0) des canaux cochés."""
         channel_boxes = [self.BoxCh1, self.BoxCh2, self.BoxCh3, self.BoxCh4,
                          self.BoxCh5, self.BoxCh6, self.BoxCh7, self.BoxCh8]
-        selected = [cb.isChecked() for cb in channel_boxes]
-        self.eeg_channel_indices = [i for i, sel in enumerate(selected) if sel]
+        return [i for i, cb in enumerate(channel_boxes) if cb.isChecked()]
+
+    def draw_frame(self, frame):
+        """Met à jour les graphiques 2D et 3D à partir d'un résultat du pipeline."""
+        # Les lignes du résultat correspondent aux canaux traités (frame.channels),
+        # qui peuvent différer un instant des cases cochées
+        self.eeg_channel_indices = list(frame.channels)
+        self.update_quality_labels(frame)
         if not self.eeg_channel_indices:
             self.label_6.setText("Aucun canal sélectionné pour l'affichage.")
             return
-        # Limiter la taille du buffer aux derniers N échantillons (fenêtre temporelle)
-        max_samples = int(float(self.win_size.text()) * self.fs) if self.win_size.text() else self.eeg_channel_data.shape[1]
-        if self.eeg_channel_data.shape[1] > max_samples:
-            self.eeg_channel_data = self.eeg_channel_data[:, -max_samples:]
-        # Filtrer le signal si l'option de filtrage est activée
-        if self.BoxFiltering.isChecked():
-            self.eeg_channel_data_filt = eeg_filtering(self.eeg_channel_data, self.fs)
-        else:
-            self.eeg_channel_data_filt = self.eeg_channel_data
+        self.eeg_channel_data = frame.raw
+        self.eeg_channel_data_filt = frame.data
+        # Spectre partagé entre le tracé FFT, les barres de puissance et l'enregistrement
+        self.spectrum = (frame.freqs, frame.psds) if frame.psds is not None else None
+        # (Re)créer les courbes uniquement si la sélection de canaux a changé
+        if self.eeg_channel_indices != getattr(self, 'plot_selection', None):
+            self.build_plot_items()
         # Axe des temps (secondes) pour l'affichage temporel
         t = np.arange(self.eeg_channel_data_filt.shape[1]) / self.fs
-        # Affichage dans le domaine temporel (si case cochée)
-        if self.BoxTime.isChecked():
-            self.TimeGraph.clear()
-            for idx, ch_idx in enumerate(self.eeg_channel_indices):
-                pen = pg.mkPen(['r', 'g', 'b', 'c', 'm', 'y', 'w', 'orange'][ch_idx % 8])
-                self.TimeGraph.plot(t, self.eeg_channel_data_filt[idx, :] + idx * 2000, pen=pen)
-        else:
-            self.TimeGraph.clear()
+        with self.pipeline.timer.stage('draw_2d'):
+            self.draw_2d(frame, t)
+        # Affichage 3D (signaux EEG ou spectrogramme) si l'onglet 3D est actif
+        if self.tabs.currentIndex() == 1 and self.glview is not None:
+            with self.pipeline.timer.stage('draw_3d'):
+                if self.BoxWaterfall.isChecked():
+                    self.draw_waterfall(frame)
+                else:
+                    self.draw_3d(t)
+
+    def update_quality_labels(self, frame):
+        """Affiche la qualité de chaque canal à côté de sa case (toutes les 10 images)."""
+        quality = frame.quality
+        if quality is None or getattr(self, 'quality_frame_count', 0) % 10:
+            self.quality_frame_count = getattr(self, 'quality_frame_count', 0) + 1
+            return
+        self.quality_frame_count = 1
+        for idx, label in enumerate(self.quality_labels[:len(quality['status'])]):
+            status = quality['status'][idx]
+            label.setText(f"{quality['rms'][idx]:.0f} µV" if idx in frame.channels else "–")
+            label.setStyleSheet(f"color: {self.QUALITY_COLORS[status]};")
+            label.setToolTip(f"{QUALITY_NAMES[status]} — RMS {quality['rms'][idx]:.1f} µV, "
+                             f"secteur {100 * quality['line_ratio'][idx]:.0f} %, "
+                             f"artefacts {100 * quality['artifact'][idx]:.1f} %, "
+                             f"saturation {100 * quality['rail'][idx]:.1f} %"
+                             + (", signal plat" if quality['flat'][idx] else ""))
+
+    def draw_2d(self, frame, t):
+        """Met à jour les courbes temporelles, le spectre et les barres de puissance."""
+        # Affichage dans le domaine temporel (si case cochée) : mise à jour des courbes existantes
+        show_time = self.BoxTime.isChecked()
+        history_mode = show_time and self.BoxHistory.isChecked() and getattr(self, 'history', None) is not None
+        if history_mode:
+            # Mode historique : draw_history gère seul les courbes temporelles
+            self.draw_history()
+        elif show_time:
+            # Au plus un paquet par pixel : seuls les paquets des nouveaux échantillons sont calculés
+            width = max(100, int(self.TimeGraph.getViewBox().width()))
+            # Cache vidé si les canaux, le filtrage ou la fenêtre (refiltrée en entier) changent
+            x, y = self.decimator.update(self.eeg_channel_data_filt, frame.total_samples, width,
+                                         key=(tuple(frame.channels), frame.filtered is not None, frame.capacity))
+            x = (x - (frame.total_samples - self.eeg_channel_data_filt.shape[1])) / self.fs
+        if not history_mode:
+            for idx, curve in enumerate(self.time_curves):
+                if show_time:
+                    curve.setData(x[idx], y[idx] + idx * 2000)
+                curve.setVisible(show_time)
         # Affichage du spectre (FFT) si demandé
-        if self.BoxFFT.isChecked():
-            freqs, psds = compute_fft_welch(self.eeg_channel_data_filt, self.fs)
-            self.FFTGraph.clear()
-            for idx, ch_idx in enumerate(self.eeg_channel_indices):
-                pen = pg.mkPen(['r', 'g', 'b', 'c', 'm', 'y', 'w', 'orange'][ch_idx % 8])
-                self.FFTGraph.plot(freqs, psds[idx, :], pen=pen)
-        else:
-            self.FFTGraph.clear()
+        show_fft = self.BoxFFT.isChecked() and self.spectrum is not None
+        for idx, curve in enumerate(self.fft_curves):
+            if show_fft:
+                freqs, psds = self.spectrum
+                curve.setData(freqs, psds[idx, :])
+            curve.setVisible(show_fft)
         # Affichage de la puissance par bande (PSD) si demandé
-        if self.BoxPSD.isChecked():
-            if 'freqs' not in locals() or 'psds' not in locals():
-                freqs, psds = compute_fft_welch(self.eeg_channel_data_filt, self.fs)
-            self.band_power = compute_power_bands(freqs, psds)
-            self.PSD.clear()
-            x_positions = np.arange(len(self.bands)) * 2
-            bar_item = pg.BarGraphItem(x=x_positions, height=self.band_power, width=1.5,
-                                       brush=pg.mkBrush(0, 191, 255))
-            self.PSD.addItem(bar_item)
-            # Ajouter les étiquettes des bandes sur l'axe des abscisses
-            self.PSD.getAxis('bottom').setTicks([list(zip(x_positions, self.bands))])
-            # Enregistrer dans le CSV de puissance par bande si enregistrement actif
-            if self.record_data:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                data_row = [timestamp] + [str(val) for val in self.band_power]
-                header = ['Time', 'Delta', 'Theta', 'Alpha', 'Beta', 'Gamma']
-                file_exists = os.path.isfile(self.filename)
-                is_empty = file_exists and os.path.getsize(self.filename) == 0
-                with open(self.filename, 'a', newline='') as file:
-                    writer = csv.writer(file)
-                    if not file_exists or is_empty:
-                        writer.writerow(header)
-                    writer.writerow(data_row)
+        if self.BoxPSD.isChecked() and frame.band_power is not None:
+            # Matrice canaux x bandes, puis moyenne sur les canaux pour l'affichage
+            self.band_power_matrix = frame.band_power
+            self.band_power = self.band_power_matrix.mean(axis=0)
+            self.bar_item.setOpts(height=self.band_power)
+            self.bar_item.setVisible(True)
+        else:
+            self.bar_item.setVisible(False)
+
+    def draw_history(self):
+        """
+        Trace la plage visible de l'historique (molette : zoom, glisser : défilement)
+        sous forme d'enveloppe min/max, au plus un point par pixel.
+        """
+        view_box = self.TimeGraph.getViewBox()
+        x0, x1 = view_box.viewRange()[0]
+        t, lo, hi = self.history.envelope(x0, x1, max(100, int(view_box.width())))
+        x, y = envelope_curve(t, lo, hi)
+        for idx, (curve, ch_idx) in enumerate(zip(self.time_curves, self.eeg_channel_indices)):
+            values = y[ch_idx]
+            # Données brutes : retirer le décalage continu de la plage affichée
+            offset = np.median(values) if values.size else 0.0
+            curve.setData(x, values - offset + idx * 2000)
+            curve.setVisible(True)
+
+    def toggle_history(self, enabled):
+        """Bascule le tracé temporel entre la fenêtre en direct et l'historique de la session."""
+        if enabled and getattr(self, 'history', None) is not None:
+            # Commencer sur les dernières secondes ; l'utilisateur navigue ensuite librement
+            end = self.history.duration
+            window = self.window_size() or 10
+            self.TimeGraph.setXRange(max(0.0, end - window), end, padding=0)
+            self.TimeGraph.enableAutoRange(axis='y')
+        else:
+            self.TimeGraph.enableAutoRange()
+
+    def draw_3d(self, t):
+        """Met à jour les lignes 3D existantes."""
+        if getattr(self, 'waterfall_item', None) is not None:
+            self.waterfall_item.setVisible(False)
+        for idx, line in enumerate(self.gl_lines):
+            line.setVisible(True)
+            data = self.eeg_channel_data_filt[idx, :]
+            # Points 3D : (temps, amplitude, décalage du canal sur l'axe Z), tableau réutilisé
+            points = self.gl_points[idx]
+            if points.shape[0] != data.shape[0]:
+                points = self.gl_points[idx] = np.empty((data.shape[0], 3), dtype=np.float32)
+                points[:, 2] = idx * 2000.0
+            points[:, 0] = t
+            points[:, 1] = data
+            line.setData(pos=points)
+
+    def draw_waterfall(self, frame):
+        """
+        Spectrogramme 3D : ajoute le dernier spectre de Welch (moyenne des canaux, dB)
+        comme nouvelle colonne de l'anneau de sommets.
+        Seule cette colonne est transférée à la carte graphique (WaterfallItem) : le coût par
+        image ne dépend pas de la durée affichée, et rien n'est recalculé si le spectre n'a pas changé.
+        """
+        for line in getattr(self, 'gl_lines', []):
+            line.setVisible(False)
+        if frame.psds is None or frame.psds is getattr(self, 'waterfall_psds', None):
+            return  # pas de nouveau spectre depuis la dernière colonne
+        self.waterfall_psds = frame.psds
+        keep = frame.freqs <= self.WATERFALL_MAX_FREQ
+        if getattr(self, 'waterfall', None) is None or self.waterfall.n_points != keep.sum():
+            self.build_waterfall(frame.freqs[keep])
+        power = frame.psds[:, keep].mean(axis=0)
+        self.waterfall.push(10 * np.log10(np.maximum(power, 1e-12)))
+        # Défilement par translation de l'objet : les sommets déjà écrits ne bougent pas
+        self.waterfall_item.resetTransform()
+        self.waterfall_item.translate(self.waterfall.offset, 0, 0)
+        self.waterfall_item.setVisible(True)
+        self.waterfall_item.update()
+
+    def build_waterfall(self, freqs):
+        """Crée le tampon du spectrogramme (une fois par grille de fréquences) et l'objet 3D qui le trace."""
+        from glwaterfall import WaterfallItem
+        self.waterfall = WaterfallBuffer(self.WATERFALL_DEPTH, freqs, dx=self.WATERFALL_DX)
+        if getattr(self, 'waterfall_item', None) is None:
+            self.waterfall_item = WaterfallItem(self.waterfall, glOptions='opaque')
+            self.glview.addItem(self.waterfall_item)
         else:
-            self.PSD.clear()
-        # Ajuster dynamiquement le rafraîchissement en fonction de la charge
-        heavy_ops = self.BoxFFT.isChecked() or self.BoxPSD.isChecked()
-        many_channels = len(self.eeg_channel_indices) > 4
-        base_interval = int(1000 / max(1, int(self.fps.text()) if self.fps.text() else 1))
-        new_interval = base_interval
-        if heavy_ops and many_channels:
-            new_interval = int(base_interval * 1.5)
-        elif heavy_ops or many_channels:
-            new_interval = int(base_interval * 1.2)
+            self.waterfall_item.setBuffer(self.waterfall)
+
+    def window_size(self):
+        """Fenêtre (s) demandée par le champ Window Size, ou None si la saisie n'est pas une durée valide."""
+        try:
+            win_size = float(self.win_size.text())
+        except ValueError:
+            return None
+        return win_size if np.isfinite(win_size) and win_size * getattr(self, 'fs', 1) >= 1 else None
+
+    def base_interval(self):
+        """Intervalle de rafraîchissement (ms) demandé par le champ FPS."""
+        try:
+            return int(1000 / max(1, int(self.fps.text())))
+        except ValueError:
+            return 1000
+
+    def spectrum_hop(self):
+        """Pas (s) entre deux mises à jour du spectre et de la puissance par bande."""
+        try:
+            return max(0.01, float(self.hop.text()))
+        except ValueError:
+            return 0.1
+
+    def adapt_refresh_interval(self):
+        """Allonge l'intervalle du timer si le coût mesuré du dessin dépasse le budget demandé."""
+        timer = self.pipeline.timer
+        draw_ms = sum(timer.stats(stage)[0] for stage in ('draw_2d', 'draw_3d'))
+        # Garder une marge de 25 % pour la boucle d'événements Qt
+        new_interval = max(self.base_interval(), int(draw_ms * 1.25))
         if new_interval != self.timer.interval():
             self.timer.setInterval(new_interval)
-        # Affichage 3D des signaux EEG si l'onglet 3D est actif
-        if hasattr(self, 'tabs') and self.tabs.currentIndex() == 1:
-            if not hasattr(self, 'gl_lines'):
-                self.gl_lines = []
-            # Supprimer les anciennes courbes 3D
-            for line in list(getattr(self, 'gl_lines', [])):
-                self.glview.removeItem(line)
-            self.gl_lines.clear()
-            # Couleurs des courbes (identiques à l'affichage 2D)
-            colors = [
-                (1, 0, 0, 1),     # rouge
-                (0, 1, 0, 1),     # vert
-                (0, 0, 1, 1),     # bleu
-                (0, 1, 1, 1),     # cyan
-                (1, 0, 1, 1),     # magenta
-                (1, 1, 0, 1),     # jaune
-                (1, 1, 1, 1),     # blanc
-                (1, 0.65, 0, 1)   # orange
-            ]
-            # Tracer les signaux EEG en 3D pour chaque canal sélectionné
-            for idx, ch_idx in enumerate(self.eeg_channel_indices):
-                data = self.eeg_channel_data_filt[idx, :]
-                # Points 3D : (temps, amplitude, décalage du canal sur l'axe Z)
-                points = np.vstack([t, data, np.full(data.shape, idx * 2000.0)]).T
-                line = gl.GLLinePlotItem(pos=points, color=colors[ch_idx % len(colors)],
-                                          width=2, antialias=True)
-                self.glview.addItem(line)
-                self.gl_lines.append(line)
+
+    def update_stats_overlay(self):
+        """Affiche les durées p50/p99 de chaque étape en surimpression (si demandé)."""
+        if not self.BoxStats.isChecked():
+            self.stats_overlay.hide()
+            return
+        # Rafraîchir le texte toutes les 10 images seulement
+        if getattr(self, 'stats_frame_count', 0) % 10 == 0:
+            stats = self.pipeline.scheduler_stats()
+            schedule_text = (f"display   late {self.render_schedule.late} skipped {self.render_schedule.skipped}"
+                             f" dropped {stats['publish']['dropped']}\n"
+                             f"spectrum  late {stats['spectrum']['late']} skipped {stats['spectrum']['skipped']}"
+                             f" shed {stats['spectrum']['shed']}\n"
+                             f"acquisition late {stats['acquisition']['late']} backlog {stats['backlog']}")
+            self.stats_overlay.setText(self.pipeline.timer.format_summary() + '\n' + schedule_text)
+            self.stats_overlay.adjustSize()
+            self.stats_overlay.show()
+            self.stats_overlay.raise_()
+        self.stats_frame_count = getattr(self, 'stats_frame_count', 0) + 1
+
+    def toggle_profiling(self, enabled):
+        """Active cProfile dans les threads DSP et GUI ; écrit le profil fusionné à l'arrêt."""
+        if getattr(self, 'pipeline', None) is None:
+            return
+        if enabled:
+            self.pipeline.timer.start_profiling()
+            self.label_6.setText("Profilage cProfile activé...")
+        else:
+            os.makedirs(self.RESULTS_DIR, exist_ok=True)
+            path = os.path.join(self.RESULTS_DIR, f"profile_{datetime.now():%Y%m%d_%H%M%S}.prof")
+            if self.pipeline.timer.stop_profiling(path) is not None:
+                self.label_6.setText(f"Profil enregistré : {path}")
+
+    def export_trace(self):
+        """Exporte les durées mesurées au format trace (chrome://tracing, Perfetto)."""
+        if getattr(self, 'pipeline', None) is None:
+            return
+        os.makedirs(self.RESULTS_DIR, exist_ok=True)
+        path = os.path.join(self.RESULTS_DIR, f"trace_{datetime.now():%Y%m%d_%H%M%S}.json")
+        self.pipeline.timer.export_trace(path)
+        self.label_6.setText(f"Trace enregistrée : {path}")
+
+    def build_plot_items(self):
+        """Crée une fois pour toutes les courbes 2D, les barres et les lignes 3D de la sélection courante."""
+        self.TimeGraph.clear()
+        self.FFTGraph.clear()
+        self.PSD.clear()
+        # Courbes temporelles : déjà réduites à la largeur du tracé (DisplayDecimator), découpe à la vue
+        self.TimeGraph.setDownsampling(auto=False)
+        self.TimeGraph.setClipToView(True)
+        self.time_curves = [self.TimeGraph.plot(pen=self.channel_pens[ch_idx % len(self.channel_pens)])
+                            for ch_idx in self.eeg_channel_indices]
+        self.fft_curves = [self.FFTGraph.plot(pen=self.channel_pens[ch_idx % len(self.channel_pens)])
+                           for ch_idx in self.eeg_channel_indices]
+        # Barres de puissance par bande avec les étiquettes des bandes sur l'axe des abscisses
+        x_positions = np.arange(len(self.bands)) * 2
+        self.bar_item = pg.BarGraphItem(x=x_positions, height=np.zeros(len(self.bands)), width=1.5,
+                                        brush=pg.mkBrush(0, 191, 255))
+        self.PSD.addItem(self.bar_item)
+        self.PSD.getAxis('bottom').setTicks([list(zip(x_positions, self.bands))])
+        self.build_gl_lines()
+        self.plot_selection = list(self.eeg_channel_indices)
+
+    def build_gl_lines(self):
+        """Lignes 3D de la sélection courante (mêmes couleurs que l'affichage 2D), si la vue 3D existe."""
+        if self.glview is None:
+            return
+        import pyqtgraph.opengl as gl
+        for line in getattr(self, 'gl_lines', []):
+            self.glview.removeItem(line)
+        self.gl_lines = []
+        self.gl_points = []
+        for ch_idx in self.eeg_channel_indices:
+            line = gl.GLLinePlotItem(pos=np.zeros((1, 3), dtype=np.float32),
+                                     color=self.GL_COLORS[ch_idx % len(self.GL_COLORS)],
+                                     width=2, antialias=True)
+            self.glview.addItem(line)
+            self.gl_lines.append(line)
+            self.gl_points.append(np.zeros((0, 3), dtype=np.float32))
+
+    def show_tab(self, index):
+        """Crée la vue 3D au premier affichage de son onglet."""
+        if index == 1:
+            self.ensure_gl_view()
+
+    def ensure_gl_view(self):
+        """
+        Importe pyqtgraph.opengl et crée la vue 3D à la demande (démarrage plus rapide).
+        Sans OpenGL fonctionnel, l'onglet affiche l'erreur et le reste de l'interface reste utilisable.
+        """
+        if self.glview is not None or self.gl_error is not None:
+            return self.glview is not None
+        try:
+            import pyqtgraph.opengl as gl
+            self.glview = gl.GLViewWidget()
+        except Exception as e:
+            self.gl_error = e
+            self.tab3d_layout.addWidget(QtWidgets.QLabel(f"Vue 3D indisponible (OpenGL) : {e}"))
+            return False
+        self.tab3d_layout.addWidget(self.glview)
+        if getattr(self, 'plot_selection', None) is not None:
+            self.build_gl_lines()
+        return True
 
     def begin_recording(self):
-        """Démarre l'enregistrement des données EEG dans des fichiers CSV."""
+        """Démarre l'enregistrement des données brutes (binaire) et de la puissance par bande (CSV)."""
         trial_name = self.trial_name.text().strip()
         if not trial_name:
             self.label_6.setText("Veuillez entrer un nom de test (Trial Name).")
             return
+        # Enregistrement déjà en cours : le terminer (fichiers fermés, puits retirés) avant d'en ouvrir un autre
+        if self.record_data or getattr(self, 'raw_recorder', None) is not None:
+            self.end_recording()
         self.record_data = True
-        # Préparer le dossier et les fichiers CSV
-        results_dir = r"C:\Users\Konan\Desktop\EEG_GUI"
+        # Préparer le dossier et les fichiers d'enregistrement
+        results_dir = self.RESULTS_DIR
         os.makedirs(results_dir, exist_ok=True)
-        # Fichier CSV pour la puissance par bande
+        # Fichier CSV pour la puissance par bande (reste ouvert pendant l'enregistrement)
         self.filename = os.path.join(results_dir, f"{trial_name}_power.csv")
-        with open(self.filename, 'w', newline='') as file:
-            pass  # créer ou réinitialiser le fichier
-        # Fichier CSV pour les données brutes EEG
-        self.raw_filename = os.path.join(results_dir, f"{trial_name}_raw.csv")
-        self.raw_file = open(self.raw_filename, 'w', newline='')
-        self.raw_writer = csv.writer(self.raw_file)
-        nchan = len(self.eeg_channels) if hasattr(self, 'eeg_channels') else 8
-        header = ['Time'] + [f"Ch{i+1}" for i in range(nchan)]
-        self.raw_writer.writerow(header)
-        self.sample_counter = 0
+        self.power_log = BandPowerLog(self.filename, getattr(self, 'bands', list(DEFAULT_BANDS)))
+        # Données brutes : fichier binaire float32 + description JSON, écrits par un thread dédié
+        self.raw_filename = os.path.join(results_dir, f"{trial_name}_raw")
+        if getattr(self, 'pipeline', None) is not None:
+            metadata = {'board_id': self.board_id, 'eeg_channels': list(self.eeg_channels),
+                        'marker_channel': self.marker_row, 'trial_name': trial_name}
+            self.raw_recorder = RawRecorder(self.raw_filename, function.BoardShim.get_num_rows(self.board_id),
+                                            self.fs, metadata, timestamp_row=get_timestamp_row(self.board_id))
+            self.raw_recorder.start()
+            self.pipeline.acquisition.chunk_sinks.append(self.raw_recorder)
+            # La puissance par bande est écrite par le thread de traitement
+            if self.record_frame not in self.pipeline.worker.frame_callbacks:
+                self.pipeline.worker.frame_callbacks.append(self.record_frame)
+            # Époques de l'essai : celles ajoutées à partir de maintenant
+            epochs = self.pipeline.processor.epochs
+            self.epoch_start = epochs.count if epochs is not None else None
         self.label_6.setText("Enregistrement des données activé...")
 
+    def record_frame(self, frame):
+        """Ajoute une ligne de puissance par bande au CSV (appelé depuis le thread de traitement)."""
+        # Lecture unique : end_recording peut fermer le journal depuis le thread GUI pendant cet appel
+        power_log = getattr(self, 'power_log', None)
+        if power_log is None or frame.band_power is None:
+            return
+        with self.pipeline.timer.stage('record'):
+            power_log.write(frame.band_power.mean(axis=0))  # sans effet une fois le journal fermé
+
     def end_recording(self):
         """Arrête l'enregistrement des données."""
         self.record_data = False
-        if hasattr(self, 'raw_file'):
-            self.raw_file.close()
-        self.label_6.setText("Enregistrement terminé.")
+        if getattr(self, 'pipeline', None) is not None:
+            if self.record_frame in self.pipeline.worker.frame_callbacks:
+                self.pipeline.worker.frame_callbacks.remove(self.record_frame)
+            if getattr(self, 'raw_recorder', None) in self.pipeline.acquisition.chunk_sinks:
+                self.pipeline.acquisition.chunk_sinks.remove(self.raw_recorder)
+        # Vider la file d'écriture et fermer les fichiers
+        if getattr(self, 'raw_recorder', None) is not None:
+            self.raw_recorder.close()
+            self.raw_recorder = None
+        if getattr(self, 'power_log', None) is not None:
+            self.power_log.close()
+            self.power_log = None
+        message = "Enregistrement terminé."
+        # Époques de l'essai (tableau époques x canaux x échantillons + ERP recalculables)
+        epochs = self.pipeline.processor.epochs if getattr(self, 'pipeline', None) is not None else None
+        if epochs is not None and getattr(self, 'epoch_start', None) is not None and epochs.count > self.epoch_start:
+            path = self.raw_filename[:-len('_raw')] + '_epochs.npz'
+            n_epochs = epochs.count - self.epoch_start
+            epochs.save(path, self.epoch_start)
+            message += f" {n_epochs} époques : {path}"
+        self.epoch_start = None
+        self.label_6.setText(message)
 
 class Ui_Form(object):
     def setupUi(self, Form):
@@ -275,15 +664,19 @@ class Ui_Form(object):
         self.win_size = QtWidgets.QLineEdit()
         self.label_3 = QtWidgets.QLabel("FPS:")
         self.fps = QtWidgets.QLineEdit()
+        self.label_hop = QtWidgets.QLabel("Hop (s):")
+        self.hop = QtWidgets.QLineEdit()
         self.connect_button = QtWidgets.QPushButton("Connect")
         self.reset_button = QtWidgets.QPushButton("Reset")
         # Icônes sur les boutons Connect/Reset
         self.connect_button.setIcon(QtWidgets.QApplication.style().standardIcon(QtWidgets.QStyle.SP_DriveNetIcon))
         self.reset_button.setIcon(QtWidgets.QApplication.style().standardIcon(QtWidgets.QStyle.SP_BrowserReload))
         # Texte d'exemple dans les champs de saisie
-        self.com_port.setPlaceholderText("Ex: 3")
+        self.com_port.setPlaceholderText("Ex: 3, synthetic, ou session à rejouer")
         self.win_size.setPlaceholderText("Ex: 10")
         self.fps.setPlaceholderText("Ex: 10")
+        self.hop.setPlaceholderText("Ex: 0.1")
+        self.hop.setToolTip("Pas de mise à jour du spectre et de la puissance par bande")
         # Placement des widgets de connexion
         self.group_conn_layout.addWidget(self.label, 0, 0)
         self.group_conn_layout.addWidget(self.com_port, 0, 1)
@@ -291,20 +684,29 @@ class Ui_Form(object):
         self.group_conn_layout.addWidget(self.win_size, 1, 1)
         self.group_conn_layout.addWidget(self.label_3, 2, 0)
         self.group_conn_layout.addWidget(self.fps, 2, 1)
-        self.group_conn_layout.addWidget(self.connect_button, 3, 0)
-        self.group_conn_layout.addWidget(self.reset_button, 3, 1)
+        self.group_conn_layout.addWidget(self.label_hop, 3, 0)
+        self.group_conn_layout.addWidget(self.hop, 3, 1)
+        self.group_conn_layout.addWidget(self.connect_button, 4, 0)
+        self.group_conn_layout.addWidget(self.reset_button, 4, 1)
         self.left_panel_layout.addWidget(self.group_conn)
         # Groupe Canaux EEG
         self.group_channels = QtWidgets.QGroupBox("Canaux EEG")
         self.group_channels_layout = QtWidgets.QGridLayout(self.group_channels)
         self.BoxCh1 = QtWidgets.QCheckBox("Ch1"); self.group_channels_layout.addWidget(self.BoxCh1, 0, 0)
-        self.BoxCh2 = QtWidgets.QCheckBox("Ch2"); self.group_channels_layout.addWidget(self.BoxCh2, 0, 1)
+        self.BoxCh2 = QtWidgets.QCheckBox("Ch2"); self.group_channels_layout.addWidget(self.BoxCh2, 0, 2)
         self.BoxCh3 = QtWidgets.QCheckBox("Ch3"); self.group_channels_layout.addWidget(self.BoxCh3, 1, 0)
-        self.BoxCh4 = QtWidgets.QCheckBox("Ch4"); self.group_channels_layout.addWidget(self.BoxCh4, 1, 1)
+        self.BoxCh4 = QtWidgets.QCheckBox("Ch4"); self.group_channels_layout.addWidget(self.BoxCh4, 1, 2)
         self.BoxCh5 = QtWidgets.QCheckBox("Ch5"); self.group_channels_layout.addWidget(self.BoxCh5, 2, 0)
-        self.BoxCh6 = QtWidgets.QCheckBox("Ch6"); self.group_channels_layout.addWidget(self.BoxCh6, 2, 1)
+        self.BoxCh6 = QtWidgets.QCheckBox("Ch6"); self.group_channels_layout.addWidget(self.BoxCh6, 2, 2)
         self.BoxCh7 = QtWidgets.QCheckBox("Ch7"); self.group_channels_layout.addWidget(self.BoxCh7, 3, 0)
-        self.BoxCh8 = QtWidgets.QCheckBox("Ch8"); self.group_channels_layout.addWidget(self.BoxCh8, 3, 1)
+        self.BoxCh8 = QtWidgets.QCheckBox("Ch8"); self.group_channels_layout.addWidget(self.BoxCh8, 3, 2)
+        # Qualité du signal affichée à droite de chaque case (RMS, couleur selon l'état)
+        self.quality_labels = []
+        for i in range(8):
+            label = QtWidgets.QLabel("–")
+            label.setMinimumWidth(48)
+            self.group_channels_layout.addWidget(label, i // 2, 2 * (i % 2) + 1)
+            self.quality_labels.append(label)
         self.left_panel_layout.addWidget(self.group_channels)
         # Groupe Options d'analyse
         self.group_analysis = QtWidgets.QGroupBox("Options d'analyse")
@@ -313,11 +715,21 @@ class Ui_Form(object):
         self.BoxFFT = QtWidgets.QCheckBox("FFT")
         self.BoxPSD = QtWidgets.QCheckBox("PSD")
         self.BoxTime = QtWidgets.QCheckBox("Time Domain")
+        self.BoxStats = QtWidgets.QCheckBox("Frame Stats")
+        self.BoxProfile = QtWidgets.QCheckBox("cProfile")
+        self.BoxHistory = QtWidgets.QCheckBox("History")
+        self.BoxWaterfall = QtWidgets.QCheckBox("3D Spectrogram")
+        self.trace_button = QtWidgets.QPushButton("Export Trace")
         # Infobulles explicatives pour chaque option
         self.BoxFiltering.setToolTip("Filtrer le signal EEG (passe-bande + notch)")
         self.BoxFFT.setToolTip("Afficher le spectre de Fourier (FFT)")
         self.BoxPSD.setToolTip("Afficher la densité spectrale de puissance (PSD)")
         self.BoxTime.setToolTip("Afficher le signal temporel (Time Domain)")
+        self.BoxStats.setToolTip("Afficher la durée p50/p99 de chaque étape (acquisition, DSP, dessin)")
+        self.BoxProfile.setToolTip("Profiler les threads DSP et GUI avec cProfile (profil écrit à l'arrêt)")
+        self.BoxHistory.setToolTip("Parcourir toute la session dans le tracé temporel (molette : zoom, glisser : défilement)")
+        self.BoxWaterfall.setToolTip("Vue 3D : spectrogramme défilant (temps x fréquence x puissance) au lieu des signaux")
+        self.trace_button.setToolTip("Exporter les durées mesurées au format trace (chrome://tracing)")
         # Icônes pour les options (fichiers requis dans ./icons)
         self.BoxFiltering.setIcon(QtGui.QIcon("icons/filter_icon.png"))
         self.BoxFFT.setIcon(QtGui.QIcon("icons/fft_icon.png"))
@@ -328,6 +740,11 @@ class Ui_Form(object):
         self.group_analysis_layout.addWidget(self.BoxFFT)
         self.group_analysis_layout.addWidget(self.BoxPSD)
         self.group_analysis_layout.addWidget(self.BoxTime)
+        self.group_analysis_layout.addWidget(self.BoxHistory)
+        self.group_analysis_layout.addWidget(self.BoxWaterfall)
+        self.group_analysis_layout.addWidget(self.BoxStats)
+        self.group_analysis_layout.addWidget(self.BoxProfile)
+        self.group_analysis_layout.addWidget(self.trace_button)
         self.left_panel_layout.addWidget(self.group_analysis)
         # Groupe Enregistrement
         self.group_record = QtWidgets.QGroupBox("Enregistrement")
@@ -369,6 +786,12 @@ class Ui_Form(object):
         self.TimeGraph = self.win.addPlot(row=0, col=0, colspan=2, title="Time Domain")
         self.FFTGraph = self.win.addPlot(row=1, col=0, title="PSD")
         self.PSD = self.win.addPlot(row=1, col=1, title="Power per Band")
+        # Surimpression des durées par étape (coin supérieur gauche des graphiques)
+        self.stats_overlay = QtWidgets.QLabel(self.win)
+        self.stats_overlay.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #00BFFF;"
+                                         "font-family: monospace; padding: 4px;")
+        self.stats_overlay.move(10, 10)
+        self.stats_overlay.hide()
         # Création des onglets pour basculer entre vue 2D et 3D
         self.tabs = QtWidgets.QTabWidget()
         self.tab_2d = QtWidgets.QWidget()
@@ -376,8 +799,9 @@ class Ui_Form(object):
         self.tab2d_layout = QtWidgets.QVBoxLayout(self.tab_2d)
         self.tab2d_layout.addWidget(self.win)
         self.tab3d_layout = QtWidgets.QVBoxLayout(self.tab_3d)
-        self.glview = gl.GLViewWidget()
-        self.tab3d_layout.addWidget(self.glview)
+        # Vue 3D (OpenGL) créée au premier affichage de l'onglet : voir MainApp.ensure_gl_view
+        self.glview = None
+        self.gl_error = None
         self.tabs.addTab(self.tab_2d, "Vue 2D")
         self.tabs.addTab(self.tab_3d, "Vue 3D")
         self.right_panel_layout.addWidget(self.tabs)
@@ -393,6 +817,10 @@ class Ui_Form(object):
         self.reset_button.clicked.connect(Form.reset_app)
         self.record_button.clicked.connect(Form.begin_recording)
         self.end_record_button.clicked.connect(Form.end_recording)
+        self.BoxProfile.toggled.connect(Form.toggle_profiling)
+        self.BoxHistory.toggled.connect(Form.toggle_history)
+        self.tabs.currentChanged.connect(Form.show_tab)
+        self.trace_button.clicked.connect(Form.export_trace)
         # Timer pour la mise à jour périodique des données
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(Form.update_data_and_graphs)
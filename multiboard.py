@@ -0,0 +1,290 @@
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import function
+from function import WelchEngine, DEFAULT_BANDS
+from pipeline import ProcessedFrame
+
+# Champs de l'en-tête partagé (int64)
+_SEQ, _TOTAL, _VALID, _FLAGS, _STATUS = range(5)
+_HEADER = 8
+_HAS_FILTERED, _HAS_SPECTRUM = 1, 2
+
+class BoardSpec:
+    """
+    Description d'une carte à ouvrir dans un processus dédié (transmissible entre processus).
+    source : 'cyton', 'daisy', 'synthetic' ou 'replay' ; 'port' est le port série
+    ou, pour 'replay', la session enregistrée (chemin sans extension).
+    """
+    def __init__(self, source, port=None, speed=1.0, loop=False, name=None):
+        self.source = source
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self.name = name or (f"{source}:{port}" if port else source)
+
+    @classmethod
+    def parse(cls, text):
+        """'cyton:COM3', 'daisy:/dev/ttyUSB0', 'synthetic', 'replay:results/Test1_raw'."""
+        source, _, port = text.partition(':')
+        return cls(source, port or None)
+
+    def describe(self):
+        """
+        Renvoie (board_id, fs, lignes EEG) sans ouvrir la carte
+        (utilisé pour dimensionner la mémoire partagée avant le lancement du processus).
+        """
+        if self.source == 'replay':
+            with open(self.port + '.json') as file:
+                meta = json.load(file)
+            board_id = meta.get('board_id')
+            if board_id is None:
+                board_id = function.BoardIds.CYTON_BOARD.value
+            eeg_channels = meta.get('eeg_channels') or function.BoardShim.get_eeg_channels(board_id)
+            return board_id, meta['fs'], list(eeg_channels)
+        board_id = {'cyton': function.BoardIds.CYTON_BOARD.value,
+                    'daisy': function.BoardIds.CYTON_DAISY_BOARD.value,
+                    'synthetic': function.BoardIds.SYNTHETIC_BOARD.value}[self.source]
+        board_shim = function.BoardShim
+        return board_id, board_shim.get_sampling_rate(board_id), list(board_shim.get_eeg_channels(board_id))
+
+class SharedFrameBuffer:
+    """
+    Dernier résultat d'une carte en mémoire partagée (multiprocessing.shared_memory).
+    Un seul écrivain (le processus de la carte) et un nombre quelconque de lecteurs.
+    Un compteur de séquence (impair pendant l'écriture) permet aux lecteurs de détecter
+    une lecture concurrente d'une écriture, sans verrou entre processus.
+    """
+    def __init__(self, n_channels, n_samples, n_freqs, n_bands, name=None):
+        self.shape = (n_channels, n_samples, n_freqs, n_bands)
+        sizes = [_HEADER, n_channels * n_samples, n_channels * n_samples, n_freqs,
+                 n_channels * n_freqs, n_channels * n_bands]
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=8 * sum(sizes))
+        self.name = self.shm.name
+        offsets = np.cumsum([0] + sizes) * 8
+        view = lambda i, shape, dtype=np.float64: np.ndarray(shape, dtype, self.shm.buf, offsets[i])
+        self.header = view(0, (_HEADER,), np.int64)
+        self.raw = view(1, (n_channels, n_samples))
+        self.filtered = view(2, (n_channels, n_samples))
+        self.freqs = view(3, (n_freqs,))
+        self.psds = view(4, (n_channels, n_freqs))
+        self.band_power = view(5, (n_channels, n_bands))
+        if create:
+            self.header[:] = 0
+
+    def attach_args(self):
+        """Arguments permettant d'ouvrir le même bloc depuis un autre processus."""
+        return self.shape + (self.name,)
+
+    @property
+    def seq(self):
+        return int(self.header[_SEQ])
+
+    def publish(self, frame):
+        """Écrit un ProcessedFrame (appelé par l'écrivain uniquement)."""
+        rows = frame.channels
+        n = min(frame.raw.shape[1], self.raw.shape[1])
+        self.header[_SEQ] += 1  # impair : écriture en cours
+        self.raw[rows, -n:] = frame.raw[:, -n:]
+        flags = 0
+        if frame.filtered is not None:
+            self.filtered[rows, -n:] = frame.filtered[:, -n:]
+            flags |= _HAS_FILTERED
+        if frame.psds is not None and frame.psds.shape[1] == self.freqs.shape[0]:
+            self.freqs[:] = frame.freqs
+            self.psds[rows] = frame.psds
+            self.band_power[rows] = frame.band_power
+            flags |= _HAS_SPECTRUM
+        self.header[_TOTAL] = frame.total_samples
+        self.header[_VALID] = n
+        self.header[_FLAGS] = flags
+        self.header[_SEQ] += 1  # pair : résultat cohérent
+
+    def frame(self, fs, bands, copy=True):
+        """
+        Renvoie le résultat courant sous forme de ProcessedFrame, ou None si rien n'est publié.
+        copy=False renvoie des vues sur la mémoire partagée (sans copie) : elles restent valides
+        tant que l'écrivain ne publie pas de nouveau résultat (voir seq).
+        """
+        for _ in range(100):
+            seq = self.seq
+            if seq == 0:
+                return None
+            if seq % 2:
+                time.sleep(0)
+                continue
+            n, flags, total = int(self.header[_VALID]), int(self.header[_FLAGS]), int(self.header[_TOTAL])
+            take = (lambda a: a.copy()) if copy else (lambda a: a)
+            raw = take(self.raw[:, -n:])
+            filtered = take(self.filtered[:, -n:]) if flags & _HAS_FILTERED else None
+            spectrum = flags & _HAS_SPECTRUM
+            freqs = take(self.freqs) if spectrum else None
+            psds = take(self.psds) if spectrum else None
+            band_power = take(self.band_power) if spectrum else None
+            if not copy or self.seq == seq:
+                frame = ProcessedFrame(fs, total, raw, filtered, freqs, psds, band_power, list(bands),
+                                       list(range(self.shape[0])))
+                frame.seq = seq
+                return frame
+        return None
+
+    def close(self, unlink=False):
+        # Libérer les vues avant de fermer le bloc
+        self.header = self.raw = self.filtered = self.freqs = self.psds = self.band_power = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+def _run_board(index, spec, shared_args, win_size, poll_interval, publish_interval, spectrum_hop,
+               status, stop_event):
+    """
+    Corps du processus d'une carte : acquisition + DSP (EEGPipeline) et publication
+    de chaque résultat dans la mémoire partagée.
+    """
+    from boards import open_board
+    from pipeline import EEGPipeline
+    shared = SharedFrameBuffer(*shared_args)
+    board = None
+    try:
+        replay = spec.port if spec.source == 'replay' else None
+        board, board_id, board_status = open_board(spec.source, spec.port, replay, spec.speed, spec.loop)
+        if not isinstance(board_status, str):
+            status.put((index, False, str(board_status)))
+            return
+        board.start_stream(45000)
+        _, fs, eeg_channels = spec.describe()
+        pipeline = EEGPipeline(board, fs, eeg_channels, win_size, poll_interval, publish_interval, spectrum_hop)
+        pipeline.worker.frame_callbacks.append(shared.publish)
+        pipeline.start()
+        status.put((index, True, board_status))
+        while not stop_event.wait(0.1):
+            if getattr(board, 'finished', False) and pipeline.chunks.empty():
+                break
+        pipeline.stop()
+    except Exception as e:
+        status.put((index, False, f"{type(e).__name__}: {e}"))
+    finally:
+        if board is not None:
+            try:
+                board.stop_stream()
+                board.release_session()
+            except Exception:
+                pass
+        shared.close()
+
+class MultiBoardPipeline:
+    """
+    Plusieurs cartes en parallèle : chaque carte a son propre processus
+    (acquisition + DSP) et publie son dernier résultat dans une mémoire partagée
+    que le consommateur (GUI, ligne de commande) lit sans sérialisation.
+    Le débit suit donc le nombre de cœurs au lieu de passer par un seul thread.
+    """
+    def __init__(self, specs, win_size=10, poll_interval=0.02, publish_interval=0.05, spectrum_hop=0.1,
+                 bands=None):
+        self.specs = [BoardSpec.parse(s) if isinstance(s, str) else s for s in specs]
+        self.bands = list(bands or DEFAULT_BANDS)
+        self.win_size = win_size
+        self.rates = (poll_interval, publish_interval, spectrum_hop)
+        self.layouts = []
+        self.buffers = []
+        for spec in self.specs:
+            board_id, fs, eeg_channels = spec.describe()
+            capacity = max(1, int(float(win_size) * fs))
+            n_freqs = WelchEngine(1, fs, capacity).freqs.size
+            self.layouts.append({'board_id': board_id, 'fs': fs, 'eeg_channels': eeg_channels})
+            self.buffers.append(SharedFrameBuffer(len(eeg_channels), capacity, n_freqs, len(self.bands)))
+        self.processes = []
+        self.status = {}
+        self._last_seq = [0] * len(self.specs)
+        self._stop_event = None
+
+    def start(self, timeout=30.0):
+        """
+        Lance un processus par carte et attend leur connexion.
+        Renvoie {indice: (ok, message)}.
+        """
+        context = mp.get_context()
+        self._stop_event = context.Event()
+        status = context.Queue()
+        for index, (spec, shared) in enumerate(zip(self.specs, self.buffers)):
+            process = context.Process(target=_run_board, daemon=True, name=f"board-{spec.name}",
+                                      args=(index, spec, shared.attach_args(), self.win_size) + self.rates
+                                      + (status, self._stop_event))
+            process.start()
+            self.processes.append(process)
+        deadline = time.monotonic() + timeout
+        while len(self.status) < len(self.specs) and time.monotonic() < deadline:
+            try:
+                index, ok, message = status.get(timeout=0.1)
+            except Exception:
+                if not any(p.is_alive() for p in self.processes):
+                    break
+                continue
+            self.status[index] = (ok, message)
+        return self.status
+
+    def latest(self, index, copy=True):
+        """Dernier résultat de la carte 'index' depuis l'appel précédent, ou None."""
+        shared = self.buffers[index]
+        if shared.seq == self._last_seq[index]:
+            return None
+        frame = shared.frame(self.layouts[index]['fs'], self.bands, copy)
+        if frame is not None:
+            self._last_seq[index] = frame.seq
+        return frame
+
+    def frames(self, copy=True):
+        """Liste du dernier résultat de chaque carte (None si inchangé)."""
+        return [self.latest(index, copy) for index in range(len(self.specs))]
+
+    def alive(self):
+        return [process.is_alive() for process in self.processes]
+
+    def stop(self, timeout=5.0):
+        """Arrête les processus et libère la mémoire partagée."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        for shared in self.buffers:
+            shared.close(unlink=True)
+        self.buffers = []
+
+def main(argv=None):
+    """Acquisition simultanée de plusieurs cartes, affichage de la puissance par bande de chacune."""
+    parser = argparse.ArgumentParser(description="Acquisition et traitement EEG multi-cartes (un processus par carte).")
+    parser.add_argument('boards', nargs='+', metavar='SOURCE[:PORT]',
+                        help="ex: cyton:COM3 daisy:/dev/ttyUSB0 synthetic replay:results/Test1_raw")
+    parser.add_argument('--win-size', type=float, default=10, help="Fenêtre d'analyse (s)")
+    parser.add_argument('--hop', type=float, default=0.1, help="Intervalle entre deux résultats (s)")
+    parser.add_argument('--duration', type=float, default=None, help="Durée d'acquisition (s), illimitée par défaut")
+    args = parser.parse_args(argv)
+
+    pipelines = MultiBoardPipeline(args.boards, args.win_size, publish_interval=args.hop, spectrum_hop=args.hop)
+    try:
+        for index, (ok, message) in sorted(pipelines.start().items()):
+            print(f"[{pipelines.specs[index].name}] {message}")
+        start = time.monotonic()
+        while any(pipelines.alive()) and (args.duration is None or time.monotonic() - start < args.duration):
+            for spec, frame in zip(pipelines.specs, pipelines.frames()):
+                if frame is not None and frame.band_power is not None:
+                    values = ' '.join(f"{name}={val:.3g}" for name, val in
+                                      zip(frame.bands, frame.band_power.mean(axis=0)))
+                    print(f"[{spec.name}] {frame.total_samples / frame.fs:9.2f}s {values}")
+            time.sleep(args.hop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipelines.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,450 @@
+import threading
+import queue
+import time
+import numpy as np
+from function import (EEGRingBuffer, StreamingEEGFilter, WelchEngine, get_filter_design,
+                      compute_power_bands, DEFAULT_BANDS)
+from profiling import StageTimer
+from quality import SignalQuality
+from epochs import EpochCollector, find_markers
+
+class ProcessedFrame:
+    """
+    Résultat d'un passage du traitement : copie de la fenêtre (brute et filtrée),
+    spectre de Welch, puissance par bande (canaux x bandes) et qualité de chaque
+    canal EEG (dictionnaire de SignalQuality.metrics(), indexé par canal et non par ligne).
+    """
+    def __init__(self, fs, total_samples, raw, filtered=None, freqs=None, psds=None,
+                 band_power=None, bands=None, channels=None, quality=None, capacity=None):
+        self.timestamp = time.time()
+        self.fs = fs
+        self.channels = channels  # indices (Ch1 = 0) des canaux présents, dans l'ordre des lignes
+        self.total_samples = total_samples
+        self.capacity = capacity  # taille de la fenêtre (échantillons) du buffer d'origine
+        self.raw = raw
+        self.filtered = filtered
+        self.freqs = freqs
+        self.psds = psds
+        self.band_power = band_power
+        self.bands = bands
+        self.quality = quality
+
+    @property
+    def data(self):
+        """Fenêtre à afficher : filtrée si disponible, brute sinon."""
+        return self.filtered if self.filtered is not None else self.raw
+
+class ChannelRouter:
+    """
+    Correspondance entre la sélection de canaux (cases Ch1..ChN, indices à partir de 0)
+    et les lignes EEG de la carte, recalculée uniquement lorsque la sélection change.
+    """
+    def __init__(self, eeg_channels, selected=None):
+        self.eeg_channels = list(eeg_channels)
+        self.indices = None
+        self.select(range(len(self.eeg_channels)) if selected is None else selected)
+
+    def select(self, indices):
+        """Applique une nouvelle sélection ; renvoie les canaux nouvellement activés."""
+        indices = sorted(set(i for i in indices if 0 <= i < len(self.eeg_channels)))
+        if indices == self.indices:
+            return []
+        added = [i for i in indices if i not in (self.indices or [])]
+        self.indices = indices
+        self.board_rows = [self.eeg_channels[i] for i in indices]
+        self.all_selected = len(indices) == len(self.eeg_channels)
+        return added
+
+class EEGProcessor:
+    """
+    Traitement EEG sans interface graphique : buffer circulaire, filtrage
+    causal en continu, Welch incrémental et puissance par bande.
+    Le buffer brut contient tous les canaux ; seuls les canaux sélectionnés
+    sont filtrés et analysés. Si 'marker_row' est donné, les époques autour des
+    marqueurs sont découpées dans le buffer brut (tous les canaux, voir EpochCollector).
+    """
+    def __init__(self, fs, eeg_channels, win_size, filtering=True, spectrum=True, bands=None, timer=None,
+                 channels=None, notch_freq=60, harmonics=1, marker_row=None, epoch_window=(-0.2, 0.8)):
+        self.fs = fs
+        # Notch secteur (50 ou 60 Hz) et nombre d'harmoniques ; filtre conçu dès maintenant (cache)
+        self.notch_freq = notch_freq
+        self.harmonics = harmonics
+        get_filter_design(fs, notch_freq=notch_freq, harmonics=harmonics)
+        self.timer = timer or StageTimer(enabled=False)
+        self.eeg_channels = list(eeg_channels)
+        self.router = ChannelRouter(self.eeg_channels, channels)
+        self._pending_selection = None
+        self.filtering = filtering
+        self.spectrum = spectrum
+        self.bands = dict(DEFAULT_BANDS if bands is None else bands)
+        self.eeg_filter = None
+        self.welch_engine = None
+        self.buffer_filt = None
+        self.freqs = self.psds = self.band_power = None
+        self.spectrum_rows = None  # canaux (indices) du dernier spectre calculé
+        self.buffer = EEGRingBuffer.from_window(len(self.eeg_channels), win_size, fs)
+        self._pending_window = None
+        # Qualité du signal et échantillons marqués (exclus de la moyenne de Welch)
+        self.quality = SignalQuality(len(self.eeg_channels), fs, line_freq=notch_freq or 60)
+        self.artifact_mask = EEGRingBuffer(len(self.eeg_channels), self.buffer.capacity, dtype=bool)
+        # Époques autour des marqueurs (ligne marqueur de la carte), si elle existe
+        self.marker_row = marker_row
+        self.epochs = (EpochCollector(len(self.eeg_channels), fs, *epoch_window, bands=self.bands)
+                       if marker_row is not None else None)
+
+    def request_window(self, win_size):
+        """
+        Demande un changement de fenêtre ; appliqué au prochain bloc par le thread de traitement.
+        """
+        self._pending_window = win_size
+
+    def request_selection(self, indices):
+        """
+        Demande une nouvelle sélection de canaux ; appliquée au prochain bloc par le thread de traitement.
+        """
+        indices = list(indices)
+        if indices != self.router.indices:
+            self._pending_selection = indices
+
+    def set_selection(self, indices):
+        """
+        Change les canaux traités. Un canal masqué n'est plus filtré (son état de filtre
+        est périmé) : à sa réactivation, l'état est réinitialisé et toute la fenêtre brute
+        est refiltrée pour ce canal (coût ponctuel dans le thread de traitement), puis
+        l'affichage reprend immédiatement.
+        """
+        added = self.router.select(indices)
+        if added and self.eeg_filter is not None:
+            self._refilter(added)
+
+    def _refilter(self, channels):
+        """Refiltre toute la fenêtre brute disponible pour les canaux donnés."""
+        self.eeg_filter.reset(channels)
+        filtered = self.eeg_filter.process(self.buffer.latest()[channels], channels)
+        self.buffer_filt.write_latest(filtered, channels)
+
+    def set_window(self, win_size):
+        """
+        Redimensionne la fenêtre temporelle en conservant l'historique disponible.
+        """
+        capacity = int(float(win_size) * self.fs)
+        if capacity <= 0 or capacity == self.buffer.capacity:
+            return
+        # Le compteur absolu est conservé (marqueurs en attente, lecture de l'historique)
+        new_buffer = self.buffer.resized(capacity)
+        self.buffer = new_buffer
+        # Le masque repart vide : l'historique conservé n'est pas réévalué
+        self.artifact_mask = EEGRingBuffer(len(self.eeg_channels), capacity, dtype=bool)
+        self.artifact_mask.append(np.zeros((len(self.eeg_channels), new_buffer.size), dtype=bool))
+        self.eeg_filter = None
+        self.welch_engine = None
+
+    def process(self, data_chunk):
+        """
+        Intègre un bloc issu de board.get_board_data() (toutes les lignes de la carte).
+        """
+        if self._pending_window is not None:
+            win_size, self._pending_window = self._pending_window, None
+            self.set_window(win_size)
+        if self._pending_selection is not None:
+            indices, self._pending_selection = self._pending_selection, None
+            self.set_selection(indices)
+        eeg_chunk = data_chunk[self.eeg_channels, :]
+        if self.epochs is not None:
+            self.epochs.add_events(*find_markers(data_chunk[self.marker_row], self.buffer.total_samples))
+        with self.timer.stage('append'):
+            self.buffer.append(eeg_chunk)
+        try:
+            self._update_derived(eeg_chunk)
+        except Exception:
+            # Bloc déjà dans le buffer brut : les états dérivés ne le suivent plus
+            self._reset_derived()
+            raise
+
+    def _update_derived(self, eeg_chunk):
+        """Filtrage, qualité et époques du bloc qui vient d'être ajouté au buffer brut."""
+        if self.filtering:
+            with self.timer.stage('filter'):
+                if self.eeg_filter is None:
+                    # Première activation : amorcer le filtre sur toute la fenêtre disponible
+                    self.eeg_filter = StreamingEEGFilter(len(self.eeg_channels), self.fs,
+                                                         notch_freq=self.notch_freq, harmonics=self.harmonics)
+                    self.buffer_filt = EEGRingBuffer(len(self.eeg_channels), self.buffer.capacity)
+                    self.buffer_filt.append(np.zeros((len(self.eeg_channels), self.buffer.size)))
+                    if self.router.indices:
+                        self._refilter(self.router.indices)
+                elif self.router.all_selected:
+                    self.buffer_filt.append(self.eeg_filter.process(eeg_chunk))
+                else:
+                    # Canaux masqués : non filtrés (zéros), refiltrés depuis le brut à leur réactivation
+                    filtered = np.zeros_like(eeg_chunk, dtype=np.float64)
+                    selected = self.router.indices
+                    if selected:
+                        filtered[selected] = self.eeg_filter.process(eeg_chunk[selected], selected)
+                    self.buffer_filt.append(filtered)
+        else:
+            self.eeg_filter = None
+            self.buffer_filt = None
+        with self.timer.stage('quality'):
+            n = eeg_chunk.shape[1]
+            filtered = self.buffer_filt.latest(n) if self.buffer_filt is not None else None
+            if filtered is not None and filtered.shape[1] != n:
+                filtered = None  # bloc plus long que la fenêtre : seuls les critères bruts s'appliquent
+            self.artifact_mask.append(self.quality.update(eeg_chunk, filtered))
+        if self.epochs is not None and self.epochs.pending:
+            with self.timer.stage('epochs'):
+                self.epochs.update(self.buffer)
+
+    def _reset_derived(self):
+        """
+        Abandonne le filtre, le buffer filtré, le masque d'artefacts et le Welch incrémental
+        (décalés par rapport au buffer brut après une erreur) : ils sont reconstruits depuis
+        le buffer brut au bloc suivant, comme à la première activation du filtrage.
+        """
+        self.eeg_filter = None
+        self.buffer_filt = None
+        self.welch_engine = None
+        self.freqs = self.psds = self.band_power = self.spectrum_rows = None
+        self.artifact_mask = EEGRingBuffer(len(self.eeg_channels), self.buffer.capacity, dtype=bool)
+        self.artifact_mask.append(np.zeros((len(self.eeg_channels), self.buffer.size), dtype=bool))
+
+    def update_spectrum(self):
+        """
+        Met à jour le spectre de Welch et la puissance par bande (au rythme du pas spectral).
+        """
+        source = self.buffer_filt if self.buffer_filt is not None else self.buffer
+        rows = self.router.indices
+        if not self.spectrum or not source.size or not rows:
+            self.freqs = self.psds = self.band_power = self.spectrum_rows = None
+            return
+        if self.welch_engine is None or self.welch_engine.capacity != source.capacity \
+                or self.welch_engine.n_channels != len(rows):
+            self.welch_engine = WelchEngine(len(rows), self.fs, source.capacity)
+        with self.timer.stage('spectrum'):
+            self.freqs, self.psds = self.welch_engine.update(source, None if self.router.all_selected else rows,
+                                                             self.artifact_mask)
+        with self.timer.stage('band_power'):
+            self.band_power = compute_power_bands(self.freqs, self.psds, self.bands, per_channel=True)
+        self.spectrum_rows = list(rows)
+
+    def snapshot(self):
+        """
+        Construit un ProcessedFrame à partir de l'état courant (les fenêtres sont copiées,
+        le spectre est celui de la dernière mise à jour).
+        """
+        rows = self.router.indices
+        filtered = self.buffer_filt.latest()[rows] if self.buffer_filt is not None else None
+        # Spectre publié seulement s'il a été calculé pour ces canaux (pas pour la sélection précédente)
+        spectrum = self.spectrum and self.psds is not None and self.spectrum_rows == list(rows)
+        return ProcessedFrame(self.fs, self.buffer.total_samples, self.buffer.latest()[rows],
+                              filtered, self.freqs if spectrum else None, self.psds if spectrum else None,
+                              self.band_power if spectrum else None, list(self.bands), list(rows),
+                              self.quality.metrics(), self.buffer.capacity)
+
+class RateScheduler:
+    """
+    Cadence à échéances fixes : due() devient vrai une fois par période.
+    Une échéance manquée n'est pas rattrapée : les occurrences en retard sont
+    sautées et comptées, pour que la charge se dégrade au lieu de s'accumuler.
+    'tolerance' (fraction de période) accepte un appel légèrement en avance sur
+    l'échéance, pour une cadence pilotée par un timer de même période (QTimer).
+    """
+    def __init__(self, period, tolerance=0.0):
+        self.period = period
+        self.tolerance = tolerance
+        self.next_due = None
+        self.runs = 0      # occurrences exécutées
+        self.late = 0      # occurrences exécutées après leur échéance
+        self.skipped = 0   # occurrences sautées faute de temps
+        self.shed = 0      # occurrences volontairement abandonnées (surcharge)
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.next_due is None:
+            self.next_due = now
+        if now < self.next_due - self.tolerance * self.period:
+            return False
+        missed = max(0, int((now - self.next_due) // self.period)) if self.period > 0 else 0
+        if missed:
+            self.late += 1
+            self.skipped += missed
+        self.next_due += (missed + 1) * self.period
+        self.runs += 1
+        return True
+
+    def time_until_due(self, now=None):
+        now = time.monotonic() if now is None else now
+        return 0.0 if self.next_due is None else max(0.0, self.next_due - now)
+
+class LatestSlot:
+    """
+    Boîte aux lettres à un seul élément : le dernier résultat publié écrase le précédent.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._item = None
+        self.dropped = 0  # résultats écrasés avant d'avoir été lus
+
+    def put(self, item):
+        with self._lock:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+
+    def take(self):
+        """Renvoie le dernier résultat (ou None) et vide la boîte."""
+        with self._lock:
+            item, self._item = self._item, None
+        return item
+
+class AcquisitionThread(threading.Thread):
+    """
+    Interroge périodiquement la carte BrainFlow et transmet chaque bloc au traitement.
+    """
+    def __init__(self, board, chunks, poll_interval=0.02, timer=None):
+        super(AcquisitionThread, self).__init__(daemon=True)
+        self.board = board
+        self.timer = timer or StageTimer(enabled=False)
+        self.chunks = chunks
+        # Période fixe et courte : le buffer interne de BrainFlow (45000 points) ne déborde jamais
+        self.schedule = RateScheduler(poll_interval)
+        self.chunk_sinks = []  # appelés avec chaque bloc brut (ex. enregistreur), mesurés sous sink.stage
+        self._stop_event = threading.Event()
+        self.error = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                with self.timer.stage('fetch'):
+                    data_chunk = self.board.get_board_data()
+            except Exception as e:
+                print("Erreur d'acquisition :", e)
+                self.error = e
+                break
+            if data_chunk.size:
+                for sink in list(self.chunk_sinks):
+                    # Chaque puits a sa propre étape ('record' par défaut, 'history' pour l'historique)
+                    with self.timer.stage(getattr(sink, 'stage', 'record')):
+                        sink(data_chunk)
+                self.chunks.put(data_chunk)
+            self.schedule.due()
+            self._stop_event.wait(self.schedule.time_until_due())
+
+    def stop(self):
+        self._stop_event.set()
+
+class DSPWorker(threading.Thread):
+    """
+    Consomme les blocs acquis, les traite et publie le dernier résultat.
+    """
+    def __init__(self, processor, chunks, results, publish_interval=0.05, spectrum_hop=0.1, max_backlog=5):
+        super(DSPWorker, self).__init__(daemon=True)
+        self.processor = processor
+        self.chunks = chunks
+        self.results = results
+        # Chaque étape a sa propre cadence : filtrage à chaque bloc, spectre au pas
+        # 'spectrum_hop', publication au rythme de l'affichage
+        self.spectrum_schedule = RateScheduler(spectrum_hop)
+        self.publish_schedule = RateScheduler(publish_interval)
+        self.max_backlog = max_backlog  # blocs en attente au-delà desquels le spectre est abandonné
+        self.frame_callbacks = []  # appelés dans ce thread pour chaque résultat publié
+        self._stop_event = threading.Event()
+        self.error = None
+        self.errors = 0  # blocs abandonnés sur erreur
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                data_chunk = self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # Vider la file : tous les blocs en attente sont traités en une fois
+            pending = [data_chunk]
+            while True:
+                try:
+                    pending.append(self.chunks.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.processor.timer.profiled():
+                    self._process(pending)
+            except Exception as e:
+                # Une erreur ne doit pas arrêter le thread : le bloc est abandonné et l'erreur signalée
+                print("Erreur de traitement :", e)
+                self.error = e
+                self.errors += 1
+
+    def _process(self, pending):
+        # Le filtrage n'est jamais sauté : il suit toujours l'acquisition
+        self.processor.process(pending[0] if len(pending) == 1 else np.concatenate(pending, axis=1))
+        now = time.monotonic()
+        if self.spectrum_schedule.due(now):
+            if self.chunks.qsize() > self.max_backlog:
+                # Surcharge : privilégier la capture, le spectre attendra le prochain pas
+                self.spectrum_schedule.shed += 1
+            else:
+                self.processor.update_spectrum()
+        if self.publish_schedule.due(now):
+            frame = self.processor.snapshot()
+            self.results.put(frame)
+            for callback in list(self.frame_callbacks):
+                try:
+                    callback(frame)
+                except Exception as e:
+                    print("Erreur d'un abonné aux résultats :", e)
+                    self.error = e
+
+    def stop(self):
+        self._stop_event.set()
+
+class EEGPipeline:
+    """
+    Pipeline producteur/consommateur : acquisition et DSP dans des threads
+    dédiés, résultats récupérés par le consommateur (GUI) via latest().
+    """
+    def __init__(self, board, fs, eeg_channels, win_size, poll_interval=0.02, publish_interval=0.05,
+                 spectrum_hop=0.1, notch_freq=60, harmonics=1, marker_row=None, epoch_window=(-0.2, 0.8)):
+        self.board = board
+        self.timer = StageTimer()  # durée de chaque étape, partagée par les threads
+        self.processor = EEGProcessor(fs, eeg_channels, win_size, timer=self.timer,
+                                      notch_freq=notch_freq, harmonics=harmonics,
+                                      marker_row=marker_row, epoch_window=epoch_window)
+        self.chunks = queue.Queue()
+        self.results = LatestSlot()
+        self.acquisition = AcquisitionThread(board, self.chunks, poll_interval, self.timer)
+        self.worker = DSPWorker(self.processor, self.chunks, self.results, publish_interval, spectrum_hop)
+
+    def start(self):
+        self.acquisition.start()
+        self.worker.start()
+
+    def stop(self, timeout=1.0):
+        """Arrête les threads (à appeler avant board.stop_stream())."""
+        self.acquisition.stop()
+        self.worker.stop()
+        for thread in (self.acquisition, self.worker):
+            if thread.is_alive():
+                thread.join(timeout)
+
+    def latest(self):
+        """Dernier résultat publié depuis l'appel précédent, ou None."""
+        return self.results.take()
+
+    def set_rates(self, publish_interval=None, spectrum_hop=None):
+        """Modifie la cadence d'affichage et/ou le pas spectral en cours de route."""
+        if publish_interval:
+            self.worker.publish_schedule.period = publish_interval
+        if spectrum_hop:
+            self.worker.spectrum_schedule.period = spectrum_hop
+
+    def scheduler_stats(self):
+        """Compteurs de retards et d'abandons de chaque étape cadencée."""
+        stats = {}
+        for name, schedule in (('acquisition', self.acquisition.schedule),
+                               ('spectrum', self.worker.spectrum_schedule),
+                               ('publish', self.worker.publish_schedule)):
+            stats[name] = {'runs': schedule.runs, 'late': schedule.late,
+                           'skipped': schedule.skipped, 'shed': schedule.shed}
+        stats['publish']['dropped'] = self.results.dropped
+        stats['backlog'] = self.chunks.qsize()
+        return stats
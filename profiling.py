@@ -0,0 +1,154 @@
+import collections
+import cProfile
+import json
+import pstats
+import threading
+import time
+import numpy as np
+
+# Étapes instrumentées, dans l'ordre d'affichage
+STAGES = ('fetch', 'append', 'filter', 'quality', 'epochs', 'spectrum', 'band_power', 'draw_2d', 'draw_3d', 'record', 'history')
+
+class _StageContext:
+    """Mesure la durée d'un bloc 'with' et l'enregistre dans le StageTimer."""
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+class _NullContext:
+    """Contexte sans effet utilisé lorsque l'instrumentation est désactivée."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_CONTEXT = _NullContext()
+
+class _ProfileContext:
+    """Active un cProfile.Profile le temps d'un bloc 'with'."""
+    __slots__ = ('profile', 'active')
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __enter__(self):
+        try:
+            self.profile.enable()
+            self.active = True
+        except ValueError:
+            # Python >= 3.12 : un seul profileur actif à la fois (sys.monitoring)
+            self.active = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.active:
+            self.profile.disable()
+        return False
+
+class StageTimer:
+    """
+    Compteurs de durée par étape (fenêtre glissante des 'history' dernières mesures),
+    journal d'événements exportable au format trace (chrome://tracing, Perfetto)
+    et profilage cProfile activable à la volée dans chaque thread instrumenté.
+    """
+    def __init__(self, history=256, max_events=50000, enabled=True):
+        self.history = history
+        self.enabled = enabled
+        self._durations = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._events = collections.deque(maxlen=max_events)
+        self._origin = time.perf_counter()
+        self.profiling = False
+        self._profiles = {}
+
+    def stage(self, name):
+        """Contexte mesurant l'étape 'name' : with timer.stage('filter'): ..."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageContext(self, name)
+
+    def record(self, name, start, duration):
+        # Appelé par les threads d'acquisition, de traitement et d'interface : verrou
+        # pour que le compteur et l'emplacement écrit restent cohérents
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = np.zeros(self.history)
+                self._counts[name] = 0
+            count = self._counts[name]
+            durations[count % self.history] = duration
+            self._counts[name] = count + 1
+        self._events.append((name, threading.get_ident(), start, duration))
+
+    def stats(self, name):
+        """Renvoie (p50 ms, p99 ms, nombre de mesures) pour une étape."""
+        with self._lock:
+            count = self._counts.get(name, 0)
+            if not count:
+                return 0.0, 0.0, 0
+            values = self._durations[name][:min(count, self.history)].copy()
+        p50, p99 = np.percentile(values, [50, 99])
+        return p50 * 1e3, p99 * 1e3, count
+
+    def summary(self):
+        """Dictionnaire étape -> (p50 ms, p99 ms, nombre) pour les étapes mesurées."""
+        with self._lock:
+            measured = list(self._counts)
+        names = [s for s in STAGES if s in measured] + [s for s in measured if s not in STAGES]
+        return {name: self.stats(name) for name in names}
+
+    def format_summary(self):
+        """Texte court pour l'affichage en surimpression."""
+        lines = [f"{name:<10s} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+                 for name, (p50, p99, _) in self.summary().items()]
+        return '\n'.join(lines)
+
+    def export_trace(self, path):
+        """Écrit les événements mesurés au format Trace Event (JSON)."""
+        events = [{'name': name, 'ph': 'X', 'pid': 0, 'tid': tid,
+                   'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6}
+                  for name, tid, start, duration in list(self._events)]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def profiled(self):
+        """Contexte activant cProfile dans le thread courant si le profilage est demandé."""
+        if not self.profiling:
+            return _NULL_CONTEXT
+        ident = threading.get_ident()
+        profile = self._profiles.get(ident)
+        if profile is None:
+            profile = self._profiles[ident] = cProfile.Profile()
+        return _ProfileContext(profile)
+
+    def start_profiling(self):
+        self._profiles = {}
+        self.profiling = True
+
+    def stop_profiling(self, path):
+        """Arrête le profilage et fusionne les profils de tous les threads dans 'path' (.prof)."""
+        self.profiling = False
+        profiles = list(self._profiles.values())
+        self._profiles = {}
+        stats = None
+        for profile in profiles:
+            try:
+                stats = pstats.Stats(profile) if stats is None else stats.add(profile)
+            except TypeError:
+                continue  # profil vide (jamais activé)
+        if stats is None:
+            return None
+        stats.dump_stats(path)
+        return stats
@@ -0,0 +1,131 @@
+import numpy as np
+
+# États de qualité par canal
+QUALITY_GOOD, QUALITY_ARTIFACT, QUALITY_BAD = 0, 1, 2
+QUALITY_NAMES = ('ok', 'artefacts', 'mauvais')
+
+class SignalQuality:
+    """
+    Qualité du signal par canal, mise à jour bloc par bloc avant l'étape spectrale.
+    Les statistiques sont accumulées par paquets de 'block' secondes (sommes, sommes des
+    carrés, échantillons saturés ou hors seuil, projection sur la fréquence du secteur)
+    dans un anneau couvrant 'window' secondes : chaque bloc reçu ne coûte que ses propres
+    échantillons, tous les canaux étant traités en une fois.
+    - RMS (signal filtré si disponible), écart-type brut ;
+    - saturation (|x| proche de la pleine échelle de l'ADC) et signal plat (électrode déconnectée) ;
+    - rapport secteur : puissance à 'line_freq' / variance totale du signal brut ;
+    - artefacts d'amplitude : |signal filtré| > 'artifact_uV'.
+    update() renvoie aussi le masque des échantillons marqués, utilisé pour exclure
+    les segments correspondants de la moyenne de Welch.
+    """
+    def __init__(self, n_channels, fs, window=2.0, block=0.1, artifact_uV=150.0, rail_uV=187000.0,
+                 flat_uV=0.5, line_freq=60, rail_fraction=0.05, line_ratio=0.5):
+        self.n_channels = n_channels
+        self.fs = fs
+        self.block = max(1, int(block * fs))
+        self.n_blocks = max(1, int(round(window * fs / self.block)))
+        self.artifact_uV = artifact_uV
+        self.rail_uV = rail_uV
+        self.flat_uV = flat_uV
+        self.rail_fraction = rail_fraction
+        self.line_ratio = line_ratio
+        self._omega = 2 * np.pi * line_freq / fs
+        shape = (self.n_blocks, n_channels)
+        self._count = np.zeros(self.n_blocks)
+        self._sum = np.zeros(shape)
+        self._sumsq = np.zeros(shape)
+        self._sumsq_filt = np.zeros(shape)
+        self._rail = np.zeros(shape)
+        self._artifact = np.zeros(shape)
+        self._mains = np.zeros(shape, dtype=complex)
+        self._phasor = np.zeros(self.n_blocks, dtype=complex)  # somme des exp(-j w n), pour retirer la moyenne
+        self._filtered = np.zeros(self.n_blocks, dtype=bool)
+        self._block_id = np.full(self.n_blocks, -1)
+        self.total_samples = 0
+
+    def update(self, raw, filtered=None):
+        """
+        Intègre un bloc (canaux x échantillons) de signal brut et, si disponible, filtré.
+        Renvoie le masque des échantillons marqués (saturés ou hors seuil), canaux x échantillons.
+        """
+        n = raw.shape[1]
+        mask = np.abs(raw) >= self.rail_uV
+        if filtered is not None:
+            artifacts = np.abs(filtered) > self.artifact_uV
+            mask |= artifacts
+        if n == 0:
+            return mask
+        first = self.total_samples
+        self.total_samples += n
+        # Seuls les derniers blocs de l'anneau comptent : ignorer le début d'un très grand bloc
+        keep = min(n, (self.n_blocks - 1) * self.block + (self.total_samples - 1) % self.block + 1)
+        skip = n - keep
+        index = np.arange(first + skip, self.total_samples)
+        block_ids = index // self.block
+        starts = np.flatnonzero(np.r_[True, block_ids[1:] != block_ids[:-1]])
+        reduce = lambda a: np.add.reduceat(a, starts, axis=-1)
+        raw = raw[:, skip:]
+        phase = np.exp(-1j * self._omega * index)
+        partial = [reduce(raw), reduce(raw * raw), reduce(mask[:, skip:]), reduce(raw * phase)]
+        phasor = reduce(phase)
+        counts = np.diff(np.r_[starts, keep])
+        if filtered is not None:
+            filt_sq, art = reduce(filtered[:, skip:] ** 2), reduce(artifacts[:, skip:])
+        for k, block_id in enumerate(block_ids[starts]):
+            slot = block_id % self.n_blocks
+            if self._block_id[slot] != block_id:
+                # Nouveau bloc : il remplace le plus ancien de l'anneau
+                self._block_id[slot] = block_id
+                self._count[slot] = 0
+                for stats in (self._sum, self._sumsq, self._sumsq_filt, self._rail, self._artifact, self._mains):
+                    stats[slot] = 0
+                self._phasor[slot] = 0
+                self._filtered[slot] = filtered is not None
+            self._count[slot] += counts[k]
+            self._sum[slot] += partial[0][:, k]
+            self._sumsq[slot] += partial[1][:, k]
+            self._rail[slot] += partial[2][:, k]
+            self._mains[slot] += partial[3][:, k]
+            self._phasor[slot] += phasor[k]
+            if filtered is not None:
+                self._sumsq_filt[slot] += filt_sq[:, k]
+                self._artifact[slot] += art[:, k]
+            else:
+                self._filtered[slot] = False
+        return mask
+
+    def metrics(self):
+        """
+        Métriques de la fenêtre par canal : dictionnaire de tableaux (un élément par canal)
+        'rms', 'std', 'rail', 'artifact' (fractions d'échantillons), 'line_ratio', 'flat',
+        'railed' et 'status' (QUALITY_GOOD, QUALITY_ARTIFACT ou QUALITY_BAD).
+        """
+        valid = self._block_id >= 0
+        n = self._count[valid].sum()
+        if n == 0:
+            zeros = np.zeros(self.n_channels)
+            return {'rms': zeros, 'std': zeros, 'rail': zeros, 'artifact': zeros, 'line_ratio': zeros,
+                    'flat': zeros.astype(bool), 'railed': zeros.astype(bool),
+                    'status': np.full(self.n_channels, QUALITY_GOOD)}
+        mean = self._sum[valid].sum(axis=0) / n
+        variance = np.maximum(self._sumsq[valid].sum(axis=0) / n - mean ** 2, 0)
+        std = np.sqrt(variance)
+        # Projection sur le secteur après retrait de la moyenne ; puissance d'une sinusoïde = 2|X|²/N²
+        mains = self._mains[valid].sum(axis=0) - mean * self._phasor[valid].sum()
+        line_power = 2 * np.abs(mains) ** 2 / n ** 2
+        line_ratio = np.divide(line_power, variance, out=np.zeros_like(variance), where=variance > 0)
+        filtered = valid & self._filtered
+        n_filt = self._count[filtered].sum()
+        rms = np.sqrt(self._sumsq_filt[filtered].sum(axis=0) / n_filt) if n_filt else std
+        rail = self._rail[valid].sum(axis=0) / n
+        artifact = self._artifact[filtered].sum(axis=0) / n_filt if n_filt else np.zeros(self.n_channels)
+        flat = std < self.flat_uV
+        railed = rail > self.rail_fraction
+        status = np.where(flat | railed, QUALITY_BAD,
+                          np.where((artifact > 0) | (line_ratio > self.line_ratio), QUALITY_ARTIFACT, QUALITY_GOOD))
+        return {'rms': rms, 'std': std, 'rail': rail, 'artifact': artifact, 'line_ratio': np.minimum(line_ratio, 1),
+                'flat': flat, 'railed': railed, 'status': status}
+
+    def reset(self):
+        self._block_id[:] = -1
+        self.total_samples = 0
@@ -0,0 +1,252 @@
+import threading
+import queue
+import json
+import csv
+import os
+from datetime import datetime
+import numpy as np
+
+class RawRecorder:
+    """
+    Enregistreur binaire des données brutes de la carte.
+    Chaque bloc acquis (lignes x échantillons) est écrit par un thread dédié
+    dans un fichier float32 échantillon par échantillon (<nom>.f32), décrit par
+    un petit fichier JSON (<nom>.json). La file est bornée : si l'écriture
+    prend du retard, l'acquisition attend au lieu de perdre des données.
+    Les horodatages BrainFlow (~1.7e9 s) ne tiennent pas en float32 (résolution
+    de ~128 s) : la ligne 'timestamp_row' est aussi écrite en float64 dans
+    <nom>_ts.f64 (voir load_timestamps).
+    """
+    def __init__(self, basename, n_rows, fs, metadata=None, max_queue=1024, timestamp_row=None):
+        self.data_path = basename + '.f32'
+        self.meta_path = basename + '.json'
+        self.timestamp_path = basename + '_ts.f64'
+        self.timestamp_row = timestamp_row
+        self.n_rows = int(n_rows)
+        self.fs = fs
+        self.metadata = dict(metadata or {})
+        self.samples_written = 0
+        self.blocked_puts = 0  # nombre de fois où la file était pleine
+        self.dropped_chunks = 0  # blocs reçus après close() (non écrits)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._file = None
+        self._timestamp_file = None
+        self.started_at = None
+        self.error = None
+
+    def start(self):
+        self._file = open(self.data_path, 'wb')
+        if self.timestamp_row is not None:
+            self._timestamp_file = open(self.timestamp_path, 'wb')
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._write_metadata()
+        self._thread.start()
+
+    def write(self, data_chunk):
+        """
+        Ajoute un bloc (lignes x échantillons) à la file d'écriture.
+        """
+        if data_chunk.shape[1] == 0:
+            return
+        # Sous verrou : un bloc ne peut pas passer derrière la sentinelle de close(),
+        # où plus personne ne le lirait (ni bloquer l'acquisition sur une file pleine)
+        with self._close_lock:
+            if self._closed:
+                self.dropped_chunks += 1
+                return
+            try:
+                self._queue.put_nowait(data_chunk)
+            except queue.Full:
+                self.blocked_puts += 1
+                self._queue.put(data_chunk)
+
+    __call__ = write
+
+    def _run(self):
+        while True:
+            data_chunk = self._queue.get()
+            if data_chunk is None:
+                break
+            try:
+                # Disposition échantillon par échantillon : un bloc = une écriture contiguë
+                self._file.write(np.ascontiguousarray(data_chunk.T, dtype='<f4'))
+                if self._timestamp_file is not None:
+                    self._timestamp_file.write(np.ascontiguousarray(data_chunk[self.timestamp_row], dtype='<f8'))
+                self.samples_written += data_chunk.shape[1]
+            except Exception as e:
+                print("Erreur d'écriture des données brutes :", e)
+                self.error = e
+
+    def close(self):
+        """
+        Vide la file, ferme le fichier et met à jour le fichier JSON.
+        """
+        with self._close_lock:
+            if self._file is None or self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+        if self._timestamp_file is not None:
+            self._timestamp_file.close()
+            self._timestamp_file = None
+        self._write_metadata()
+
+    def _write_metadata(self):
+        meta = dict(self.metadata)
+        meta.update({
+            'fs': self.fs,
+            'n_rows': self.n_rows,
+            'dtype': '<f4',
+            'layout': 'samples x rows',
+            'n_samples': self.samples_written,
+            'started_at': self.started_at,
+            'timestamp_channel': self.timestamp_row,
+        })
+        with open(self.meta_path, 'w') as file:
+            json.dump(meta, file, indent=2)
+
+def load_recording(basename):
+    """
+    Ouvre un enregistrement binaire en mémoire projetée (sans tout charger en RAM).
+    Renvoie (données lignes x échantillons, métadonnées).
+    """
+    with open(basename + '.json') as file:
+        meta = json.load(file)
+    n_rows = meta['n_rows']
+    # Le nombre d'échantillons est déduit de la taille du fichier (robuste à un arrêt brutal)
+    n_samples = os.path.getsize(basename + '.f32') // (4 * n_rows)
+    if n_samples == 0:
+        return np.zeros((n_rows, 0), dtype=np.float32), meta
+    data = np.memmap(basename + '.f32', dtype=meta['dtype'], mode='r', shape=(n_samples, n_rows))
+    return data.T, meta
+
+def load_timestamps(basename):
+    """
+    Horodatages float64 de chaque échantillon (mémoire projetée), ou None si
+    l'enregistrement n'en contient pas (ligne d'horodatage non précisée).
+    """
+    path = basename + '_ts.f64'
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return np.memmap(path, dtype='<f8', mode='r')
+
+def export_csv(basename, csv_path, rows=None, block=65536):
+    """
+    Exporte un enregistrement binaire en CSV, bloc par bloc
+    (horodatages en pleine précision s'ils ont été enregistrés).
+    """
+    data, meta = load_recording(basename)
+    rows = list(range(meta['n_rows'])) if rows is None else list(rows)
+    timestamps = load_timestamps(basename)
+    ts_column = rows.index(meta['timestamp_channel']) if timestamps is not None \
+        and meta.get('timestamp_channel') in rows else None
+    formats = ['%d'] + ['%.6f' if i == ts_column else '%.6g' for i in range(len(rows))]
+    with open(csv_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Sample'] + [f"Row{r}" for r in rows])
+        for start in range(0, data.shape[1], block):
+            values = np.asarray(data[rows, start:start + block], dtype=np.float64).T
+            if ts_column is not None:
+                values[:, ts_column] = timestamps[start:start + values.shape[0]]
+            index = np.arange(start, start + values.shape[0])[:, np.newaxis]
+            np.savetxt(file, np.hstack([index, values]), delimiter=',', fmt=formats)
+
+def _edf_field(value, width):
+    """Champ ASCII de largeur fixe pour l'en-tête EDF."""
+    return str(value)[:width].ljust(width).encode('ascii')
+
+def _edf_number(value, width=8):
+    """Nombre formaté pour tenir dans un champ EDF de 8 caractères."""
+    for digits in range(6, 0, -1):
+        text = f"{value:.{digits}g}"
+        if len(text) <= width:
+            return _edf_field(text, width)
+    return _edf_field(f"{int(value)}", width)
+
+def export_edf(basename, edf_path, rows=None, labels=None, block_records=60):
+    """
+    Exporte les lignes demandées (par défaut les canaux EEG) au format EDF
+    (enregistrements d'une seconde, échantillons int16).
+    """
+    data, meta = load_recording(basename)
+    rows = list(meta.get('eeg_channels', range(meta['n_rows']))) if rows is None else list(rows)
+    labels = labels or [f"Ch{i+1}" for i in range(len(rows))]
+    spr = int(round(meta['fs']))  # échantillons par enregistrement (1 s)
+    n_records = -(-data.shape[1] // spr)
+    # Bornes physiques par canal, calculées par blocs
+    phys_min = np.full(len(rows), np.inf)
+    phys_max = np.full(len(rows), -np.inf)
+    for start in range(0, data.shape[1], spr * block_records):
+        values = np.asarray(data[rows, start:start + spr * block_records], dtype=np.float64)
+        phys_min = np.minimum(phys_min, values.min(axis=1))
+        phys_max = np.maximum(phys_max, values.max(axis=1))
+    phys_min = np.where(np.isfinite(phys_min), phys_min, -1.0)
+    phys_max = np.where(phys_max > phys_min, phys_max, phys_min + 1.0)
+    # Utiliser les bornes telles qu'écrites dans l'en-tête (8 caractères)
+    phys_min = np.array([float(_edf_number(v)) for v in phys_min])
+    phys_max = np.array([float(_edf_number(v)) for v in phys_max])
+    dig_min, dig_max = -32768, 32767
+    gain = (dig_max - dig_min) / (phys_max - phys_min)
+    started = datetime.fromisoformat(meta.get('started_at') or datetime.now().isoformat())
+    ns = len(rows)
+    with open(edf_path, 'wb') as file:
+        file.write(_edf_field('0', 8))
+        file.write(_edf_field('X X X X', 80))
+        file.write(_edf_field('Startdate ' + started.strftime('%d-%b-%Y').upper() + ' X X OpenBCI', 80))
+        file.write(_edf_field(started.strftime('%d.%m.%y'), 8))
+        file.write(_edf_field(started.strftime('%H.%M.%S'), 8))
+        file.write(_edf_field(256 * (ns + 1), 8))
+        file.write(_edf_field('', 44))
+        file.write(_edf_field(n_records, 8))
+        file.write(_edf_field(1, 8))
+        file.write(_edf_field(ns, 4))
+        for label in labels:
+            file.write(_edf_field(label, 16))
+        file.write(b''.join(_edf_field('', 80) for _ in rows))
+        file.write(b''.join(_edf_field('uV', 8) for _ in rows))
+        file.write(b''.join(_edf_number(v) for v in phys_min))
+        file.write(b''.join(_edf_number(v) for v in phys_max))
+        file.write(b''.join(_edf_field(dig_min, 8) for _ in rows))
+        file.write(b''.join(_edf_field(dig_max, 8) for _ in rows))
+        file.write(b''.join(_edf_field('', 80) for _ in rows))
+        file.write(b''.join(_edf_field(spr, 8) for _ in rows))
+        file.write(b''.join(_edf_field('', 32) for _ in rows))
+        # Données : blocs d'enregistrements (ns x spr int16 chacun), dernier bloc complété par des zéros
+        for first in range(0, n_records, block_records):
+            count = min(block_records, n_records - first)
+            values = np.zeros((ns, count * spr))
+            chunk = np.asarray(data[rows, first * spr:(first + count) * spr], dtype=np.float64)
+            values[:, :chunk.shape[1]] = chunk
+            digital = np.round((values - phys_min[:, np.newaxis]) * gain[:, np.newaxis] + dig_min)
+            digital = np.clip(digital, dig_min, dig_max).astype('<i2')
+            file.write(digital.reshape(ns, count, spr).transpose(1, 0, 2).tobytes())
+
+class BandPowerLog:
+    """
+    Journal CSV de la puissance par bande : le fichier reste ouvert pendant
+    l'enregistrement et chaque résultat est ajouté sans réouverture.
+    """
+    def __init__(self, filename, bands):
+        self.filename = filename
+        self._file = open(filename, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['Time'] + list(bands))
+        self._lock = threading.Lock()
+
+    def write(self, band_power):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            if self._file is not None:
+                self._writer.writerow([timestamp] + [str(val) for val in band_power])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
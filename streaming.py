@@ -0,0 +1,329 @@
+import argparse
+import collections
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+import numpy as np
+
+# Paquet : en-tête, indices des canaux (uint16), puis messages
+# (type, canaux, valeurs par canal, float32 canal par canal)
+MAGIC = b'EEGF'
+VERSION = 2
+PACKET_HEADER = struct.Struct('<4sHqdHH')  # magic, version, total_samples, timestamp, nombre de messages, canaux
+MESSAGE_HEADER = struct.Struct('<BHI')     # type, canaux, valeurs par canal
+LENGTH = struct.Struct('<I')               # préfixe de longueur des paquets TCP
+MESSAGE_KINDS = {'raw': 1, 'filtered': 2, 'band_power': 3}
+KIND_NAMES = {value: name for name, value in MESSAGE_KINDS.items()}
+SUBSCRIBE = b'SUB'                         # datagramme d'abonnement UDP
+MAX_DATAGRAM = 65507
+
+def _frame_messages(frame, new_samples, kinds):
+    """(type, valeurs) à envoyer : les 'new_samples' derniers échantillons des signaux, la puissance en entier."""
+    messages = []
+    for kind in kinds:
+        if kind == 'band_power':
+            values = frame.band_power
+        else:
+            values = frame.raw if kind == 'raw' else frame.filtered
+            if values is not None:
+                values = values[:, values.shape[1] - min(new_samples, values.shape[1]):]
+        if values is not None:
+            messages.append((kind, values))
+    return messages
+
+def _pack(total_samples, timestamp, channels, messages):
+    channels = np.asarray(channels if channels is not None else [], dtype='<u2')
+    parts = [PACKET_HEADER.pack(MAGIC, VERSION, total_samples, timestamp, len(messages), channels.size),
+             channels.tobytes()]
+    for kind, values in messages:
+        values = np.ascontiguousarray(values, dtype='<f4')
+        parts.append(MESSAGE_HEADER.pack(MESSAGE_KINDS[kind], values.shape[0], values.shape[1]))
+        parts.append(values.tobytes())
+    return b''.join(parts)
+
+def encode_frame(frame, new_samples, kinds=('raw', 'filtered', 'band_power')):
+    """
+    Encode un ProcessedFrame en un seul paquet binaire : seuls les 'new_samples'
+    derniers échantillons des signaux sont envoyés, la puissance par bande en entier.
+    L'en-tête porte les indices des canaux présents (Ch1 = 0), dans l'ordre des lignes.
+    """
+    return _pack(frame.total_samples, frame.timestamp, frame.channels, _frame_messages(frame, new_samples, kinds))
+
+def encode_packets(frame, new_samples, kinds=('raw', 'filtered', 'band_power'), max_size=MAX_DATAGRAM):
+    """
+    Comme encode_frame, mais découpé en paquets d'au plus 'max_size' octets (datagrammes UDP) :
+    chaque paquet porte une tranche consécutive des échantillons et son 'total_samples' est
+    l'indice absolu qui suit son dernier échantillon ; la puissance par bande est dans le dernier.
+    Renvoie une liste vide si même un seul échantillon ne tient pas dans 'max_size'.
+    """
+    messages = _frame_messages(frame, new_samples, kinds)
+    signals = [(kind, values) for kind, values in messages if kind != 'band_power']
+    others = [(kind, values) for kind, values in messages if kind == 'band_power']
+    n_channels = len(frame.channels) if frame.channels is not None else 0
+    fixed = (PACKET_HEADER.size + 2 * n_channels + MESSAGE_HEADER.size * len(messages)
+             + sum(4 * values.size for _, values in others))
+    per_sample = sum(4 * values.shape[0] for _, values in signals)
+    n = signals[0][1].shape[1] if signals else 0
+    if fixed + per_sample * n <= max_size:
+        return [_pack(frame.total_samples, frame.timestamp, frame.channels, messages)]
+    step = (max_size - fixed) // per_sample if per_sample else 0
+    if step < 1:
+        return []
+    packets = []
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        part = [(kind, values[:, start:stop]) for kind, values in signals] + (others if stop == n else [])
+        packets.append(_pack(frame.total_samples - (n - stop), frame.timestamp, frame.channels, part))
+    return packets
+
+def decode_packet(packet):
+    """
+    Décode un paquet : renvoie {'total_samples', 'timestamp', 'channels', 'raw', 'filtered', 'band_power'}
+    (indices des canaux, tableaux canaux x valeurs, absents si non envoyés).
+    """
+    magic, version, total_samples, timestamp, count, n_channels = PACKET_HEADER.unpack_from(packet)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Paquet non reconnu")
+    offset = PACKET_HEADER.size
+    channels = np.frombuffer(packet, '<u2', n_channels, offset).tolist()
+    result = {'total_samples': total_samples, 'timestamp': timestamp, 'channels': channels}
+    offset += 2 * n_channels
+    for _ in range(count):
+        kind, n_rows, n_values = MESSAGE_HEADER.unpack_from(packet, offset)
+        offset += MESSAGE_HEADER.size
+        size = n_rows * n_values
+        result[KIND_NAMES[kind]] = np.frombuffer(packet, '<f4', size, offset).reshape(n_rows, n_values)
+        offset += 4 * size
+    return result
+
+def parse_url(url):
+    """'udp://127.0.0.1:5005' ou 'tcp://0.0.0.0:5006' -> (protocole, hôte, port)."""
+    parts = urlparse(url)
+    if parts.scheme not in ('udp', 'tcp') or not parts.port:
+        raise ValueError(f"Adresse invalide : {url} (attendu udp://hôte:port ou tcp://hôte:port)")
+    return parts.scheme, parts.hostname or '127.0.0.1', parts.port
+
+class FramePublisher:
+    """
+    Diffuse les résultats du pipeline (signal brut, signal filtré, puissance par bande)
+    vers un nombre quelconque d'abonnés, en UDP (abonnement par datagramme 'SUB')
+    ou en TCP (paquets préfixés par leur longueur).
+    publish() est appelé par le thread de traitement et ne bloque jamais : les résultats
+    passent par une file bornée (le plus ancien est abandonné si elle est pleine) et
+    l'envoi se fait dans un thread dédié. Un abonné TCP trop lent perd des paquets
+    entiers au lieu de ralentir les autres.
+    """
+    def __init__(self, url='udp://127.0.0.1:5005', kinds=('raw', 'filtered', 'band_power'),
+                 max_queue=64, max_pending=1 << 20, subscriber_timeout=10.0):
+        self.protocol, self.host, self.port = parse_url(url)
+        self.kinds = tuple(kinds)
+        self.max_pending = max_pending  # octets en attente par abonné TCP
+        self.subscriber_timeout = subscriber_timeout
+        self._frames = collections.deque(maxlen=max_queue)
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._last_total = None
+        self.sent = 0
+        self.dropped = 0            # résultats écrasés dans la file
+        self.dropped_packets = 0    # paquets non envoyés à un abonné (lent ou datagramme trop grand)
+        self.subscribers = {}       # UDP : adresse -> dernier abonnement ; TCP : socket -> tampon
+        if self.protocol == 'udp':
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind((self.host, self.port))
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.sock.bind((self.host, self.port))
+            self.sock.listen()
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def publish(self, frame):
+        """Ajoute un résultat à diffuser (appelé depuis le thread de traitement)."""
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append(frame)
+        self._ready.set()
+
+    __call__ = publish
+
+    def _new_samples(self, frame):
+        # Nouveaux échantillons depuis le paquet précédent. Fenêtre entière au premier envoi,
+        # ou si le compteur recule (nouveau flux) : le compteur diffusé reste croissant par flux
+        if self._last_total is None or frame.total_samples < self._last_total:
+            new_samples = frame.total_samples
+        else:
+            new_samples = frame.total_samples - self._last_total
+        self._last_total = frame.total_samples
+        return new_samples
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._ready.wait(0.01)
+            self._ready.clear()
+            self._poll()
+            while self._frames:
+                frame = self._frames.popleft()
+                new_samples = self._new_samples(frame)
+                if self.protocol == 'udp':
+                    # Fenêtre entière du premier envoi : découpée en datagrammes
+                    packets = encode_packets(frame, new_samples, self.kinds, MAX_DATAGRAM)
+                    if not packets:
+                        self.dropped_packets += len(self.subscribers)
+                    for packet in packets:
+                        self._send_udp(packet)
+                else:
+                    self._queue_tcp(encode_frame(frame, new_samples, self.kinds))
+            if self.protocol == 'tcp':
+                self._flush_tcp()
+        self.sock.close()
+        for client in list(self.subscribers) if self.protocol == 'tcp' else []:
+            client.close()
+
+    def _poll(self):
+        """Abonnements UDP et nouvelles connexions TCP."""
+        if self.protocol == 'udp':
+            now = time.monotonic()
+            while True:
+                try:
+                    message, address = self.sock.recvfrom(64)
+                except (BlockingIOError, ConnectionResetError):
+                    break
+                if message == SUBSCRIBE:
+                    self.subscribers[address] = now
+            for address, seen in list(self.subscribers.items()):
+                if now - seen > self.subscriber_timeout:
+                    del self.subscribers[address]
+        else:
+            while True:
+                try:
+                    client, _ = self.sock.accept()
+                except BlockingIOError:
+                    break
+                client.setblocking(False)
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.subscribers[client] = bytearray()
+
+    def _send_udp(self, packet):
+        if len(packet) > MAX_DATAGRAM:
+            self.dropped_packets += len(self.subscribers)
+            return
+        for address in list(self.subscribers):
+            try:
+                self.sock.sendto(packet, address)
+            except (BlockingIOError, OSError):
+                self.dropped_packets += 1
+        self.sent += 1
+
+    def _queue_tcp(self, packet):
+        for client, pending in self.subscribers.items():
+            if len(pending) > self.max_pending:
+                self.dropped_packets += 1  # abonné trop lent : paquet entier abandonné
+            else:
+                pending += LENGTH.pack(len(packet)) + packet
+        self.sent += 1
+
+    def _flush_tcp(self):
+        for client, pending in list(self.subscribers.items()):
+            if not pending:
+                continue
+            try:
+                sent = client.send(pending)
+                del pending[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                client.close()
+                del self.subscribers[client]
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        else:
+            self.sock.close()
+
+class FrameSubscriber:
+    """
+    Client de FramePublisher (consommateur de test ou service externe).
+    receive() renvoie le prochain paquet décodé, ou None après 'timeout' secondes.
+    """
+    def __init__(self, url='udp://127.0.0.1:5005', renew_interval=2.0):
+        self.protocol, self.host, self.port = parse_url(url)
+        self.renew_interval = renew_interval
+        if self.protocol == 'udp':
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect((self.host, self.port))
+            self._subscribe()
+        else:
+            self.sock = socket.create_connection((self.host, self.port))
+            self._buffer = bytearray()
+
+    def _subscribe(self):
+        self.sock.send(SUBSCRIBE)
+        self._subscribed_at = time.monotonic()
+
+    def receive(self, timeout=1.0):
+        if self.protocol == 'udp':
+            if time.monotonic() - self._subscribed_at > self.renew_interval:
+                self._subscribe()
+            self.sock.settimeout(timeout)
+            try:
+                return decode_packet(self.sock.recv(MAX_DATAGRAM))
+            except (socket.timeout, ConnectionRefusedError):
+                self._subscribe()  # diffuseur absent ou redémarré : renouveler l'abonnement
+                return None
+        deadline = time.monotonic() + timeout
+        while True:
+            if len(self._buffer) >= LENGTH.size:
+                size = LENGTH.unpack_from(self._buffer)[0]
+                if len(self._buffer) >= LENGTH.size + size:
+                    packet = bytes(self._buffer[LENGTH.size:LENGTH.size + size])
+                    del self._buffer[:LENGTH.size + size]
+                    return decode_packet(packet)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                return None
+            data = self.sock.recv(1 << 16)
+            if not data:
+                return None  # connexion fermée par le diffuseur
+            self._buffer += data
+
+    def close(self):
+        self.sock.close()
+
+def main(argv=None):
+    """Consommateur de test : affiche les paquets reçus d'un diffuseur."""
+    parser = argparse.ArgumentParser(description="Réception des résultats diffusés par le pipeline EEG.")
+    parser.add_argument('url', help="udp://hôte:port ou tcp://hôte:port du diffuseur")
+    parser.add_argument('--duration', type=float, default=None, help="Durée d'écoute (s)")
+    args = parser.parse_args(argv)
+    subscriber = FrameSubscriber(args.url)
+    start = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - start < args.duration:
+            packet = subscriber.receive()
+            if packet is None:
+                continue
+            latency = (time.time() - packet['timestamp']) * 1e3
+            parts = [f"{name} {packet[name].shape[0]}x{packet[name].shape[1]}"
+                     for name in MESSAGE_KINDS if name in packet]
+            channels = ','.join(f"Ch{index + 1}" for index in packet['channels'])
+            print(f"{packet['total_samples']:>10d}  [{channels}]  {', '.join(parts)}  latence {latency:6.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import numpy as np
+import scipy.signal
+from batch import sliding_band_powers, reprocess_session, main
+from function import get_band_power_calculator, DEFAULT_BANDS
+from recorder import RawRecorder, load_recording
+
+FS = 250
+
+def test_sliding_band_powers_matches_scipy_per_window(tmp_path):
+    rng = np.random.default_rng(2)
+    data = rng.normal(size=(3, 40 * FS))
+    basename = str(tmp_path / 'session_raw')
+    recorder = RawRecorder(basename, 3, FS, {'eeg_channels': [0, 1, 2]})
+    recorder.start()
+    recorder.write(data)
+    recorder.close()
+    # 0.3 s = 75 échantillons : non multiple du pas de Welch (125), arrondi à 125
+    ends, powers, meta = sliding_band_powers(basename, win_size=4.3, hop=0.3, filtering=False, chunk_seconds=7)
+    assert meta['hop'] * FS == 125
+    recorded, _ = load_recording(basename)
+    win_n = int(round(4.3 * FS))
+    freqs, _ = scipy.signal.welch(np.zeros(win_n), FS, nperseg=FS)
+    calculator = get_band_power_calculator(freqs, DEFAULT_BANDS)
+    for end, power in zip(ends, powers):
+        window = np.asarray(recorded[:, end - win_n:end], dtype=np.float64)
+        _, expected = scipy.signal.welch(window, FS, nperseg=FS, axis=1)
+        np.testing.assert_allclose(power, calculator.compute(expected), rtol=1e-9)
+
+def test_timestamp_column_uses_per_sample_timestamps(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 12 * FS
+    data = np.vstack([rng.normal(size=(2, n)), 1.7e9 + 0.123 + np.arange(n) / FS])
+    basename = str(tmp_path / 'session_raw')
+    recorder = RawRecorder(basename, 3, FS, {'eeg_channels': [0, 1]}, timestamp_row=2)
+    recorder.start()
+    recorder.write(data)
+    recorder.close()
+    summary = reprocess_session(basename, str(tmp_path / 'out'), win_size=2, hop=0.5)
+    columns = np.load(summary['output'])
+    np.testing.assert_array_equal(columns['timestamp'], data[2, columns['sample'] - 1])
+
+def test_main_only_picks_recordings_from_a_glob(tmp_path):
+    basename = str(tmp_path / 'T1_raw')
+    recorder = RawRecorder(basename, 2, FS, {'eeg_channels': [0, 1]}, timestamp_row=1)
+    recorder.start()
+    recorder.write(np.random.default_rng(4).normal(size=(2, 5 * FS)))
+    recorder.close()
+    (tmp_path / 'T1_power.csv').write_text('Time\n')
+    np.savez(tmp_path / 'T1_epochs.npz', epochs=np.zeros(1))
+    output = tmp_path / 'out'
+    assert main([str(tmp_path / '*'), '--output-dir', str(output), '--workers', '1']) == 0
+    assert sorted(path.name for path in output.iterdir()) == ['T1_raw_bands.json', 'T1_raw_bands.npz']
@@ -0,0 +1,16 @@
+import benchmark
+
+def test_suite_measures_every_case_in_steady_state():
+    results = benchmark.run_suite([2], [250], [2], hop=0.1, budget=0.0, verbose=False)
+    names = [result['name'] for result in results]
+    assert 'WelchEngine.update' in names and 'DisplayDecimator.lttb' in names
+    assert len(names) == len(set(names))
+    for result in results:
+        assert result['calls'] >= 5 and result['p50_ms'] > 0 and result['samples_per_s'] > 0
+        assert (result['channels'], result['fs'], result['window_s']) == (2, 250, 2)
+
+def test_import_budgets_defer_heavy_modules():
+    # scipy et brainflow ne doivent être chargés qu'à la première utilisation
+    results = benchmark.check_imports({'function': (10000, ('scipy', 'brainflow'))}, repeat=1, verbose=False)
+    assert results[0]['ok'] in (True, None)
+    assert not results[0].get('eager_modules')
@@ -0,0 +1,40 @@
+import numpy as np
+from boards import ReplayBoard
+from recorder import RawRecorder
+
+FS = 250
+
+def test_replay_reproduces_recording_exactly(tmp_path):
+    rng = np.random.default_rng(8)
+    n = 4 * FS + 3
+    data = rng.normal(scale=20, size=(5, n)).astype(np.float32).astype(np.float64)
+    data[4] = 1.7e9 + np.arange(n) / FS
+    basename = str(tmp_path / 'trial_raw')
+    recorder = RawRecorder(basename, 5, FS, {'board_id': 0, 'eeg_channels': [0, 1, 2, 3]}, timestamp_row=4)
+    recorder.start()
+    for start in range(0, n, 100):
+        recorder.write(data[:, start:start + 100])
+    recorder.close()
+
+    board = ReplayBoard(basename, speed=0, chunk_size=64)
+    board.start_stream()
+    chunks = []
+    while not board.finished:
+        chunks.append(board.get_board_data())
+    board.stop_stream()
+    assert all(chunk.shape[1] <= 64 for chunk in chunks)
+    # Signaux identiques à l'enregistrement, horodatages en pleine précision
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=1), data)
+    assert board.get_board_data().shape == (5, 0)
+
+def test_replay_loops_back_to_the_start(tmp_path):
+    data = np.arange(3 * 100, dtype=np.float64).reshape(3, 100)
+    basename = str(tmp_path / 'loop_raw')
+    recorder = RawRecorder(basename, 3, FS, {'board_id': 0})
+    recorder.start()
+    recorder.write(data)
+    recorder.close()
+    board = ReplayBoard(basename, speed=0, chunk_size=70, loop=True)
+    board.start_stream()
+    replayed = np.concatenate([board.get_board_data() for _ in range(4)], axis=1)
+    np.testing.assert_array_equal(replayed, np.tile(data, 3)[:, :280])
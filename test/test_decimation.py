@@ -0,0 +1,40 @@
+import numpy as np
+from decimation import DisplayDecimator
+from function import EEGRingBuffer
+
+def test_cached_minmax_matches_fresh_decimation():
+    rng = np.random.default_rng(4)
+    data = rng.normal(size=(3, 6000))
+    buffer = EEGRingBuffer(3, 2500)
+    cached = DisplayDecimator('minmax')
+    pos = 0
+    for size in [400, 25, 1, 333, 25, 1000, 7] * 3:
+        buffer.append(data[:, pos:pos + size])
+        pos += size
+        x, y = cached.update(buffer.latest(), buffer.total_samples, 300)
+        expected_x, expected_y = DisplayDecimator('minmax').update(buffer.latest(), buffer.total_samples, 300)
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_array_equal(y, expected_y)
+        # Enveloppe : deux points par paquet (plus les bords partiels), au plus un paquet par pixel
+        assert y.shape[1] <= 2 * (300 + 2)
+
+def test_lttb_decimates_and_keeps_window_edges():
+    data = np.sin(np.arange(2500) / 20.0)[np.newaxis]
+    x, y = DisplayDecimator('lttb').update(data, 12500, 400)
+    assert y.shape[1] < data.shape[1]
+    assert x[0, 0] == 10000 and x[0, -1] == 12499
+    assert y[0, 0] == data[0, 0] and y[0, -1] == data[0, -1]
+
+def test_cached_lttb_matches_fresh_decimation():
+    rng = np.random.default_rng(5)
+    data = np.cumsum(rng.normal(size=(2, 8000)), axis=1)
+    buffer = EEGRingBuffer(2, 2500)
+    cached = DisplayDecimator('lttb')
+    pos = 0
+    for size in [400, 25, 1, 333, 25, 1000, 7, 60] * 3:
+        buffer.append(data[:, pos:pos + size])
+        pos += size
+        x, y = cached.update(buffer.latest(), buffer.total_samples, 200)
+        expected_x, expected_y = DisplayDecimator('lttb').update(buffer.latest(), buffer.total_samples, 200)
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_array_equal(y, expected_y)
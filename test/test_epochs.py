@@ -0,0 +1,68 @@
+import numpy as np
+from epochs import EpochCollector, find_markers, epochs_from_recording
+from function import EEGRingBuffer
+from recorder import RawRecorder
+
+FS = 250
+
+class ArrayHistory:
+    """Historique de session minimal (tous les échantillons en mémoire)."""
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def read(self, first, last):
+        return self.data[:, first:last]
+
+def signal(n):
+    # Rampe : chaque échantillon vaut son indice absolu, l'époque attendue est donc connue
+    return np.tile(np.arange(n, dtype=float), (2, 1))
+
+def test_epochs_at_window_and_stream_edges():
+    data = signal(3000)
+    collector = EpochCollector(2, FS, tmin=-0.2, tmax=0.4, baseline=False)
+    buffer = EEGRingBuffer(2, 400)
+    # Trop tôt (début avant le flux), au bord de la fenêtre, en attente de la fin du flux
+    onsets = [20, 50, 1000, 2950]
+    markers = np.zeros(3000)
+    markers[onsets] = [1, 2, 3, 4]
+    for start in range(0, 3000, 100):
+        collector.add_events(*find_markers(markers[start:start + 100], buffer.total_samples))
+        buffer.append(data[:, start:start + 100])
+        collector.update(buffer)
+    assert collector.missed == 1 and len(collector.pending) == 1
+    assert list(collector.onsets) == [50, 1000]
+    for epoch, onset in zip(collector.epochs, collector.onsets):
+        np.testing.assert_array_equal(epoch, data[:, onset - collector.pre:onset + collector.post])
+    # Marqueur 4 : il manque des échantillons post-stimulus, l'époque reste en attente
+    assert collector.pending[0][0] == 2950 - collector.pre
+
+def test_epoch_out_of_buffer_is_read_from_history():
+    data = signal(2000)
+    collector = EpochCollector(2, FS, tmin=-0.2, tmax=0.4, baseline=False)
+    buffer = EEGRingBuffer(2, 200)
+    buffer.append(data[:, :1500])  # retard de traitement : l'événement 1000 est déjà sorti du buffer
+    collector.add_events([1000], [7])
+    assert collector.update(buffer) == 0 and collector.missed == 1
+    collector.history = ArrayHistory(data[:, :1500])
+    collector.add_events([1000], [7])
+    assert collector.update(buffer) == 1
+    np.testing.assert_array_equal(collector.epochs[0], data[:, 950:1100])
+
+def test_epochs_from_recording_skips_markers_too_close_to_edges(tmp_path):
+    rng = np.random.default_rng(16)
+    data = np.zeros((4, 10 * FS))
+    data[1:3] = rng.normal(size=(2, 10 * FS))
+    data[3, [10, 500, 1500, 10 * FS - 5]] = [1, 1, 2, 1]
+    basename = str(tmp_path / 'trial_raw')
+    recorder = RawRecorder(basename, 4, FS, {'eeg_channels': [1, 2], 'marker_channel': 3})
+    recorder.start()
+    recorder.write(data)
+    recorder.close()
+    collector = epochs_from_recording(basename, tmin=-0.2, tmax=0.8)
+    assert list(collector.onsets) == [500, 1500] and collector.missed == 2
+    expected = data[1:3, 1500 - 50:1500 + 200].astype(np.float32).astype(np.float64)
+    expected -= expected[:, :50].mean(axis=1, keepdims=True)
+    np.testing.assert_allclose(collector.erp(2), expected, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,78 @@
+import numpy as np
+import scipy.signal
+from function import EEGRingBuffer, WelchEngine, StreamingEEGFilter, eeg_filtering, get_filter_design
+
+FS = 250
+
+def stream(buffer, data, chunks):
+    """Ajoute 'data' au buffer par blocs de tailles 'chunks' (cycliques)."""
+    pos, k = 0, 0
+    while pos < data.shape[1]:
+        step = chunks[k % len(chunks)]
+        buffer.append(data[:, pos:pos + step])
+        pos = min(pos + step, data.shape[1])
+        k += 1
+        yield pos
+
+def test_ring_buffer_latest_is_chronological():
+    data = np.arange(3 * 1000, dtype=float).reshape(3, 1000)
+    buffer = EEGRingBuffer(3, 128)
+    for pos in stream(buffer, data, [1, 7, 50, 300]):
+        assert buffer.total_samples == pos
+        np.testing.assert_array_equal(buffer.latest(), data[:, max(0, pos - 128):pos])
+    np.testing.assert_array_equal(buffer.latest(10), data[:, -10:])
+
+def test_welch_engine_matches_scipy_on_aligned_window():
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(4, 20 * FS))
+    capacity = 10 * FS
+    buffer = EEGRingBuffer(4, capacity)
+    engine = WelchEngine(4, FS, capacity)
+    for pos in stream(buffer, data, [engine.step]):
+        freqs, psds = engine.update(buffer)
+    expected_freqs, expected = scipy.signal.welch(buffer.latest(), FS, nperseg=engine.nperseg, axis=1)
+    np.testing.assert_allclose(freqs, expected_freqs)
+    np.testing.assert_allclose(psds, expected, rtol=1e-10)
+
+def test_welch_engine_keeps_only_segments_inside_window():
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(4, 30 * FS))
+    capacity = 10 * FS + 37  # début de fenêtre non aligné sur le pas des segments
+    buffer = EEGRingBuffer(4, capacity)
+    engine = WelchEngine(4, FS, capacity)
+    step = engine.step
+    for pos in stream(buffer, data, [13, 61, 250, 7]):
+        _, psds = engine.update(buffer)
+        if pos < capacity:
+            continue
+        base = pos - capacity
+        first, last = -(-base // step), (pos - engine.nperseg) // step
+        segments = buffer.latest()[:, first * step - base:last * step - base + engine.nperseg]
+        _, expected = scipy.signal.welch(segments, FS, nperseg=engine.nperseg, axis=1)
+        np.testing.assert_allclose(psds, expected, rtol=1e-10)
+
+def test_resized_buffer_keeps_absolute_counter():
+    data = np.arange(2 * 500, dtype=float).reshape(2, 500)
+    buffer = EEGRingBuffer(2, 200)
+    buffer.append(data[:, :450])
+    for capacity in (100, 300):
+        resized = buffer.resized(capacity)
+        assert resized.total_samples == 450
+        np.testing.assert_array_equal(resized.latest(), data[:, 450 - min(capacity, 200):450])
+        resized.append(data[:, 450:])
+        np.testing.assert_array_equal(resized.latest(50), data[:, -50:])
+
+def test_filter_design_at_cyton_daisy_rate():
+    # Cyton + Daisy : 125 Hz, Nyquist 62.5 Hz sous la coupure haute par défaut (100 Hz)
+    fs = 125
+    design = get_filter_design(fs, notch_freq=60, harmonics=2)
+    assert design.highcut < fs / 2 and design.notch_freqs == [60]
+    t = np.arange(20 * fs) / fs
+    data = np.vstack([np.sin(2 * np.pi * 10 * t), np.sin(2 * np.pi * 60 * t)])
+    stream_filter = StreamingEEGFilter(2, fs, notch_freq=60, harmonics=2)
+    filtered = np.hstack([stream_filter.process(data[:, k:k + 25]) for k in range(0, data.shape[1], 25)])
+    steady = filtered[:, 10 * fs:]
+    assert 0.8 < steady[0].std() / data[0].std() < 1.2
+    assert steady[1].std() < 0.1 * data[1].std()
+    offline = eeg_filtering(data, fs)
+    assert np.isfinite(offline).all()
@@ -0,0 +1,45 @@
+import numpy as np
+from history import SessionHistory
+
+FS = 250
+
+def session_history(tmp_path, data, factor=4):
+    history = SessionHistory(str(tmp_path / 'history'), [1, 2, 3], FS, factor=factor)
+    history.start()
+    board = np.zeros((5, data.shape[1]))
+    board[1:4] = data
+    for start in range(0, data.shape[1], 173):
+        history.write(board[:, start:start + 173])
+    history.close()  # vide la file d'écriture ; les fichiers restent lisibles
+    return history
+
+def test_history_pyramid_levels_hold_block_min_max(tmp_path):
+    rng = np.random.default_rng(9)
+    data = rng.normal(scale=30, size=(3, 10000)).astype(np.float32)
+    history = session_history(tmp_path, data)
+    assert len(history) == 10000
+    np.testing.assert_array_equal(history.read(1234, 5678), data[:, 1234:5678])
+    for level in range(1, len(history._counts)):
+        size = 4 ** level
+        stored = np.asarray(history._map(level))
+        blocks = data[:, :stored.shape[0] * size].reshape(3, -1, size)
+        assert stored.shape[0] == data.shape[1] // size
+        np.testing.assert_array_equal(stored[:, :3].T, blocks.min(axis=2))
+        np.testing.assert_array_equal(stored[:, 3:].T, blocks.max(axis=2))
+
+def test_history_envelope_bounds_points_and_keeps_extremes(tmp_path):
+    rng = np.random.default_rng(10)
+    data = rng.normal(scale=30, size=(3, 10000)).astype(np.float32)
+    history = session_history(tmp_path, data)
+    start, stop = 1000, 9375  # bornes non alignées sur les paquets
+    t, lo, hi = history.envelope(start / FS, stop / FS, max_points=300)
+    assert lo.shape == hi.shape == (3, t.size) and 0 < t.size <= 2 * 300
+    # Paquets entiers : l'enveloppe couvre la plage demandée (et un peu plus aux bords)
+    window = data[:, start:stop]
+    assert (lo.min(axis=1) <= window.min(axis=1)).all() and (hi.max(axis=1) >= window.max(axis=1)).all()
+    covering = data[:, start // 64 * 64:-(-stop // 64) * 64]
+    assert (lo.min(axis=1) >= covering.min(axis=1)).all() and (hi.max(axis=1) <= covering.max(axis=1)).all()
+    # Zoom fort : échantillons eux-mêmes
+    t, lo, hi = history.envelope(start / FS, (start + 100) / FS, max_points=300)
+    np.testing.assert_array_equal(lo, data[:, start:start + 100])
+    np.testing.assert_allclose(t * FS, np.arange(start, start + 100))
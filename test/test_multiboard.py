@@ -0,0 +1,45 @@
+import threading
+import numpy as np
+from multiboard import SharedFrameBuffer
+from pipeline import ProcessedFrame
+
+def test_shared_frame_reads_are_never_torn():
+    n_channels, n_samples, n_freqs, n_bands = 4, 2000, 126, 5
+    shared = SharedFrameBuffer(n_channels, n_samples, n_freqs, n_bands)
+    reader = SharedFrameBuffer(*shared.attach_args())
+    freqs = np.arange(n_freqs, dtype=float)
+    stop = threading.Event()
+    torn, reads = [], []
+
+    def write():
+        # Écrivain unique : chaque résultat est rempli d'une seule valeur, égale à total_samples
+        version = 0
+        while not stop.is_set():
+            version += 1
+            value = float(version)
+            shared.publish(ProcessedFrame(250, version, np.full((n_channels, n_samples), value),
+                                          np.full((n_channels, n_samples), value), freqs,
+                                          np.full((n_channels, n_freqs), value), np.full((n_channels, n_bands), value),
+                                          channels=list(range(n_channels))))
+
+    def read():
+        while not stop.is_set():
+            frame = reader.frame(250, ['a'] * n_bands)
+            if frame is None:
+                continue
+            reads.append(frame.seq)
+            values = [frame.raw, frame.filtered, frame.psds, frame.band_power]
+            if any((array != frame.total_samples).any() for array in values):
+                torn.append(frame.seq)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    stop.wait(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    reader.close()
+    shared.close(unlink=True)
+    assert reads and not torn
+    assert all(seq % 2 == 0 for seq in reads)
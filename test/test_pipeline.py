@@ -0,0 +1,71 @@
+import numpy as np
+from pipeline import EEGProcessor, RateScheduler
+
+FS = 250
+
+def test_pending_epoch_survives_window_change():
+    rng = np.random.default_rng(5)
+    processor = EEGProcessor(FS, list(range(1, 9)), 2, marker_row=9)
+
+    def chunk(n, marker=None):
+        data = rng.normal(size=(10, n))
+        data[9] = 0
+        if marker is not None:
+            data[9, marker] = 3
+        return data
+
+    processor.process(chunk(600))
+    processor.process(chunk(25, marker=10))
+    # Événement en attente des échantillons post-stimulus au moment du changement de fenêtre
+    processor.set_window(4)
+    assert processor.buffer.total_samples == 625
+    for _ in range(20):
+        processor.process(chunk(25))
+    assert list(processor.epochs.onsets) == [610] and not processor.epochs.pending
+
+def test_error_during_block_resynchronizes_filtered_buffer():
+    rng = np.random.default_rng(6)
+    processor = EEGProcessor(FS, list(range(1, 9)), 2)
+    processor.process(rng.normal(size=(10, 300)))
+    update = processor.quality.update
+
+    def failing_update(*args):
+        raise RuntimeError("bloc corrompu")
+
+    processor.quality.update = failing_update
+    try:
+        processor.process(rng.normal(size=(10, 40)))
+    except RuntimeError:
+        pass
+    processor.quality.update = update
+    processor.process(rng.normal(size=(10, 40)))
+    # Buffers filtré et masque reconstruits depuis le brut : mêmes tailles que le buffer brut
+    assert processor.buffer.size == processor.buffer_filt.size == processor.artifact_mask.size == 380
+    assert processor.buffer_filt.latest().shape == processor.buffer.latest().shape
+    processor.update_spectrum()
+    assert processor.psds.shape[0] == 8
+
+def test_rate_scheduler_skips_early_calls_and_counts_missed_periods():
+    schedule = RateScheduler(0.1)
+    assert schedule.due(0.0)
+    assert not schedule.due(0.05)          # trop tôt : image sautée
+    assert schedule.due(0.1)
+    assert schedule.due(0.45) and schedule.skipped == 2 and schedule.late == 1
+    assert not schedule.due(0.46)
+    tolerant = RateScheduler(0.1, tolerance=0.25)
+    assert tolerant.due(0.0) and tolerant.due(0.098) and not tolerant.due(0.15)
+    assert tolerant.skipped == 0 and tolerant.runs == 2
+
+def test_spectrum_is_not_published_under_another_selection():
+    rng = np.random.default_rng(7)
+    processor = EEGProcessor(FS, list(range(1, 9)), 2, channels=[0, 1])
+    processor.process(rng.normal(size=(10, 500)))
+    processor.update_spectrum()
+    assert processor.snapshot().channels == [0, 1] and processor.snapshot().psds is not None
+    # Même nombre de canaux, canaux différents : l'ancien spectre ne doit pas être étiqueté [2, 3]
+    processor.request_selection([2, 3])
+    processor.process(rng.normal(size=(10, 25)))
+    frame = processor.snapshot()
+    assert frame.channels == [2, 3] and frame.psds is None and frame.band_power is None
+    processor.update_spectrum()
+    assert processor.snapshot().psds.shape[0] == 2
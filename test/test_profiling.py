@@ -0,0 +1,18 @@
+import threading
+from profiling import StageTimer
+
+def test_record_from_several_threads_keeps_every_measure():
+    timer = StageTimer(history=64)
+
+    def worker():
+        for k in range(2000):
+            timer.record('record', 0.0, 1e-3)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    p50, p99, count = timer.stats('record')
+    assert count == 8000
+    assert p50 == p99 == 1.0
@@ -0,0 +1,45 @@
+import numpy as np
+from quality import SignalQuality, QUALITY_GOOD, QUALITY_ARTIFACT, QUALITY_BAD
+
+FS = 250
+
+def channels(n):
+    rng = np.random.default_rng(11)
+    t = np.arange(n) / FS
+    data = np.zeros((4, n))
+    data[0] = rng.normal(scale=10, size=n)                                       # bon
+    data[1] = 0.0                                                                 # plat
+    data[2] = np.where(np.arange(n) % 5 == 0, 187500.0, rng.normal(scale=10, size=n))  # saturé
+    data[3] = 40 * np.sin(2 * np.pi * 60 * t) + rng.normal(scale=5, size=n)       # secteur
+    return data
+
+def test_streamed_metrics_match_direct_computation_on_window():
+    data = channels(10 * FS + 13)
+    quality = SignalQuality(4, FS)
+    pos = 0
+    for size in [7, 250, 31, 1, 400] * 10:
+        chunk = data[:, pos:pos + size]
+        if not chunk.shape[1]:
+            break
+        mask = quality.update(chunk)
+        np.testing.assert_array_equal(mask, np.abs(chunk) >= quality.rail_uV)
+        pos += chunk.shape[1]
+    # Fenêtre : les n_blocks derniers paquets, le plus récent étant partiel
+    first = ((pos - 1) // quality.block - quality.n_blocks + 1) * quality.block
+    window = data[:, first:pos]
+    metrics = quality.metrics()
+    np.testing.assert_allclose(metrics['std'], window.std(axis=1), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(metrics['rail'], (np.abs(window) >= quality.rail_uV).mean(axis=1))
+    assert list(metrics['status']) == [QUALITY_GOOD, QUALITY_BAD, QUALITY_BAD, QUALITY_ARTIFACT]
+    assert metrics['flat'][1] and metrics['railed'][2] and metrics['line_ratio'][3] > 0.5
+
+def test_filtered_amplitude_artifacts_are_masked():
+    quality = SignalQuality(2, FS)
+    raw = np.zeros((2, 100))
+    filtered = np.random.default_rng(12).normal(scale=10, size=(2, 100))
+    filtered[1, 50] = 400.0
+    mask = quality.update(raw + filtered, filtered)
+    assert mask.sum() == 1 and mask[1, 50]
+    metrics = quality.metrics()
+    assert metrics['artifact'][1] == 1 / 100 and metrics['status'][1] == QUALITY_ARTIFACT
+    assert metrics['status'][0] == QUALITY_GOOD
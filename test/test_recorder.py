@@ -0,0 +1,76 @@
+import numpy as np
+from recorder import RawRecorder, load_recording, load_timestamps, export_csv, export_edf
+
+FS = 250
+
+def test_chunks_after_close_are_counted_not_queued(tmp_path):
+    recorder = RawRecorder(str(tmp_path / 'trial_raw'), 3, FS, max_queue=1)
+    recorder.start()
+    recorder.write(np.ones((3, 10)))
+    recorder.close()
+    # Bloc livré par l'acquisition après close() : ni écrit, ni bloquant
+    recorder.write(np.ones((3, 10)))
+    recorder.close()
+    data, meta = load_recording(str(tmp_path / 'trial_raw'))
+    assert data.shape == (3, 10) and meta['n_samples'] == 10
+    assert recorder.dropped_chunks == 1
+
+def record(basename, data, timestamp_row=None, chunks=(37, 250, 1)):
+    recorder = RawRecorder(basename, data.shape[0], FS, {'eeg_channels': [1, 2]}, timestamp_row=timestamp_row)
+    recorder.start()
+    pos, k = 0, 0
+    while pos < data.shape[1]:
+        recorder.write(data[:, pos:pos + chunks[k % len(chunks)]])
+        pos += chunks[k % len(chunks)]
+        k += 1
+    recorder.close()
+
+def session(n=3 * FS + 17):
+    rng = np.random.default_rng(7)
+    data = np.zeros((4, n))
+    data[1:3] = rng.normal(scale=50, size=(2, n))
+    data[0] = np.arange(n)
+    data[3] = 1.7e9 + np.arange(n) / FS  # horodatages BrainFlow
+    return data
+
+def test_record_and_load_round_trip(tmp_path):
+    data = session()
+    basename = str(tmp_path / 'trial_raw')
+    record(basename, data, timestamp_row=3)
+    loaded, meta = load_recording(basename)
+    np.testing.assert_array_equal(loaded, data.astype(np.float32))
+    assert meta['n_samples'] == data.shape[1] and meta['fs'] == FS and meta['timestamp_channel'] == 3
+    # La ligne float32 perd les horodatages, le fichier float64 les garde exactement
+    np.testing.assert_array_equal(load_timestamps(basename), data[3])
+
+def test_export_csv_round_trip(tmp_path):
+    data = session()
+    basename = str(tmp_path / 'trial_raw')
+    record(basename, data, timestamp_row=3)
+    export_csv(basename, str(tmp_path / 'trial.csv'), block=100)
+    table = np.loadtxt(tmp_path / 'trial.csv', delimiter=',', skiprows=1)
+    np.testing.assert_array_equal(table[:, 0], np.arange(data.shape[1]))
+    np.testing.assert_allclose(table[:, 1:4], data[:3].astype(np.float32).T, rtol=1e-5)
+    np.testing.assert_allclose(table[:, 4], data[3], rtol=0, atol=1e-6)
+
+def test_export_edf_round_trip(tmp_path):
+    data = session()
+    basename = str(tmp_path / 'trial_raw')
+    record(basename, data)
+    export_edf(basename, str(tmp_path / 'trial.edf'), block_records=2)
+    raw = (tmp_path / 'trial.edf').read_bytes()
+    header_size, n_records, ns = int(raw[184:192]), int(raw[236:244]), int(raw[252:256])
+    assert (ns, n_records) == (2, 4) and header_size == 256 * (ns + 1)
+
+    def fields(offset, width):
+        return [raw[offset + i * width:offset + (i + 1) * width].decode().strip() for i in range(ns)]
+
+    base = 256 + ns * (16 + 80 + 8)
+    phys_min = np.array(fields(base, 8), dtype=float)
+    phys_max = np.array(fields(base + 8 * ns, 8), dtype=float)
+    assert fields(256, 16) == ['Ch1', 'Ch2']
+    digital = np.frombuffer(raw[header_size:], '<i2').reshape(n_records, ns, FS).transpose(1, 0, 2).reshape(ns, -1)
+    gain = (phys_max - phys_min) / 65535
+    physical = (digital.astype(np.float64) + 32768) * gain[:, np.newaxis] + phys_min[:, np.newaxis]
+    expected = data[1:3].astype(np.float32)
+    np.testing.assert_allclose(physical[:, :data.shape[1]], expected, atol=gain.max())
@@ -0,0 +1,26 @@
+import numpy as np
+from pipeline import ProcessedFrame
+from streaming import MAX_DATAGRAM, encode_frame, encode_packets, decode_packet
+
+def test_initial_window_is_split_into_datagrams():
+    rng = np.random.default_rng(3)
+    raw, filtered = rng.normal(size=(2, 8, 2500))
+    frame = ProcessedFrame(250, 12500, raw, filtered, band_power=rng.random((8, 5)), channels=[0, 2, 3, 4, 5, 6, 7, 9])
+    packets = encode_packets(frame, 12500)
+    assert len(packets) > 1 and all(len(packet) <= MAX_DATAGRAM for packet in packets)
+    decoded = [decode_packet(packet) for packet in packets]
+    assert decoded[-1]['total_samples'] == 12500
+    assert all(packet['channels'] == frame.channels for packet in decoded)
+    assert 'band_power' in decoded[-1] and 'band_power' not in decoded[0]
+    for kind, values in (('raw', raw), ('filtered', filtered)):
+        np.testing.assert_array_equal(np.hstack([packet[kind] for packet in decoded]), values.astype('f4'))
+    # Chaque paquet se termine à l'indice absolu qui précède le suivant
+    for previous, packet in zip(decoded, decoded[1:]):
+        assert packet['total_samples'] - previous['total_samples'] == packet['raw'].shape[1]
+
+def test_small_frame_is_a_single_packet():
+    frame = ProcessedFrame(250, 1000, np.ones((2, 500)), channels=[1, 4])
+    packets = encode_packets(frame, 25)
+    assert packets == [encode_frame(frame, 25)]
+    packet = decode_packet(packets[0])
+    assert packet['channels'] == [1, 4] and packet['raw'].shape == (2, 25)
@@ -0,0 +1,42 @@
+import numpy as np
+import scipy.signal
+from function import EEGRingBuffer
+from timefreq import spectrogram, StreamingSpectrogram
+
+FS = 250
+
+def test_stft_matches_scipy_spectrogram():
+    rng = np.random.default_rng(13)
+    data = rng.normal(size=(3, 20 * FS + 11))
+    freqs, times, power = spectrogram(data, FS, nperseg=FS, hop=50, block_segments=7)
+    expected_freqs, expected_times, expected = scipy.signal.spectrogram(
+        data, FS, window='hann', nperseg=FS, noverlap=FS - 50, detrend='constant', scaling='density', axis=1)
+    np.testing.assert_allclose(freqs, expected_freqs)
+    np.testing.assert_allclose(times, expected_times)
+    np.testing.assert_allclose(power, expected, rtol=1e-9, atol=1e-15)
+
+def test_multitaper_of_white_noise_is_flat():
+    rng = np.random.default_rng(14)
+    data = rng.normal(scale=2.0, size=(1, 60 * FS))
+    freqs, _, power = spectrogram(data, FS, nperseg=FS, method='multitaper')
+    # Densité d'un bruit blanc de variance s² : 2 s² / fs sur les fréquences non DC
+    level = power[0, 1:-1].mean()
+    np.testing.assert_allclose(level, 2 * 4.0 / FS, rtol=0.05)
+
+def test_streaming_columns_match_offline_spectrogram():
+    rng = np.random.default_rng(15)
+    data = rng.normal(size=(2, 30 * FS))
+    buffer = EEGRingBuffer(2, 5 * FS)
+    streaming = StreamingSpectrogram(2, FS, depth=40, hop=25)
+    pos = 0
+    for size in [13, 100, 7, 250] * 40:
+        if pos >= data.shape[1]:
+            break
+        buffer.append(data[:, pos:pos + size])
+        pos = min(pos + size, data.shape[1])
+        streaming.update(buffer)
+    times, power = streaming.spectrogram()
+    _, offline_times, offline = spectrogram(data[:, :pos], FS, nperseg=FS, hop=25)
+    assert power.shape[2] == 40
+    np.testing.assert_allclose(times, offline_times[-40:])
+    np.testing.assert_allclose(power, offline[:, :, -40:], rtol=1e-9)
@@ -0,0 +1,27 @@
+import numpy as np
+from waterfall import WaterfallBuffer
+
+def drawn_faces(buffer):
+    return np.concatenate([buffer.faces[first:first + count] for first, count in buffer.draw_ranges()])
+
+def test_ring_draws_only_consecutive_columns():
+    buffer = WaterfallBuffer(5, np.arange(4.0), dx=0.5)
+    for column in range(13):
+        buffer.push(np.full(4, float(column)))
+        assert buffer.take_updates() == [column % 5]
+        if column == 0:
+            assert buffer.draw_ranges() == []
+            continue
+        x = buffer.vertexes[:, 0][drawn_faces(buffer)]
+        # Chaque face relie deux colonnes voisines dans le temps, parmi les 'depth' dernières
+        assert np.all(x.max(axis=1) - x.min(axis=1) == 0.5)
+        assert x.min() == max(0, column - 4) * 0.5 and x.max() == column * 0.5
+        assert len(drawn_faces(buffer)) == min(column, 4) * buffer.faces_per_cell
+        assert buffer.offset == -column * 0.5
+
+def test_updates_list_each_written_slot_once():
+    buffer = WaterfallBuffer(3, np.arange(2.0))
+    for column in range(7):
+        buffer.push(np.zeros(2))
+    assert sorted(buffer.take_updates()) == [0, 1, 2]
+    assert buffer.take_updates() == []
@@ -0,0 +1,146 @@
+from functools import lru_cache
+import numpy as np
+
+TF_METHODS = ('stft', 'multitaper')
+
+class TimeFrequencyPlan:
+    """
+    Paramètres précalculés d'un spectrogramme (STFT ou multitaper) : table des fenêtres
+    (Hann, ou tapers DPSS pour 'multitaper'), facteurs d'échelle (densité, µV²/Hz) et
+    fréquences. Construit une fois par jeu de paramètres (voir get_tf_plan) puis appliqué
+    à des lots de segments de n'importe quelle forme.
+    'nw' est le demi-produit temps x bande passante des tapers DPSS ; 2*nw - 1 tapers par défaut.
+    """
+    def __init__(self, fs, nperseg, hop=None, method='stft', nw=4.0, n_tapers=None):
+        if method not in TF_METHODS:
+            raise ValueError(f"Méthode inconnue : {method} (attendu {', '.join(TF_METHODS)})")
+        import scipy.signal  # chargé à la création du premier plan seulement
+        self.fs = fs
+        self.nperseg = int(nperseg)
+        self.hop = max(1, int(hop or self.nperseg // 2))
+        self.method = method
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1 / fs)
+        if method == 'stft':
+            tapers = scipy.signal.get_window('hann', self.nperseg)[np.newaxis]
+        else:
+            n_tapers = int(n_tapers or max(1, int(2 * nw) - 1))
+            tapers = np.atleast_2d(scipy.signal.windows.dpss(self.nperseg, nw, Kmax=n_tapers))
+        self.tapers = tapers
+        self.tapers.setflags(write=False)
+        # Moyenne des tapers, chacun normalisé en densité ; fréquences non DC (et non Nyquist) doublées
+        self.scale = 1.0 / (fs * np.sum(tapers ** 2, axis=1) * len(tapers))
+        self.onesided = np.full(self.freqs.size, 2.0)
+        self.onesided[0] = 1.0
+        if self.nperseg % 2 == 0:
+            self.onesided[-1] = 1.0
+
+    def transform(self, segments):
+        """
+        Densités spectrales d'un lot de segments (..., nperseg) -> (..., fréquences),
+        en une seule FFT sur tous les segments et tous les tapers.
+        """
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spec = np.fft.rfft(segments[..., np.newaxis, :] * self.tapers, axis=-1)
+        power = spec.real ** 2 + spec.imag ** 2
+        return np.einsum('...kf,k->...f', power, self.scale) * self.onesided
+
+    def n_segments(self, n_samples):
+        return max(0, (n_samples - self.nperseg) // self.hop + 1)
+
+@lru_cache(maxsize=32)
+def get_tf_plan(fs, nperseg, hop=None, method='stft', nw=4.0, n_tapers=None):
+    """Plan mis en cache par paramètres (les tapers DPSS sont coûteux à calculer)."""
+    return TimeFrequencyPlan(fs, nperseg, hop, method, nw, n_tapers)
+
+def spectrogram(data, fs, nperseg=None, hop=None, method='stft', nw=4.0, n_tapers=None, rows=None,
+                block_segments=256):
+    """
+    Spectrogramme hors ligne de tout un signal (canaux x échantillons, tableau ou mémoire
+    projetée de load_recording). Les segments sont des vues glissantes sans copie du signal,
+    transformées par lots de 'block_segments' pour borner la mémoire temporaire ; 'rows'
+    sélectionne des lignes bloc par bloc (sans lire les autres lignes de l'enregistrement).
+    Renvoie (fréquences, temps du centre des segments en s, densité canaux x fréquences x segments),
+    comme scipy.signal.spectrogram.
+    """
+    plan = get_tf_plan(fs, int(nperseg or fs), hop, method, nw, n_tapers)
+    rows = list(range(data.shape[0])) if rows is None else list(rows)
+    n_segments = plan.n_segments(data.shape[1])
+    result = np.empty((len(rows), plan.freqs.size, n_segments))
+    for first in range(0, n_segments, block_segments):
+        last = min(n_segments, first + block_segments)
+        region = np.asarray(data[rows, first * plan.hop:(last - 1) * plan.hop + plan.nperseg], dtype=np.float64)
+        segments = np.lib.stride_tricks.sliding_window_view(region, plan.nperseg, axis=1)[:, ::plan.hop]
+        result[:, :, first:last] = plan.transform(segments).transpose(0, 2, 1)
+    times = (np.arange(n_segments) * plan.hop + plan.nperseg / 2) / fs
+    return plan.freqs, times, result
+
+class StreamingSpectrogram:
+    """
+    Spectrogramme glissant sur un EEGRingBuffer : chaque pas de 'hop' échantillons ajoute
+    une colonne (tous les canaux en une transformée). Les segments sont alignés sur les
+    indices absolus (k * hop) comme dans WelchEngine, donc seuls les segments complétés
+    depuis l'appel précédent sont calculés. Les 'depth' dernières colonnes sont gardées
+    dans un anneau miroir : spectrogram() les renvoie dans l'ordre chronologique sans copie.
+    """
+    def __init__(self, n_channels, fs, depth, nperseg=None, hop=None, method='stft', nw=4.0, n_tapers=None):
+        self.plan = get_tf_plan(fs, int(nperseg or fs), hop, method, nw, n_tapers)
+        self.n_channels = n_channels
+        self.fs = fs
+        self.depth = max(1, int(depth))
+        self.freqs = self.plan.freqs
+        self._ring = np.zeros((2 * self.depth, n_channels, self.freqs.size))
+        self._segment = np.zeros(2 * self.depth, dtype=np.int64)  # indice k de chaque colonne
+        self._source = None
+        self._rows = None
+        self.reset()
+
+    def reset(self):
+        """Oublie toutes les colonnes."""
+        self.columns = 0
+        self._next_segment = 0
+
+    def update(self, buffer, rows=None):
+        """
+        Ajoute les colonnes des segments complétés dans le buffer ; renvoie leur nombre.
+        'rows' limite le calcul à certaines lignes du buffer.
+        """
+        rows = None if rows is None else list(rows)
+        if buffer is not self._source or rows != self._rows:
+            self._source = buffer
+            self._rows = rows
+            self.reset()
+        plan = self.plan
+        total = buffer.total_samples
+        view = buffer.latest()
+        base = total - view.shape[1]
+        last = (total - plan.nperseg) // plan.hop
+        first = max(self._next_segment, -(-base // plan.hop), last - self.depth + 1)
+        if total < plan.nperseg or last < first:
+            return 0
+        region = view[:, first * plan.hop - base:last * plan.hop - base + plan.nperseg]
+        if rows is not None:
+            region = region[rows]
+        segments = np.lib.stride_tricks.sliding_window_view(region, plan.nperseg, axis=1)[:, ::plan.hop]
+        psd = plan.transform(segments).transpose(1, 0, 2)  # (segments, canaux, fréquences)
+        slots = np.arange(self.columns, self.columns + psd.shape[0]) % self.depth
+        for offset in (0, self.depth):
+            self._ring[slots + offset] = psd
+            self._segment[slots + offset] = np.arange(first, last + 1)
+        self.columns += psd.shape[0]
+        self._next_segment = last + 1
+        return psd.shape[0]
+
+    def _window(self):
+        # Tranche contiguë de l'anneau : colonnes conservées, de la plus ancienne à la plus récente
+        n = min(self.columns, self.depth)
+        end = self.columns % self.depth + self.depth
+        return slice(end - n, end)
+
+    def spectrogram(self):
+        """
+        (temps du centre des segments en s depuis le début du flux, densité canaux x fréquences x colonnes).
+        La densité est une vue sur l'anneau : la copier si elle doit survivre au prochain update().
+        """
+        window = self._window()
+        times = (self._segment[window] * self.plan.hop + self.plan.nperseg / 2) / self.fs
+        return times, self._ring[window].transpose(1, 2, 0)
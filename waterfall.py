@@ -0,0 +1,90 @@
+import numpy as np
+
+def spectrum_lut(n=256):
+    """Table de couleurs RGBA (bleu -> cyan -> jaune -> rouge) pour les niveaux normalisés 0..1."""
+    stops = np.array([0.0, 0.35, 0.7, 1.0])
+    colors = np.array([[0, 0, 0.5, 1], [0, 0.75, 1, 1], [1, 1, 0, 1], [1, 0, 0, 1]])
+    levels = np.linspace(0, 1, n)
+    return np.stack([np.interp(levels, stops, colors[:, k]) for k in range(4)], axis=1).astype(np.float32)
+
+class WaterfallBuffer:
+    """
+    Géométrie d'un spectrogramme 3D (ou d'une cascade de signaux) en maillage unique.
+    Les sommets et couleurs sont préalloués pour 'depth' colonnes dans un anneau : chaque
+    nouvelle colonne remplace la plus ancienne à son emplacement, et seuls les emplacements
+    modifiés sont à transférer vers la carte graphique (take_updates).
+    L'abscisse d'une colonne est fixée à son écriture (numéro de colonne x dx) : le
+    défilement se fait en translatant l'objet 3D de 'offset', sans réécrire les sommets.
+    Les faces relient chaque emplacement au suivant de l'anneau (deux triangles par cellule)
+    et sont calculées une fois ; draw_ranges donne les cellules à tracer, c'est-à-dire toutes
+    sauf celle qui relie la colonne la plus récente à la plus ancienne.
+    """
+    def __init__(self, depth, y_values, dx=1.0, z_range=(-20.0, 40.0), z_scale=0.5, lut=None):
+        self.depth = max(2, int(depth))
+        self.y_values = np.asarray(y_values, dtype=np.float32)
+        self.n_points = self.y_values.size
+        self.dx = dx
+        self.z_range = z_range
+        self.z_scale = z_scale
+        self.lut = spectrum_lut() if lut is None else lut
+        self.vertexes = np.zeros((self.depth * self.n_points, 3), dtype=np.float32)
+        self.vertexes[:, 1] = np.tile(self.y_values, self.depth)
+        self.colors = np.zeros((self.depth * self.n_points, 4), dtype=np.float32)
+        self.columns = 0  # nombre total de colonnes reçues
+        self.faces = self._ring_faces(self.depth, self.n_points)
+        self.faces_per_cell = 2 * (self.n_points - 1)
+        self._updated = []  # emplacements écrits depuis le dernier take_updates()
+
+    @staticmethod
+    def _ring_faces(depth, n_points):
+        """
+        Deux triangles par cellule entre l'emplacement i et l'emplacement (i + 1) % depth
+        (sommets rangés colonne par colonne), groupés par cellule dans l'ordre des emplacements.
+        """
+        index = np.arange(depth * n_points, dtype=np.uint32).reshape(depth, n_points)
+        following = np.roll(index, -1, axis=0)
+        a, b = index[:, :-1], following[:, :-1]
+        c, d = following[:, 1:], index[:, 1:]
+        return np.concatenate([np.stack([a, b, c], axis=2), np.stack([a, c, d], axis=2)], axis=1).reshape(-1, 3)
+
+    def push(self, values):
+        """
+        Ajoute une colonne (valeurs en dB, une par ordonnée) en O(n_points).
+        """
+        low, high = self.z_range
+        level = np.clip((np.asarray(values, dtype=np.float32) - low) / (high - low), 0, 1)
+        slot = self.columns % self.depth
+        rows = slice(slot * self.n_points, (slot + 1) * self.n_points)
+        self.vertexes[rows, 0] = self.columns * self.dx
+        self.vertexes[rows, 2] = level * (high - low) * self.z_scale
+        self.colors[rows] = self.lut[(level * (len(self.lut) - 1)).astype(np.intp)]
+        if slot not in self._updated:
+            self._updated.append(slot)
+        self.columns += 1
+
+    def take_updates(self):
+        """
+        Emplacements écrits depuis l'appel précédent (les sommets de l'emplacement s sont les
+        lignes s*n_points à (s+1)*n_points de vertexes et colors), puis remet la liste à zéro.
+        """
+        updated, self._updated = self._updated, []
+        return updated
+
+    def draw_ranges(self):
+        """
+        Plages (première face, nombre de faces) de 'faces' à tracer : les cellules entre deux
+        colonnes consécutives dans le temps, sans la cellule qui referme l'anneau.
+        """
+        if self.columns < 2:
+            return []
+        cell = self.faces_per_cell
+        if self.columns <= self.depth:
+            return [(0, (self.columns - 1) * cell)]
+        newest = (self.columns - 1) % self.depth
+        ranges = [((newest + 1) * cell, (self.depth - newest - 1) * cell), (0, newest * cell)]
+        return [(first, count) for first, count in ranges if count]
+
+    @property
+    def offset(self):
+        """Translation en x qui place la colonne la plus récente à l'abscisse 0."""
+        return -(self.columns - 1) * self.dx if self.columns else 0.0